@@ -0,0 +1,584 @@
+"""Benchmarks for building zipped-directory archives.
+
+Synthetic source trees are generated (once, and cached in the data
+directory) for a number of scenarios, then each is built with the
+``zipped-directory`` builder.  Each build is run in a fresh subprocess
+so that its peak RSS can be measured.  For each build, the wall time,
+CPU time (including that of worker threads), peak RSS and size of the
+resulting archive are recorded.
+
+Usage::
+
+    # Run all scenarios, saving the results
+    python benchmarks/bench_build.py run -o results.json
+
+    # Run selected scenarios, at a reduced scale, with builder options
+    python benchmarks/bench_build.py run --scale 0.1 -O workers=0 tiny-files mixed
+
+    # Compare two sets of results, flagging regressions
+    python benchmarks/bench_build.py compare base.json results.json
+
+    # Compare zstd against deflate (zstd requires python >= 3.14)
+    python benchmarks/bench_build.py run -o deflated.json
+    python benchmarks/bench_build.py run -O compression=zstd -o zstd.json
+    python benchmarks/bench_build.py compare deflated.json zstd.json
+
+    # Benchmark and compare two git revisions
+    python benchmarks/bench_build.py compare v0.2.0 HEAD --scale 0.1 -s mixed
+
+The ``compare`` command exits with status 1 if any regressions are
+found.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None  # type: ignore[assignment]
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+DEFAULT_DATA_DIR = BENCH_DIR / ".data"
+
+KiB = 1024
+MiB = 1024 * KiB
+GiB = 1024 * MiB
+
+# Bump this when the tree generators change, to invalidate cached trees
+GENERATOR_VERSION = 1
+
+
+class DataSource:
+    """A deterministic source of compressible and incompressible data."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        words = [
+            "".join(self.rng.choices("abcdefghijklmnopqrstuvwxyz", k=n))
+            for n in self.rng.choices(range(1, 12), k=2000)
+        ]
+        text = " ".join(self.rng.choices(words, k=1_200_000))
+        self.text = text.encode("ascii")[: 4 * MiB]
+
+    def compressible(self, size: int) -> bytes:
+        chunks = []
+        while size > 0:
+            n = min(size, self.rng.randrange(4 * KiB, 256 * KiB))
+            start = self.rng.randrange(len(self.text) - n)
+            chunks.append(self.text[start : start + n])
+            size -= n
+        return b"".join(chunks)
+
+    def incompressible(self, size: int) -> bytes:
+        return self.rng.randbytes(size)
+
+    def write_file(
+        self, path: Path, size: int, incompressible_fraction: float = 0.0
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fp:
+            while size > 0:
+                n = min(size, 4 * MiB)
+                if self.rng.random() < incompressible_fraction:
+                    fp.write(self.incompressible(n))
+                else:
+                    fp.write(self.compressible(n))
+                size -= n
+
+
+def _scaled(n: int | float, scale: float) -> int:
+    return max(1, int(n * scale))
+
+
+def gen_tiny_files(root: Path, scale: float) -> None:
+    """Many tiny files, spread over a thousand directories."""
+    data = DataSource(1)
+    for n in range(_scaled(100_000, scale)):
+        path = root / f"pkg{n % 1000:03d}" / f"mod{n}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data.compressible(data.rng.randrange(1, 1 * KiB)))
+
+
+def gen_large_files(root: Path, scale: float) -> None:
+    """A few multi-gigabyte files, mostly compressible."""
+    data = DataSource(2)
+    for n, size in enumerate([2 * GiB, 3 * GiB, 1 * GiB]):
+        data.write_file(
+            root / "data" / f"large{n}.dat",
+            _scaled(size, scale),
+            incompressible_fraction=0.2,
+        )
+
+
+def gen_deep_nesting(root: Path, scale: float) -> None:
+    """Files in deeply nested directories."""
+    data = DataSource(3)
+    for branch in range(_scaled(50, scale)):
+        path = root / f"branch{branch}"
+        for depth in range(60):
+            path = path / f"level{depth % 7}"
+            for n in range(2):
+                size = data.rng.randrange(1, 8 * KiB)
+                data.write_file(path / f"file{n}.txt", size)
+
+
+def gen_mixed(root: Path, scale: float) -> None:
+    """Medium-sized files: text, already-compressed data, and a mix of both."""
+    data = DataSource(4)
+    for n in range(_scaled(2000, scale)):
+        size = int(data.rng.lognormvariate(11, 1.5)) % (16 * MiB)
+        kind = n % 4
+        if kind == 0:
+            data.write_file(root / "text" / f"doc{n}.txt", size)
+        elif kind == 1:
+            data.write_file(root / "images" / f"img{n}.png", size, 1.0)
+        elif kind == 2:
+            data.write_file(root / "blobs" / f"blob{n}.bin", size, 1.0)
+        else:
+            data.write_file(root / "misc" / f"data{n}.dat", size, 0.5)
+
+
+SCENARIOS: dict[str, Callable[[Path, float], None]] = {
+    "tiny-files": gen_tiny_files,
+    "large-files": gen_large_files,
+    "deep-nesting": gen_deep_nesting,
+    "mixed": gen_mixed,
+}
+
+
+def ensure_tree(data_dir: Path, scenario: str, scale: float) -> Path:
+    """Generate the source tree for a scenario, unless it is already cached."""
+    root = data_dir / f"{scenario}-{scale:g}"
+    stamp = root / ".complete"
+    if stamp.exists() and stamp.read_text() == str(GENERATOR_VERSION):
+        return root
+    if root.exists():
+        shutil.rmtree(root)
+    print(f"Generating {scenario} tree (scale {scale:g})...", file=sys.stderr)
+    SCENARIOS[scenario](root / "src", scale)
+    stamp.write_text(str(GENERATOR_VERSION))
+    return root
+
+
+def _peak_rss() -> int | None:
+    # On Linux, ru_maxrss is inherited across fork and exec, so it may
+    # reflect the memory use of the parent process.  The high water mark
+    # in /proc does not.
+    try:
+        with open("/proc/self/status") as fp:
+            for line in fp:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * KiB
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return maxrss if sys.platform == "darwin" else maxrss * KiB
+
+
+def measure(tree: Path, options: dict[str, Any]) -> dict[str, Any]:
+    """Build the tree, measuring resource usage (run in a subprocess)."""
+    from hatchling.metadata.core import ProjectMetadata
+
+    import hatch_zipped_directory
+    from hatch_zipped_directory.builder import ZippedDirectoryBuilder
+
+    config = {
+        "project": {"name": "bench", "version": "1.0"},
+        "tool": {
+            "hatch": {
+                "build": {
+                    "targets": {
+                        "zipped-directory": {
+                            "install-name": "bench",
+                            "only-include": ["src"],
+                            **options,
+                        },
+                    },
+                },
+            },
+        },
+    }
+    with tempfile.TemporaryDirectory(dir=tree) as dist_dir:
+        metadata = ProjectMetadata(os.fspath(tree), None, config=config)
+        builder = ZippedDirectoryBuilder(os.fspath(tree), metadata=metadata)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        (artifact,) = builder.build(directory=dist_dir, versions=["standard"])
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+
+        return {
+            "wall": wall,
+            "cpu": cpu,
+            "peak_rss": _peak_rss(),
+            "size": os.path.getsize(artifact),
+            "source": os.path.dirname(hatch_zipped_directory.__file__),
+        }
+
+
+def run_measurement(
+    tree: Path, options: dict[str, Any], source: Path | None
+) -> dict[str, Any]:
+    env = dict(os.environ)
+    if source is not None:
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [os.fspath(source), env.get("PYTHONPATH")])
+        )
+    proc = subprocess.run(
+        [sys.executable, __file__, "_measure", os.fspath(tree), json.dumps(options)],
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def _git_revision(path: Path) -> str | None:
+    try:
+        proc = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=path,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def run_benchmarks(
+    scenarios: list[str],
+    *,
+    scale: float,
+    repeat: int,
+    options: dict[str, Any],
+    data_dir: Path,
+    source: Path | None = None,
+) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    source_dir = source
+    for scenario in scenarios:
+        tree = ensure_tree(data_dir, scenario, scale)
+        runs = []
+        for n in range(repeat):
+            runs.append(run_measurement(tree, options, source))
+            print(
+                f"{scenario} [{n + 1}/{repeat}]: {_format_run(runs[-1])}",
+                file=sys.stderr,
+            )
+        results[scenario] = {
+            "wall": [run["wall"] for run in runs],
+            "cpu": [run["cpu"] for run in runs],
+            "peak_rss": [run["peak_rss"] for run in runs],
+            "size": runs[-1]["size"],
+        }
+        source_dir = Path(runs[-1]["source"])
+    return {
+        "revision": _git_revision(source_dir or REPO_ROOT),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "options": options,
+        "results": results,
+    }
+
+
+def _format_run(run: dict[str, Any]) -> str:
+    rss = run["peak_rss"]
+    return (
+        f"wall {run['wall']:.2f}s, cpu {run['cpu']:.2f}s, "
+        f"peak rss {'?' if rss is None else f'{rss / MiB:.0f} MiB'}, "
+        f"size {run['size'] / MiB:.1f} MiB"
+    )
+
+
+@dataclass
+class Comparison:
+    scenario: str
+    metric: str
+    base: float
+    new: float
+    threshold: float
+
+    @property
+    def ratio(self) -> float:
+        return self.new / self.base if self.base else float("inf")
+
+    @property
+    def regressed(self) -> bool:
+        return self.ratio > 1 + self.threshold
+
+    @property
+    def improved(self) -> bool:
+        return self.ratio < 1 - self.threshold
+
+
+def _summarize(values: list[Any], metric: str) -> float | None:
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    if metric == "peak_rss":
+        return max(values)
+    # The median is less sensitive to outliers than the mean
+    return statistics.median(values)
+
+
+def compare_results(
+    base: dict[str, Any],
+    new: dict[str, Any],
+    *,
+    threshold: float,
+    size_threshold: float,
+) -> list[Comparison]:
+    comparisons = []
+    for scenario, new_result in new["results"].items():
+        base_result = base["results"].get(scenario)
+        if base_result is None:
+            continue
+        for metric in "wall", "cpu", "peak_rss":
+            base_value = _summarize(base_result[metric], metric)
+            new_value = _summarize(new_result[metric], metric)
+            if base_value is not None and new_value is not None:
+                comparisons.append(
+                    Comparison(scenario, metric, base_value, new_value, threshold)
+                )
+        comparisons.append(
+            Comparison(
+                scenario,
+                "size",
+                base_result["size"],
+                new_result["size"],
+                size_threshold,
+            )
+        )
+    return comparisons
+
+
+def _format_value(metric: str, value: float) -> str:
+    if metric in ("wall", "cpu"):
+        return f"{value:.3f}s"
+    return f"{value / MiB:.2f} MiB"
+
+
+def print_comparison(comparisons: list[Comparison]) -> None:
+    print(f"{'scenario':<14} {'metric':<9} {'base':>12} {'new':>12} {'ratio':>7}")
+    for c in comparisons:
+        flag = "REGRESSED" if c.regressed else "improved" if c.improved else ""
+        print(
+            f"{c.scenario:<14} {c.metric:<9} "
+            f"{_format_value(c.metric, c.base):>12} "
+            f"{_format_value(c.metric, c.new):>12} "
+            f"{c.ratio:>7.3f} {flag}".rstrip()
+        )
+
+
+@contextmanager
+def git_worktree(revision: str) -> Iterator[Path]:
+    """Check out a revision of this repository in a temporary directory."""
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmpdir:
+        worktree = Path(tmpdir, "src")
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", os.fspath(worktree), revision],
+            cwd=REPO_ROOT,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            yield worktree
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", os.fspath(worktree)],
+                cwd=REPO_ROOT,
+                check=True,
+            )
+
+
+def load_or_run(spec: str, args: argparse.Namespace) -> dict[str, Any]:
+    """Load results from a JSON file, or run the benchmarks at a git revision."""
+    if spec.endswith(".json"):
+        with open(spec) as fp:
+            results: dict[str, Any] = json.load(fp)
+        return results
+    print(f"Benchmarking revision {spec}...", file=sys.stderr)
+    with git_worktree(spec) as source:
+        return run_benchmarks(
+            args.scenarios or list(SCENARIOS),
+            scale=args.scale,
+            repeat=args.repeat,
+            options=args.options,
+            data_dir=args.data_dir,
+            source=source,
+        )
+
+
+def parse_option(value: str) -> tuple[str, Any]:
+    key, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scenarios_help = f"scenarios to run (default: all of {', '.join(SCENARIOS)})"
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="scale the number and size of files in the trees (default: %(default)s)",
+    )
+    common.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of builds per scenario (default: %(default)s)",
+    )
+    common.add_argument(
+        "-O",
+        "--option",
+        dest="options",
+        type=parse_option,
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="builder target option, e.g. workers=0 (value is parsed as JSON)",
+    )
+    common.add_argument(
+        "--data-dir",
+        type=Path,
+        default=DEFAULT_DATA_DIR,
+        help="where to cache the generated trees (default: %(default)s)",
+    )
+
+    run_parser = subparsers.add_parser(
+        "run", parents=[common], help="run the benchmarks"
+    )
+    run_parser.add_argument(
+        "scenarios", nargs="*", metavar="SCENARIO", help=scenarios_help
+    )
+    run_parser.add_argument(
+        "-o", "--output", type=Path, help="write the results to a JSON file"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare",
+        parents=[common],
+        help="compare results, flagging regressions",
+        description=(
+            "Compare two sets of results.  Each of BASE and NEW may be either "
+            "a JSON results file or a git revision to benchmark."
+        ),
+    )
+    compare_parser.add_argument(
+        "-s",
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        default=[],
+        help="scenario to run for git revisions (may be repeated; default: all)",
+    )
+    compare_parser.add_argument("base", metavar="BASE")
+    compare_parser.add_argument("new", metavar="NEW")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="relative increase in time or RSS which is a regression "
+        "(default: %(default)s)",
+    )
+    compare_parser.add_argument(
+        "--size-threshold",
+        type=float,
+        default=0.01,
+        help="relative increase in archive size which is a regression "
+        "(default: %(default)s)",
+    )
+
+    measure_parser = subparsers.add_parser("_measure")
+    measure_parser.add_argument("tree", type=Path)
+    measure_parser.add_argument("options", type=json.loads)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "_measure":
+        json.dump(measure(args.tree, args.options), sys.stdout)
+        return 0
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.options = dict(args.options)
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.command == "run":
+        results = run_benchmarks(
+            args.scenarios or list(SCENARIOS),
+            scale=args.scale,
+            repeat=args.repeat,
+            options=args.options,
+            data_dir=args.data_dir,
+        )
+        if args.output:
+            with open(args.output, "w") as fp:
+                json.dump(results, fp, indent=2)
+        for scenario, result in results["results"].items():
+            print(f"{scenario}:")
+            for metric in "wall", "cpu", "peak_rss":
+                value = _summarize(result[metric], metric)
+                if value is not None:
+                    print(f"  {metric:<9} {_format_value(metric, value)}")
+            print(f"  {'size':<9} {_format_value('size', result['size'])}")
+        return 0
+
+    base = load_or_run(args.base, args)
+    new = load_or_run(args.new, args)
+    comparisons = compare_results(
+        base, new, threshold=args.threshold, size_threshold=args.size_threshold
+    )
+    print_comparison(comparisons)
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) found", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
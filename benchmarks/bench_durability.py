@@ -0,0 +1,89 @@
+"""Benchmark the cost of each ``atomic_write`` durability mode.
+
+A number of files are written, using each combination of durability
+mode and (where supported) anonymous temporary file, to a directory
+which should be on the filesystem of interest (by default, a temporary
+directory).  For each combination, the median and maximum time taken
+to write a file are reported.
+
+Usage::
+
+    python benchmarks/bench_durability.py
+    python benchmarks/bench_durability.py --dir dist --size 64M --count 5
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from hatch_zipped_directory.utils import _open_anonymous
+from hatch_zipped_directory.utils import atomic_write
+from hatch_zipped_directory.utils import DURABILITY_MODES
+
+KiB = 1024
+MiB = 1024 * KiB
+
+_UNITS = {"": 1, "K": KiB, "M": MiB, "G": 1024 * MiB}
+
+
+def parse_size(value: str) -> int:
+    value = value.upper().rstrip("B")
+    unit = value[-1:] if value[-1:] in _UNITS else ""
+    return int(float(value[: len(value) - len(unit)]) * _UNITS[unit])
+
+
+def time_writes(
+    directory: Path, durability: str, anonymous: bool, data: bytes, count: int
+) -> list[float]:
+    times = []
+    for n in range(count):
+        dst = directory / f"bench-{durability}-{anonymous}-{n % 2}.bin"
+        start = time.perf_counter()
+        with atomic_write(dst, durability=durability, anonymous=anonymous) as fp:
+            fp.write(data)
+        times.append(time.perf_counter() - start)
+    for dst in directory.glob("bench-*.bin"):
+        dst.unlink()
+    return times
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", type=Path, help="directory in which to write")
+    parser.add_argument(
+        "--size", type=parse_size, default=16 * MiB, help="size of each file"
+    )
+    parser.add_argument("--count", type=int, default=10, help="files per mode")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        directory = Path(tmpdir)
+        fd = _open_anonymous(directory)
+        anonymous_modes = [False]
+        if fd is not None:
+            os.close(fd)
+            anonymous_modes.append(True)
+        data = os.urandom(args.size)
+        print(f"Writing {args.count} x {args.size / MiB:g} MiB to {directory}")
+        for durability, anonymous in itertools.product(
+            DURABILITY_MODES, anonymous_modes
+        ):
+            if durability == "none" and anonymous:
+                continue  # no temporary file is used
+            times = time_writes(directory, durability, anonymous, data, args.count)
+            label = durability + (" (anonymous)" if anonymous else "")
+            print(
+                f"{label:20s} median {statistics.median(times) * 1000:8.2f} ms"
+                f"  max {max(times) * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark the cost of importing the plugin.
+
+Hatch imports the plugin's hook module every time it loads its
+plugins, whether or not the ``zipped-directory`` builder is used.  This
+measures, in fresh subprocesses, the time taken to import the hook
+module, compared with the time taken to import the builder, which is
+only needed for builds.
+
+Each import is timed using ``python -X importtime``, and the time
+spent importing modules which are already imported by hatch itself
+(``hatchling.plugin`` and its dependencies) is reported separately.
+
+Usage::
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 50
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = ["hatch_zipped_directory.hooks", "hatch_zipped_directory.builder"]
+
+# Hatch has imported this before it loads any plugins
+BASELINE = "hatchling.plugin"
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    """Import a module in a fresh interpreter.
+
+    Returns the cumulative import time (in seconds), excluding that of
+    ``BASELINE``, and the names of the modules which were imported.
+    """
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {BASELINE}, {module}",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    imported = set()
+    baseline = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header
+        imported.add(name.strip())
+        # Top-level imports are not indented
+        if name.startswith(" ") and not name.startswith("  "):
+            total += int(cumulative)
+            if name.strip() == BASELINE:
+                baseline = int(cumulative)
+    return (total - baseline) / 1e6, imported
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--runs", type=int, default=20, help="number of imports of each module"
+    )
+    args = parser.parse_args(argv)
+
+    _, baseline_modules = import_time("sys")
+    for module in MODULES:
+        times = []
+        for _ in range(args.runs):
+            seconds, imported = import_time(module)
+            times.append(seconds)
+        extra = len(imported - baseline_modules)
+        print(
+            f"{module:32s} median {statistics.median(times) * 1000:7.2f} ms"
+            f"  min {min(times) * 1000:7.2f} ms  {extra:4d} extra modules"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import importlib.metadata
 import json
+import mmap
 import os
 import posixpath
-import shutil
+import re
+import stat
 import sys
+import threading
 import time
+import zlib
+from collections import deque
 from collections.abc import Iterable
 from collections.abc import Iterator
+from collections.abc import Sequence
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractContextManager
 from contextlib import contextmanager
+from contextlib import ExitStack
+from contextlib import nullcontext
 from functools import cached_property
 from pathlib import Path
+from pathlib import PurePosixPath
 from typing import Any
+from typing import BinaryIO
 from typing import Callable
+from typing import IO
+from zipfile import BadZipFile
 from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
 from zipfile import ZipFile
 from zipfile import ZipInfo
 
@@ -27,34 +46,343 @@ from hatchling.builders.utils import set_zip_info_mode
 from hatchling.metadata.spec import DEFAULT_METADATA_VERSION
 from hatchling.metadata.spec import get_core_metadata_constructors
 
-from .metadata import metadata_to_json
+from .cache import CompressionCache
+from .cache import default_cache_dir
+from .chunked import deflate_file
+from .compression import Compression
+from .compression import CompressionRules
+from .compression import estimate_savings
+from .compression import get_compression
+from .compression import SAMPLE_SIZE
+from .incremental import BuildIndex
+from .incremental import file_sha256
+from .incremental import IndexEntry
+from .incremental import SourceDigest
+from .manifest import FileDigest
+from .manifest import Manifest
+from .metadata import render_metadata_json
+from .output import CoalescingWriter
+from .rawzip import can_sendfile
+from .rawzip import compress_bytes
+from .rawzip import compress_file
+from .rawzip import CompressedData
+from .rawzip import read_raw
+from .rawzip import sendfile_stored
+from .rawzip import write_raw
+from .rawzip import write_raw_blocks
+from .report import BuildReport
+from .shards import entry_size_bound
+from .shards import plan_shards
+from .shards import Shard
 from .utils import atomic_write
+from .utils import DURABILITY_MODES
+from .utils import prefetch
+from .variants import SharedCompression
+from .variants import Variant
 
 
 __all__ = ["ZippedDirectoryBuilder"]
 
+# If set to "1" or "true", skip-unchanged is ignored and the archive is rebuilt
+FORCE_ENV_VAR = "HATCH_ZIPPED_DIRECTORY_FORCE"
+
 _CREATE_SYSTEM_UNIX = 3
 
+_EMPTY = CompressedData(ZIP_STORED, CRC=0, file_size=0, compress_size=0, data=b"")
+
+# The compressed data for an entry, and the time taken to compress it
+_Future = Future[tuple[CompressedData, float]]
+
+# When reading ahead, the maximum number of files discovered ahead of
+# those being added, and the memory budget charged for each pending entry
+# in addition to its size
+_DISCOVERY_AHEAD = 1024
+_PENDING_OVERHEAD = 1024
+
+# When compressing in parallel (without reading ahead), files larger
+# than this are streamed in the main thread, rather than being
+# compressed into memory in a worker thread
+_MAX_IN_MEMORY_SIZE = 16 * 1024 * 1024
+
+# Files at least this large are copied using a memory map (or, if stored
+# without compression, using os.sendfile).  This is also the chunk size
+# in which data is passed to the compressor.
+_LARGE_FILE_SIZE = 1024 * 1024
+
+# An allowance for the size of the local and central directory headers of
+# an entry (excluding its name), when estimating the size of an archive
+_ENTRY_OVERHEAD = 128
+
+_DEFAULT_OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+_VARIANT_NAME_RE = re.compile(r"[A-Za-z0-9._]+")
+
+
+class ArchiveStats:
+    """Statistics gathered while building an archive."""
+
+    def __init__(self) -> None:
+        # Entries stored without compression because they were found to
+        # be incompressible, and the estimated CPU time thus saved
+        self.incompressible_entries = 0
+        self.incompressible_cpu_time_saved = 0.0
+        # Entries whose compressed data was reused from a previous build
+        self.reused_entries = 0
+        self._lock = threading.Lock()
+
+    def record_incompressible(self, cpu_time_saved: float) -> None:
+        with self._lock:
+            self.incompressible_entries += 1
+            self.incompressible_cpu_time_saved += cpu_time_saved
+
+    def record_reused(self) -> None:
+        with self._lock:
+            self.reused_entries += 1
+
+
+def _set_compression(zinfo: ZipInfo, compression: Compression) -> None:
+    zinfo.compress_type = compression.compress_type
+    # NB: this attribute was renamed to compress_level in python 3.13, but
+    # the old name is still supported
+    zinfo._compresslevel = compression.compresslevel  # type: ignore[attr-defined]
+
+
+@contextmanager
+def _open_previous(path: str | os.PathLike[str]) -> Iterator[ZipFile | None]:
+    """Open a previously built archive for reading, if it exists."""
+    try:
+        zipfd = ZipFile(path)
+    except (OSError, BadZipFile):
+        yield None
+    else:
+        with zipfd:
+            yield zipfd
+
+
+def _completed_future(result: CompressedData, seconds: float = 0.0) -> _Future:
+    future: _Future = Future()
+    future.set_result((result, seconds))
+    return future
+
+
+def _timed(
+    func: Callable[..., CompressedData], *args: Any
+) -> tuple[CompressedData, float]:
+    """Call func, returning its result and the wall time it took."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _copy_file(
+    src: BinaryIO, dest: IO[bytes], file_size: int, digest: FileDigest | None = None
+) -> None:
+    """Copy a file's data, choosing a strategy based on its (expected) size.
+
+    If a ``digest`` is given, it is updated with the data.
+    """
+    if digest is not None:
+        digest.begin()
+    if file_size < _LARGE_FILE_SIZE:
+        # Read it all at once (which also detects the end of the file)
+        _copy_chunks(src, dest, max(file_size, 8 * 1024) + 1, digest)
+        return
+    try:
+        mm = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        _copy_chunks(src, dest, _LARGE_FILE_SIZE, digest)  # no cov
+        return
+    # The data is passed to the compressor directly from the page cache
+    with mm, memoryview(mm) as view:
+        for offset in range(0, len(view), _LARGE_FILE_SIZE):
+            chunk = view[offset : offset + _LARGE_FILE_SIZE]
+            if digest is not None:
+                digest.update(chunk)
+            dest.write(chunk)
+            chunk.release()
+
+
+def _copy_chunks(
+    src: BinaryIO, dest: IO[bytes], chunk_size: int, digest: FileDigest | None
+) -> None:
+    while chunk := src.read(chunk_size):
+        if digest is not None:
+            digest.update(chunk)
+        dest.write(chunk)
+
+
+def _is_up_to_date(target: Path, fingerprint_path: Path, fingerprint: str) -> bool:
+    """Whether target was built from inputs with the given fingerprint."""
+    try:
+        return target.is_file() and fingerprint_path.read_text("ascii") == fingerprint
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def _plugin_version() -> str | None:
+    try:
+        return importlib.metadata.version("hatch-zipped-directory")
+    except importlib.metadata.PackageNotFoundError:  # no cov
+        return None
+
+
+def _report_phase(
+    report: BuildReport | None, name: str
+) -> AbstractContextManager[None]:
+    return report.phase(name) if report is not None else nullcontext()
+
 
 class ZipArchive:
-    def __init__(self, zipfd: ZipFile, root_path: str, *, reproducible: bool = True):
+    def __init__(
+        self,
+        zipfd: ZipFile,
+        root_path: str,
+        *,
+        reproducible: bool = True,
+        workers: int = 1,
+        previous: ZipFile | None = None,
+        previous_index: BuildIndex | None = None,
+        index: BuildIndex | None = None,
+        compression: CompressionRules | None = None,
+        incompressible_threshold: float | None = None,
+        cache: CompressionCache | SharedCompression | None = None,
+        chunked_threshold: int | None = None,
+        report: BuildReport | None = None,
+        read_ahead: int | None = None,
+        manifest: Manifest | None = None,
+        directory_entries: bool = True,
+        symlinks: bool = False,
+    ):
         self.root_path = Path(root_path)
         self.zipfd = zipfd
         self.reproducible = reproducible
+        if compression is None:
+            compression = CompressionRules(
+                Compression(zipfd.compression, zipfd.compresslevel)
+            )
+        self.compression = compression
+        # Files for which a trial compression does not reduce the size by
+        # at least this fraction are stored without compression
+        self.incompressible_threshold = incompressible_threshold
+        self.stats = ArchiveStats()
+        self.cache = cache
+        # Deflated files at least this large are compressed in blocks, in
+        # parallel, rather than as a single stream
+        self.chunked_threshold = chunked_threshold
+        # A previous build of the archive, and its index, from which
+        # compressed data may be reused for unchanged files
+        self.previous = previous
+        self.previous_index = previous_index
+        # If set, the file entries of the archive are recorded here
+        self.index = index
+        self.report = report
+        # If set, the digests of the files are collected here
+        self.manifest = manifest
+        # If false, directory entries are only written for (otherwise)
+        # empty directories
+        self.directory_entries = directory_entries
+        # If true, symlinks are stored as symlinks, rather than followed
+        self.symlinks = symlinks
+        # Names of the directory entries which have been written to the archive
+        self._dirs = {zi.filename for zi in zipfd.filelist if zi.is_dir()}
+
+        # When compressing in parallel, entries are queued here, in
+        # order, until their compressed data is ready to be written.
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: deque[tuple[ZipInfo, _Future, FileDigest | None]] = deque()
+        self._max_pending = 2 * workers
+        # If set, files are read ahead (and compressed) in worker threads,
+        # up to this many bytes of pending entries, rather than up to
+        # _max_pending entries
+        self.read_ahead = read_ahead
+        self._pending_bytes = 0
+        if workers > 1 or read_ahead is not None:
+            self._executor = ThreadPoolExecutor(
+                workers, thread_name_prefix="ZipArchive"
+            )
+
+    def __enter__(self) -> ZipArchive:
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        try:
+            if exc_type is None:
+                with _report_phase(self.report, "compression"):
+                    self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def flush(self) -> None:
+        """Write any queued entries to the archive."""
+        while self._pending:
+            self._write_pending()
+
+    def add_files(self, included_files: Iterable[IncludedFile]) -> None:
+        """Add a number of files to the archive.
+
+        If read-ahead is enabled, the files are discovered and stat-ed in
+        a background thread, while earlier files are read and compressed
+        in worker threads.  Entries are still written in order.
+        """
+        for included_file, zinfo in self._discover(included_files):
+            with _report_phase(self.report, "compression"):
+                self._add_file(included_file, zinfo)
+
+    def _discover(
+        self, included_files: Iterable[IncludedFile]
+    ) -> Iterator[tuple[IncludedFile, ZipInfo | None]]:
+        """Iterate over the files, stat-ing them ahead if reading ahead."""
+        if self.read_ahead is None:
+            files: Iterable[tuple[IncludedFile, ZipInfo | None]] = (
+                (included_file, None) for included_file in included_files
+            )
+        else:
+            files = prefetch(
+                (
+                    (included_file, self._zinfo_from_file(included_file))
+                    for included_file in included_files
+                ),
+                _DISCOVERY_AHEAD,
+            )
+        if self.report is not None:
+            files = self.report.iter_phase("discovery", files)
+        return iter(files)
 
     def add_file(self, included_file: IncludedFile) -> None:
+        with _report_phase(self.report, "compression"):
+            self._add_file(included_file)
+
+    def _zinfo_from_file(self, included_file: IncludedFile) -> ZipInfo:
+        arcname = self.root_path / included_file.distribution_path
+        if self.symlinks and os.path.islink(included_file.path):
+            st = os.lstat(included_file.path)
+            date_time = time.localtime(st.st_mtime)[:6]
+            if date_time[0] < 1980:
+                date_time = (1980, 1, 1, 0, 0, 0)  # no cov
+            zinfo = ZipInfo(arcname.as_posix(), date_time)
+            zinfo.external_attr = (stat.S_IFLNK | 0o777) << 16
+            return zinfo
+        return ZipInfo.from_file(included_file.path, arcname)
+
+    def _add_file(
+        self, included_file: IncludedFile, zinfo: ZipInfo | None = None
+    ) -> None:
         # Logic mostly copied from hatchling.builders.wheel.WheelArchive.add_file
         # https://github.com/pypa/hatch/blob/7dac9856d2545393f7dd96d31fc8620dde0dc12d/backend/src/hatchling/builders/wheel.py#L84-L112
         arcname = self.root_path / included_file.distribution_path
-        zinfo = ZipInfo.from_file(included_file.path, arcname)
+        if zinfo is None:
+            zinfo = self._zinfo_from_file(included_file)
         if zinfo.is_dir():
             raise ValueError(  # no cov
                 "ZipArchive.add_file does not support adding directories"
             )
 
         parent_dir = arcname.parent.as_posix()
-        if parent_dir != ".":
-            self._ensure_dir(parent_dir)
+        if parent_dir != "." and self.directory_entries:
+            with _report_phase(self.report, "directories"):
+                self._ensure_dir(parent_dir)
 
         if self.reproducible:
             zinfo.date_time = self._reproducible_date_time
@@ -63,8 +391,201 @@ class ZipArchive:
             set_zip_info_mode(zinfo, normalize_file_permissions(st_mode) & 0xFFFF)
             zinfo.create_system = _CREATE_SYSTEM_UNIX  # force on Windows
 
-        with open(included_file.path, "rb") as src, self.zipfd.open(zinfo, "w") as dest:
-            shutil.copyfileobj(src, dest, 8 * 1024)  # type: ignore[misc] # mypy #14975
+        if stat.S_ISLNK(zinfo.external_attr >> 16):
+            self._add_symlink(included_file, zinfo)
+            return
+
+        compression = self.compression.for_path(
+            Path(included_file.distribution_path).as_posix()
+        )
+        digest = self._new_digest()
+        large = (
+            self.chunked_threshold is not None
+            and zinfo.file_size >= self.chunked_threshold
+        )
+        # Files which are too large to be held in memory are streamed
+        streamed = large or not self._fits_in_memory(zinfo.file_size)
+        if self._executor is not None and not streamed:
+            if self.read_ahead is not None:
+                self._make_room(zinfo.file_size)
+            future = self._executor.submit(
+                _timed,
+                self._compress_file,
+                included_file.path,
+                zinfo.filename,
+                zinfo.file_size,
+                compression,
+                digest,
+            )
+            self._write_deferred(zinfo, future, digest)
+            return
+
+        # Large (and streamed) files are written in the main thread, so
+        # any queued entries must be written first
+        self.flush()
+        start = time.perf_counter()
+        compression = self._check_compressible(
+            included_file.path, zinfo.file_size, compression
+        )
+        _set_compression(zinfo, compression)
+        st = self._stat_source(included_file.path)
+        compressed = self._reuse(
+            included_file.path,
+            zinfo.filename,
+            zinfo.file_size,
+            compression,
+            st,
+            digest,
+        )
+        if compressed is not None:
+            self._write_raw(zinfo, compressed, time.perf_counter() - start, digest)
+            return
+
+        source = self._source_digest(digest)
+        if self.cache is not None and not streamed:
+            compressed = self.cache.compress_file(
+                included_file.path, compression, zinfo.file_size, digest=source
+            )
+            self._write_raw(zinfo, compressed, time.perf_counter() - start, digest)
+        else:
+            if large and compression.compress_type == ZIP_DEFLATED:
+                blocks = deflate_file(
+                    included_file.path,
+                    compression.compresslevel,
+                    executor=self._executor,
+                    max_pending=self._max_pending,
+                    digest=source,
+                )
+                write_raw_blocks(self.zipfd, zinfo, ZIP_DEFLATED, blocks)
+            elif (
+                compression.compress_type == ZIP_STORED
+                and zinfo.file_size >= _LARGE_FILE_SIZE
+                and can_sendfile(self.zipfd)
+            ):
+                sendfile_stored(self.zipfd, zinfo, included_file.path, digest=source)
+            else:
+                with (
+                    open(included_file.path, "rb") as src,
+                    self.zipfd.open(zinfo, "w") as dest,
+                ):
+                    _copy_file(src, dest, zinfo.file_size, source)
+            self._record_entry(zinfo, time.perf_counter() - start, digest)
+        self._index_entry(
+            zinfo.filename,
+            compression,
+            st,
+            source,
+            zinfo.file_size,
+            zinfo.CRC,
+            zinfo.compress_size,
+        )
+
+    def _add_symlink(self, included_file: IncludedFile, zinfo: ZipInfo) -> None:
+        """Add a symlink entry, whose data is the link's target."""
+        target = os.readlink(included_file.path).replace(os.sep, "/")
+        link_dir = posixpath.dirname(Path(included_file.distribution_path).as_posix())
+        resolved = posixpath.normpath(posixpath.join(link_dir, target))
+        if posixpath.isabs(target) or resolved == ".." or resolved.startswith("../"):
+            raise ValueError(
+                f"Symlink {included_file.path!r} points outside the archive "
+                f"(to {target!r})"
+            )
+        # Unzip tools only recognize symlinks in entries created on Unix
+        zinfo.create_system = _CREATE_SYSTEM_UNIX
+        data = target.encode("utf-8")
+        digest = self._new_digest()
+        if digest is not None:
+            digest.update(data)
+        compressed = compress_bytes(data, ZIP_STORED)
+        if self._executor is not None:
+            self._write_deferred(zinfo, _completed_future(compressed), digest)
+        else:
+            self._write_raw(zinfo, compressed, 0.0, digest)
+
+    def add_archive(self, path: str | os.PathLike[str], prefix: str = "") -> None:
+        """Merge the entries of an existing zip archive into this one.
+
+        The entries are placed under ``prefix`` (relative to the root
+        path).  Their compressed data is copied verbatim, without being
+        decompressed and recompressed.  (However, if a manifest is being
+        collected, the entries must be decompressed to compute their
+        digests.)
+
+        If directory entries are disabled, only the directory entries of
+        empty directories are copied.
+
+        Raises ``ValueError`` if an entry's name, or the target of a
+        symlink entry, lies outside the archive.
+        """
+        prefix_path = PurePosixPath(prefix)
+        if prefix_path.is_absolute() or ".." in prefix_path.parts:
+            raise ValueError(f"Unsafe prefix {prefix!r} for {os.fspath(path)}")
+        with _report_phase(self.report, "compression"), ZipFile(path) as src:
+            nonempty = {
+                parent
+                for name in src.namelist()
+                for parent in PurePosixPath(name.rstrip("/")).parents
+            }
+            for src_info in src.infolist():
+                name = PurePosixPath(src_info.filename)
+                if name.is_absolute() or ".." in name.parts:
+                    raise ValueError(
+                        f"Unsafe entry name {src_info.filename!r} in {os.fspath(path)}"
+                    )
+                arcname = self.root_path / prefix / name
+                if stat.S_ISLNK(src_info.external_attr >> 16):
+                    target = src.read(src_info).decode("utf-8", "surrogateescape")
+                    link_dir = posixpath.dirname(
+                        (PurePosixPath(prefix) / name).as_posix()
+                    )
+                    resolved = posixpath.normpath(posixpath.join(link_dir, target))
+                    if (
+                        posixpath.isabs(target)
+                        or resolved == ".."
+                        or resolved.startswith("../")
+                    ):
+                        raise ValueError(
+                            f"Unsafe symlink entry {src_info.filename!r} in "
+                            f"{os.fspath(path)} (points to {target!r})"
+                        )
+                if src_info.is_dir():
+                    if self.directory_entries:
+                        with _report_phase(self.report, "directories"):
+                            self._ensure_dir(arcname.as_posix())
+                    elif PurePosixPath(src_info.filename.rstrip("/")) not in nonempty:
+                        with _report_phase(self.report, "directories"):
+                            self._ensure_dir(arcname.as_posix(), parents=False)
+                    continue
+                parent_dir = arcname.parent.as_posix()
+                if parent_dir != "." and self.directory_entries:
+                    with _report_phase(self.report, "directories"):
+                        self._ensure_dir(parent_dir)
+
+                zinfo = ZipInfo(arcname.as_posix(), date_time=src_info.date_time)
+                zinfo.external_attr = src_info.external_attr
+                zinfo.create_system = src_info.create_system
+                zinfo.file_size = src_info.file_size
+                if self.reproducible:
+                    zinfo.date_time = self._reproducible_date_time
+                    st_mode = (zinfo.external_attr >> 16) & 0xFFFF
+                    if st_mode:
+                        set_zip_info_mode(
+                            zinfo, normalize_file_permissions(st_mode) & 0xFFFF
+                        )
+                    zinfo.create_system = _CREATE_SYSTEM_UNIX  # force on Windows
+
+                compressed, seconds = _timed(read_raw, src, src_info)
+                digest = self._new_digest()
+                if digest is not None:
+                    with src.open(src_info) as fp:
+                        while chunk := fp.read(_LARGE_FILE_SIZE):
+                            digest.update(chunk)
+                if self._executor is not None:
+                    self._write_deferred(
+                        zinfo, _completed_future(compressed, seconds), digest
+                    )
+                else:
+                    self._write_raw(zinfo, compressed, seconds, digest)
 
     def write_file(self, path: str, data: bytes | str) -> None:
         arcname = self.root_path / path
@@ -75,28 +596,368 @@ class ZipArchive:
             zinfo = ZipInfo(
                 os.fspath(arcname), date_time=time.localtime(time.time())[:6]
             )
+        compression = self.compression.for_path(path)
+        _set_compression(zinfo, compression)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = self._new_digest()
+        if digest is not None:
+            digest.update(data)
+        if self._executor is not None:
+            zinfo.file_size = len(data)
+            compressed, seconds = _timed(compress_bytes, data, *compression)
+            self._write_deferred(zinfo, _completed_future(compressed, seconds), digest)
+            return
+        start = time.perf_counter()
         self.zipfd.writestr(zinfo, data)
+        self._record_entry(zinfo, time.perf_counter() - start, digest)
+
+    def write_manifest(self, path: str) -> None:
+        """Write the manifest of the files added so far to the archive."""
+        if self.manifest is None:
+            raise ValueError("No manifest is being collected")  # no cov
+        self.flush()  # so that the manifest is complete
+        manifest, self.manifest = self.manifest, None
+        try:
+            own_name = (self.root_path / path).as_posix()
+            self.write_file(path, manifest.to_csv(own_name))
+        finally:
+            self.manifest = manifest
 
     @classmethod
     @contextmanager
     def open(
-        cls, dst: str | os.PathLike[str], root_path: str, *, reproducible: bool = True
+        cls,
+        dst: str | os.PathLike[str] | BinaryIO,
+        root_path: str,
+        *,
+        reproducible: bool = True,
+        workers: int = 1,
+        previous: str | os.PathLike[str] | None = None,
+        previous_index: BuildIndex | None = None,
+        index: BuildIndex | None = None,
+        compression: CompressionRules | None = None,
+        incompressible_threshold: float | None = None,
+        cache: CompressionCache | SharedCompression | None = None,
+        chunked_threshold: int | None = None,
+        report: BuildReport | None = None,
+        read_ahead: int | None = None,
+        manifest: Manifest | None = None,
+        directory_entries: bool = True,
+        symlinks: bool = False,
+        durability: str = "rename",
+        anonymous_tempfile: bool = False,
+        buffer_size: int | None = None,
+        preallocate: int = 0,
     ) -> Iterator[ZipArchive]:
-        with atomic_write(dst) as fp:
-            with ZipFile(fp, "w", compression=ZIP_DEFLATED) as zipfd:
-                yield cls(zipfd, root_path, reproducible=reproducible)
+        """Create a new zip archive.
+
+        ``Dst`` may be either a path or a writable binary file object.  A
+        path is written atomically, via a temporary file (see
+        ``atomic_write`` for the meaning of ``durability`` and
+        ``anonymous_tempfile``).  The archive is streamed directly to a
+        file object (which need not be seekable, e.g. a pipe) and the
+        file object is left open.
+
+        If ``previous`` is given, it should be the path to a previous
+        build of the archive, and ``previous_index`` its index.  The
+        compressed data of any of its entries which were written with
+        the same compression settings, from a file whose content has
+        not changed, will be reused.  If an ``index`` is given, the
+        file entries of the new archive are recorded in it.
+
+        If a ``report`` is given, the time spent setting up and
+        finalizing (writing the central directory and moving the
+        archive into place) the archive is recorded, along with
+        statistics for each entry.
+
+        If a ``manifest`` is given, the digests of the files are
+        collected in it as they are written.
+
+        If ``directory_entries`` is false, entries are only written for
+        directories which would otherwise be missing from the archive
+        (i.e. empty directories in merged archives).
+
+        If ``symlinks`` is true, files which are symlinks are stored as
+        symlink entries, rather than as copies of their targets.  Their
+        targets must be relative and lie within the archive.
+
+        If ``buffer_size`` is given, writes to the archive are coalesced
+        in a buffer of that size, and ``preallocate`` bytes (e.g. the
+        estimated size of the archive) are allocated for the archive up
+        front.  Statistics of the writes are included in the ``report``.
+        """
+        with ExitStack() as stack:
+            with _report_phase(report, "setup"):
+                fp: BinaryIO
+                previous_zipfd = None
+                if previous is not None and durability == "none":
+                    # The target is unlinked and rewritten in place, so the
+                    # previous archive must be opened first
+                    previous_zipfd = stack.enter_context(_open_previous(previous))
+                    previous = None
+                if isinstance(dst, (str, os.PathLike)):
+                    fp = stack.enter_context(
+                        atomic_write(
+                            dst, durability=durability, anonymous=anonymous_tempfile
+                        )
+                    )
+                else:
+                    fp = dst
+                writer = None
+                if buffer_size:
+                    writer = stack.enter_context(
+                        CoalescingWriter(fp, buffer_size, preallocate)
+                    )
+                # NB: the previous archive must be closed before it is replaced
+                if previous is not None:
+                    previous_zipfd = stack.enter_context(_open_previous(previous))
+                zipfd = stack.enter_context(
+                    ZipFile(writer or fp, "w", compression=ZIP_DEFLATED)
+                )
+                archive = stack.enter_context(
+                    cls(
+                        zipfd,
+                        root_path,
+                        reproducible=reproducible,
+                        workers=workers,
+                        previous=previous_zipfd,
+                        previous_index=previous_index,
+                        index=index,
+                        compression=compression,
+                        incompressible_threshold=incompressible_threshold,
+                        cache=cache,
+                        chunked_threshold=chunked_threshold,
+                        report=report,
+                        read_ahead=read_ahead,
+                        manifest=manifest,
+                        directory_entries=directory_entries,
+                        symlinks=symlinks,
+                    )
+                )
+            yield archive
+            with _report_phase(report, "finalize"):
+                stack.close()
+            if report is not None and writer is not None:
+                report.output = writer.stats
+
+    def _check_compressible(
+        self, path: str, file_size: int, compression: Compression
+    ) -> Compression:
+        """Store the file without compression if it appears to be incompressible."""
+        threshold = self.incompressible_threshold
+        if threshold is None or compression.compress_type == ZIP_STORED:
+            return compression
+        savings, cpu_time_per_byte = estimate_savings(path, compression)
+        if savings >= threshold:
+            return compression
+        self.stats.record_incompressible(
+            cpu_time_per_byte * max(file_size - SAMPLE_SIZE, 0)
+        )
+        return Compression(ZIP_STORED)
+
+    def _new_digest(self) -> FileDigest | None:
+        return self.manifest.new_digest() if self.manifest is not None else None
+
+    def _stat_source(self, path: str) -> os.stat_result | None:
+        """Stat a file, before it is read, if it is to be indexed or reused."""
+        if self.index is None and self.previous_index is None:
+            return None
+        return os.stat(path)
+
+    def _source_digest(self, digest: FileDigest | None) -> FileDigest | None:
+        """The digest to update as a file is read (see ``_index_entry``)."""
+        return SourceDigest(digest) if self.index is not None else digest
+
+    def _index_entry(
+        self,
+        arcname: str,
+        compression: Compression,
+        st: os.stat_result | None,
+        source: FileDigest | None,
+        file_size: int,
+        crc: int,
+        compress_size: int,
+    ) -> None:
+        if self.index is None or st is None:
+            return
+        assert isinstance(source, SourceDigest)
+        entry = IndexEntry(
+            compression.compress_type,
+            compression.compresslevel,
+            file_size,
+            st.st_mtime_ns,
+            source.hexdigest(),
+            crc,
+            compress_size,
+        )
+        self.index.add(arcname, entry)
+
+    def _reuse(
+        self,
+        path: str,
+        arcname: str,
+        file_size: int,
+        compression: Compression,
+        st: os.stat_result | None,
+        digest: FileDigest | None = None,
+    ) -> CompressedData | None:
+        """Get the compressed data from the previous archive if path is unchanged.
+
+        The previous entry must have been written with the same
+        compression settings.  If the file's size and modification time
+        are those recorded in the previous index, it is not read (unless
+        its ``digest`` is needed); otherwise its SHA-256 digest must
+        match the recorded digest.
+        """
+        if self.previous is None or self.previous_index is None or st is None:
+            return None
+        entry = self.previous_index.entries.get(arcname)
+        if (
+            entry is None
+            or entry.compression != compression
+            or entry.file_size != file_size
+            or st.st_size != file_size
+        ):
+            return None
+        try:
+            previous = self.previous.getinfo(arcname)
+        except KeyError:
+            return None
+        if (
+            previous.compress_type != entry.compress_type
+            or previous.file_size != entry.file_size
+            or previous.CRC != entry.CRC
+            or previous.compress_size != entry.compress_size
+        ):
+            # The index does not describe this archive
+            return None
+        if st.st_mtime_ns != entry.mtime_ns or digest is not None:
+            if file_sha256(path, digest=digest) != entry.sha256:
+                return None
+        compressed = read_raw(self.previous, previous)
+        self.stats.record_reused()
+        if self.index is not None:
+            self.index.add(arcname, entry._replace(mtime_ns=st.st_mtime_ns))
+        return compressed
+
+    def _compress_file(
+        self,
+        path: str,
+        arcname: str,
+        file_size: int,
+        compression: Compression,
+        digest: FileDigest | None = None,
+    ) -> CompressedData:
+        """Compress a file (this is run in a worker thread)."""
+        compression = self._check_compressible(path, file_size, compression)
+        st = self._stat_source(path)
+        reused = self._reuse(path, arcname, file_size, compression, st, digest)
+        if reused is not None:
+            return reused
+        source = self._source_digest(digest)
+        if self.cache is not None:
+            compressed = self.cache.compress_file(
+                path, compression, file_size, digest=source
+            )
+        else:
+            compressed = compress_file(path, *compression, digest=source)
+        self._index_entry(
+            arcname,
+            compression,
+            st,
+            source,
+            compressed.file_size,
+            compressed.CRC,
+            compressed.compress_size,
+        )
+        return compressed
+
+    def _write_deferred(
+        self, zinfo: ZipInfo, future: _Future, digest: FileDigest | None = None
+    ) -> None:
+        """Queue an entry to be written once its compressed data is ready.
+
+        To bound memory use, this blocks while too many entries are pending.
+        """
+        self._pending.append((zinfo, future, digest))
+        self._pending_bytes += zinfo.file_size + _PENDING_OVERHEAD
+        with _report_phase(self.report, "compression"):
+            while self._pending and (
+                self._pending[0][1].done() or self._too_many_pending()
+            ):
+                self._write_pending()
+
+    def _fits_in_memory(self, file_size: int) -> bool:
+        """Whether a file may be read (and compressed) into memory."""
+        if self.read_ahead is None:
+            return file_size <= _MAX_IN_MEMORY_SIZE
+        return file_size + _PENDING_OVERHEAD <= self.read_ahead
+
+    def _make_room(self, file_size: int) -> None:
+        """Write queued entries until a file fits in the read-ahead budget."""
+        assert self.read_ahead is not None
+        with _report_phase(self.report, "compression"):
+            while (
+                self._pending
+                and self._pending_bytes + file_size + _PENDING_OVERHEAD
+                > self.read_ahead
+            ):
+                self._write_pending()
+
+    def _too_many_pending(self) -> bool:
+        if self.read_ahead is None:
+            return len(self._pending) > self._max_pending
+        return self._pending_bytes > self.read_ahead
+
+    def _write_pending(self) -> None:
+        """Write the first queued entry, waiting for its data if necessary."""
+        zinfo, future, digest = self._pending.popleft()
+        self._pending_bytes -= zinfo.file_size + _PENDING_OVERHEAD
+        self._write_raw(zinfo, *future.result(), digest)
+
+    def _write_raw(
+        self,
+        zinfo: ZipInfo,
+        compressed: CompressedData,
+        seconds: float,
+        digest: FileDigest | None = None,
+    ) -> None:
+        if zinfo.is_dir():
+            # NB: when streaming, zipfile writes directories without a
+            # data descriptor, so they are written as in a serial build
+            self._write_dir(zinfo)
+        else:
+            write_raw(self.zipfd, zinfo, compressed)
+        self._record_entry(zinfo, seconds, digest)
+
+    def _record_entry(
+        self, zinfo: ZipInfo, seconds: float, digest: FileDigest | None = None
+    ) -> None:
+        if self.manifest is not None and digest is not None:
+            self.manifest.add(zinfo.filename, digest, zinfo.file_size)
+        if self.report is not None and not zinfo.is_dir():
+            self.report.record_entry(
+                zinfo.filename,
+                zinfo.file_size,
+                zinfo.compress_size,
+                zinfo.compress_type,
+                seconds,
+            )
 
     @cached_property
     def _reproducible_date_time(self):
         return time.gmtime(get_reproducible_timestamp())[0:6]
 
-    def _ensure_dir(self, dirname: str, mode: int = 0o777) -> None:
+    def _ensure_dir(
+        self, dirname: str, mode: int = 0o777, *, parents: bool = True
+    ) -> None:
         zinfo = ZipInfo(dirname + "/")
-        if any(zi.filename == zinfo.filename for zi in self.zipfd.filelist):
+        if zinfo.filename in self._dirs:
             return
 
         parent = posixpath.dirname(dirname)
-        if parent:
+        if parent and parents:
             self._ensure_dir(parent, mode=mode)
 
         # Copied from zipfile.ZipFile.mkdir
@@ -111,12 +972,47 @@ class ZipArchive:
             zinfo.date_time = self._reproducible_date_time
             zinfo.create_system = _CREATE_SYSTEM_UNIX  # force on Windows
 
+        if self._executor is not None:
+            self._write_deferred(zinfo, _completed_future(_EMPTY))
+        else:
+            self._write_dir(zinfo)
+        self._dirs.add(zinfo.filename)
+
+    def _write_dir(self, zinfo: ZipInfo) -> None:
         if sys.version_info < (3, 11):
             self.zipfd.writestr(zinfo, "")
         else:
             self.zipfd.mkdir(zinfo)
 
 
+def _renamed(zinfo: ZipInfo, filename: str) -> ZipInfo:
+    """A copy of a file's (as yet unwritten) ``ZipInfo``, with a different name."""
+    renamed = ZipInfo(filename, zinfo.date_time)
+    renamed.external_attr = zinfo.external_attr
+    renamed.file_size = zinfo.file_size
+    return renamed
+
+
+def _add_files_to_all(
+    archives: Sequence[ZipArchive], included_files: Iterable[IncludedFile]
+) -> None:
+    """Add the same files to a number of archives, in a single pass.
+
+    The files are discovered and stat-ed once (as configured for the
+    first archive, whose report records the time taken), then added to
+    each archive in turn.  If the archives share a ``SharedCompression``
+    cache, each file is also read only once.
+    """
+    first = archives[0]
+    for included_file, zinfo in first._discover(included_files):
+        with _report_phase(first.report, "compression"):
+            if zinfo is None:
+                zinfo = first._zinfo_from_file(included_file)
+            for archive in archives:
+                arcname = archive.root_path / included_file.distribution_path
+                archive._add_file(included_file, _renamed(zinfo, arcname.as_posix()))
+
+
 class ZippedDirectoryBuilderConfig(BuilderConfig):
     @property
     def core_metadata_constructor(self):
@@ -137,6 +1033,406 @@ class ZippedDirectoryBuilderConfig(BuilderConfig):
             )
         return constructors[core_metadata_version]
 
+    @property
+    def workers(self) -> int:
+        """The number of threads to use for compressing archive entries.
+
+        Zero means to use one thread per CPU.
+        """
+        workers = self.target_config.get("workers", 1)
+        if not isinstance(workers, int) or isinstance(workers, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.workers` "
+                "must be an integer"
+            )
+        if workers < 0:
+            raise ValueError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.workers` "
+                "must not be negative"
+            )
+        return workers or os.cpu_count() or 1
+
+    @property
+    def compression(self) -> CompressionRules:
+        """Rules for choosing the compression method and level for entries."""
+        field = f"tool.hatch.build.targets.{self.plugin_name}"
+        return self._get_compression_rules(self.target_config, field)
+
+    @classmethod
+    def _get_compression_rules(
+        cls, table: dict[str, Any], field: str
+    ) -> CompressionRules:
+        default = cls._get_compression(table, field)
+
+        patterns = table.get("compression-patterns", {})
+        if not isinstance(patterns, dict):
+            raise TypeError(f"Field `{field}.compression-patterns` must be a table")
+        rules = []
+        for pattern, value in patterns.items():
+            pattern_field = f"{field}.compression-patterns.{pattern}"
+            if isinstance(value, str):
+                value = {"compression": value}
+            elif not isinstance(value, dict):
+                raise TypeError(f"Field `{pattern_field}` must be a string or a table")
+            rules.append((pattern, cls._get_compression(value, pattern_field)))
+        return CompressionRules(default, rules)
+
+    @staticmethod
+    def _get_compression(table: dict[str, Any], field: str) -> Compression:
+        method = table.get("compression", "stored")
+        if not isinstance(method, str):
+            raise TypeError(f"Field `{field}.compression` must be a string")
+        level = table.get("compression-level")
+        if level is not None and (
+            not isinstance(level, int) or isinstance(level, bool)
+        ):
+            raise TypeError(f"Field `{field}.compression-level` must be an integer")
+        try:
+            return get_compression(method, level)
+        except ValueError as exc:
+            raise ValueError(f"Field `{field}`: {exc}") from None
+
+    @property
+    def incompressible_threshold(self) -> float | None:
+        """The minimum fractional size reduction for a file to be compressed.
+
+        This is ``None`` unless the ``store-incompressible`` option is set.
+        """
+        field = f"tool.hatch.build.targets.{self.plugin_name}"
+        store_incompressible = self.target_config.get("store-incompressible", False)
+        if not isinstance(store_incompressible, bool):
+            raise TypeError(f"Field `{field}.store-incompressible` must be a boolean")
+        threshold = self.target_config.get("incompressible-threshold", 0.1)
+        if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+            raise TypeError(
+                f"Field `{field}.incompressible-threshold` must be a number"
+            )
+        if not 0 <= threshold <= 1:
+            raise ValueError(
+                f"Field `{field}.incompressible-threshold` must be between 0 and 1"
+            )
+        return float(threshold) if store_incompressible else None
+
+    @property
+    def compression_cache(self) -> CompressionCache | None:
+        """The on-disk cache of compressed file data, if enabled."""
+        field = f"tool.hatch.build.targets.{self.plugin_name}"
+        cache_dir = self.target_config.get("compression-cache", False)
+        if not isinstance(cache_dir, (bool, str)):
+            raise TypeError(
+                f"Field `{field}.compression-cache` must be a boolean or a string"
+            )
+        max_size = self.target_config.get("compression-cache-max-size", 1024**3)
+        if not isinstance(max_size, int) or isinstance(max_size, bool):
+            raise TypeError(
+                f"Field `{field}.compression-cache-max-size` must be an integer"
+            )
+        if cache_dir is False:
+            return None
+        if cache_dir is True:
+            cache_dir = default_cache_dir()
+        else:
+            cache_dir = Path(self.root, os.path.expanduser(cache_dir))
+        return CompressionCache(cache_dir, max_size=max_size)
+
+    @property
+    def chunked_deflate_threshold(self) -> int | None:
+        """The size above which files are deflated in parallel blocks, if enabled."""
+        threshold = self.target_config.get("chunked-deflate-threshold")
+        if threshold is None:
+            return None
+        field = f"tool.hatch.build.targets.{self.plugin_name}"
+        if not isinstance(threshold, int) or isinstance(threshold, bool):
+            raise TypeError(
+                f"Field `{field}.chunked-deflate-threshold` must be an integer"
+            )
+        if threshold <= 0:
+            raise ValueError(
+                f"Field `{field}.chunked-deflate-threshold` must be positive"
+            )
+        return threshold
+
+    @property
+    def skip_unchanged(self) -> bool:
+        """Whether to skip the build if its inputs have not changed."""
+        skip_unchanged = self.target_config.get("skip-unchanged", False)
+        if not isinstance(skip_unchanged, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.skip-unchanged` "
+                "must be a boolean"
+            )
+        return skip_unchanged
+
+    @property
+    def read_ahead(self) -> int | None:
+        """The memory budget, in bytes, for reading files ahead, if enabled."""
+        read_ahead = self.target_config.get("read-ahead")
+        if read_ahead is None:
+            return None
+        field = f"tool.hatch.build.targets.{self.plugin_name}.read-ahead"
+        if not isinstance(read_ahead, int) or isinstance(read_ahead, bool):
+            raise TypeError(f"Field `{field}` must be an integer")
+        if read_ahead <= 0:
+            raise ValueError(f"Field `{field}` must be positive")
+        return read_ahead
+
+    @property
+    def build_report(self) -> bool:
+        """Whether to write a JSON build report next to the artifact."""
+        build_report = self.target_config.get("build-report", False)
+        if not isinstance(build_report, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.build-report` "
+                "must be a boolean"
+            )
+        return build_report
+
+    @property
+    def merge_archives(self) -> dict[str, str]:
+        """Zip archives whose entries are merged into the archive.
+
+        This maps the paths of the archives (relative to the project root)
+        to the directories (relative to the install directory) into which
+        their entries are placed.
+        """
+        field = f"tool.hatch.build.targets.{self.plugin_name}.merge-archives"
+        merge_archives = self.target_config.get("merge-archives", {})
+        if not isinstance(merge_archives, dict):
+            raise TypeError(f"Field `{field}` must be a table")
+        result = {}
+        for path, prefix in merge_archives.items():
+            if not isinstance(prefix, str):
+                raise TypeError(f"Field `{field}.{path}` must be a string")
+            if prefix:
+                if posixpath.isabs(prefix) or os.path.isabs(prefix):
+                    raise ValueError(f"Field `{field}.{path}` must be a relative path")
+                prefix = normalize_relative_path(prefix).replace(os.sep, "/")
+                if prefix == ".":
+                    prefix = ""
+                elif ".." in prefix.split("/"):
+                    raise ValueError(
+                        f"Field `{field}.{path}` must not refer to a parent directory"
+                    )
+            result[os.path.join(self.root, normalize_relative_path(path))] = prefix
+        return result
+
+    @property
+    def output_fd(self) -> int | None:
+        """A file descriptor to stream the archive to, instead of writing a file."""
+        output_fd = self.target_config.get("output-fd")
+        if output_fd is None:
+            return None
+        field = f"tool.hatch.build.targets.{self.plugin_name}.output-fd"
+        if not isinstance(output_fd, int) or isinstance(output_fd, bool):
+            raise TypeError(f"Field `{field}` must be an integer")
+        if output_fd < 0:
+            raise ValueError(f"Field `{field}` must not be negative")
+        return output_fd
+
+    @property
+    def directory_entries(self) -> bool:
+        """Whether to write an entry for every directory in the archive.
+
+        If false, entries are only written for empty directories.
+        """
+        directory_entries = self.target_config.get("directory-entries", True)
+        if not isinstance(directory_entries, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}"
+                ".directory-entries` must be a boolean"
+            )
+        return directory_entries
+
+    @property
+    def preserve_symlinks(self) -> bool:
+        """Whether to store symlinks as symlinks, rather than following them."""
+        preserve_symlinks = self.target_config.get("preserve-symlinks", False)
+        if not isinstance(preserve_symlinks, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}"
+                ".preserve-symlinks` must be a boolean"
+            )
+        return preserve_symlinks
+
+    @property
+    def durability(self) -> str:
+        """How carefully output files are written (see ``atomic_write``)."""
+        field = f"tool.hatch.build.targets.{self.plugin_name}.durability"
+        durability = self.target_config.get("durability", "rename")
+        if not isinstance(durability, str):
+            raise TypeError(f"Field `{field}` must be a string")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Field `{field}` must be one of: {', '.join(DURABILITY_MODES)}"
+            )
+        return durability
+
+    @property
+    def anonymous_tempfile(self) -> bool:
+        """Whether to write output files via unnamed temporary files."""
+        anonymous_tempfile = self.target_config.get("anonymous-tempfile", False)
+        if not isinstance(anonymous_tempfile, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}"
+                ".anonymous-tempfile` must be a boolean"
+            )
+        return anonymous_tempfile
+
+    @property
+    def output_buffer_size(self) -> int:
+        """The size of the buffer in which writes to the archive are coalesced.
+
+        Zero disables the buffer.
+        """
+        field = f"tool.hatch.build.targets.{self.plugin_name}.output-buffer-size"
+        output_buffer_size = self.target_config.get(
+            "output-buffer-size", _DEFAULT_OUTPUT_BUFFER_SIZE
+        )
+        if not isinstance(output_buffer_size, int) or isinstance(
+            output_buffer_size, bool
+        ):
+            raise TypeError(f"Field `{field}` must be an integer")
+        if output_buffer_size < 0:
+            raise ValueError(f"Field `{field}` must not be negative")
+        return output_buffer_size
+
+    @property
+    def preallocate(self) -> bool:
+        """Whether to preallocate disk space for the archive."""
+        preallocate = self.target_config.get("preallocate", False)
+        if not isinstance(preallocate, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.preallocate` "
+                "must be a boolean"
+            )
+        return preallocate
+
+    @property
+    def manifest(self) -> str | None:
+        """The name of the manifest entry to include in the archive, if any.
+
+        The name is relative to the install directory.
+        """
+        field = f"tool.hatch.build.targets.{self.plugin_name}.manifest"
+        return self._get_manifest(self.target_config.get("manifest", False), field)
+
+    @staticmethod
+    def _get_manifest(manifest: Any, field: str) -> str | None:
+        if manifest is True:
+            return "RECORD"
+        if manifest is False:
+            return None
+        if not isinstance(manifest, str):
+            raise TypeError(f"Field `{field}` must be a boolean or a string")
+        if not manifest:
+            raise ValueError(f"Field `{field}` must not be empty")
+        return normalize_relative_path(manifest)
+
+    @property
+    def manifest_sidecar(self) -> bool:
+        """Whether to write the manifest to a file next to the artifact."""
+        manifest_sidecar = self.target_config.get("manifest-sidecar", False)
+        if not isinstance(manifest_sidecar, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.manifest-sidecar` "
+                "must be a boolean"
+            )
+        return manifest_sidecar
+
+    @property
+    def manifest_digest(self) -> str:
+        """The digest algorithm used for the manifest."""
+        field = f"tool.hatch.build.targets.{self.plugin_name}.manifest-digest"
+        manifest_digest = self.target_config.get("manifest-digest", "sha256")
+        if not isinstance(manifest_digest, str):
+            raise TypeError(f"Field `{field}` must be a string")
+        if manifest_digest not in hashlib.algorithms_available:
+            raise ValueError(
+                f"Unknown digest algorithm `{manifest_digest}` in field `{field}`"
+            )
+        return manifest_digest
+
+    @property
+    def variants(self) -> list[Variant]:
+        """Additional archives built in the same pass as the main archive.
+
+        Each variant may override the install name, compression and
+        manifest of the main archive, and may omit ``METADATA.json``.
+        """
+        field = f"tool.hatch.build.targets.{self.plugin_name}.variants"
+        variants = self.target_config.get("variants", {})
+        if not isinstance(variants, dict):
+            raise TypeError(f"Field `{field}` must be a table")
+        result = []
+        for name, table in variants.items():
+            variant_field = f"{field}.{name}"
+            if not _VARIANT_NAME_RE.fullmatch(name):
+                raise ValueError(
+                    f"Field `{variant_field}`: variant names may only contain "
+                    "letters, digits, periods and underscores"
+                )
+            if not isinstance(table, dict):
+                raise TypeError(f"Field `{variant_field}` must be a table")
+            install_name = table.get("install-name")
+            if install_name is not None and not isinstance(install_name, str):
+                raise TypeError(
+                    f"Field `{variant_field}.install-name` must be a string"
+                )
+            metadata = table.get("metadata", True)
+            if not isinstance(metadata, bool):
+                raise TypeError(f"Field `{variant_field}.metadata` must be a boolean")
+            # Unset compression options are inherited from the target
+            compression_table = {
+                key: value
+                for key, value in self.target_config.items()
+                if key == "compression-patterns"
+                or (
+                    key in {"compression", "compression-level"}
+                    and "compression" not in table
+                    and "compression-level" not in table
+                )
+            }
+            compression_table.update(table)
+            result.append(
+                Variant(
+                    name,
+                    install_name,
+                    self._get_compression_rules(compression_table, variant_field),
+                    metadata,
+                    self._get_manifest(
+                        table.get(
+                            "manifest", self.target_config.get("manifest", False)
+                        ),
+                        f"{variant_field}.manifest",
+                    ),
+                )
+            )
+        return result
+
+    @property
+    def shard_max_size(self) -> int | None:
+        """The maximum size of each shard, if the archive is split into shards."""
+        shard_max_size = self.target_config.get("shard-max-size")
+        if shard_max_size is None:
+            return None
+        field = f"tool.hatch.build.targets.{self.plugin_name}.shard-max-size"
+        if not isinstance(shard_max_size, int) or isinstance(shard_max_size, bool):
+            raise TypeError(f"Field `{field}` must be an integer")
+        if shard_max_size <= 0:
+            raise ValueError(f"Field `{field}` must be positive")
+        return shard_max_size
+
+    @property
+    def incremental(self) -> bool:
+        """Whether to reuse compressed data from the previously built archive."""
+        incremental = self.target_config.get("incremental", False)
+        if not isinstance(incremental, bool):
+            raise TypeError(
+                f"Field `tool.hatch.build.targets.{self.plugin_name}.incremental` "
+                "must be a boolean"
+            )
+        return incremental
+
 
 class ZippedDirectoryBuilder(BuilderInterface):
     PLUGIN_NAME = "zipped-directory"
@@ -150,7 +1446,16 @@ class ZippedDirectoryBuilder(BuilderInterface):
 
     def clean(self, directory: str, versions: Iterable[str]) -> None:
         for filename in os.listdir(directory):
-            if filename.endswith(".zip"):
+            if filename.endswith(
+                (
+                    ".zip",
+                    ".report.json",
+                    ".fingerprint",
+                    ".RECORD",
+                    ".shards.json",
+                    ".index.json",
+                )
+            ):
                 os.remove(os.path.join(directory, filename))
 
     def build_standard(self, directory: str, **build_data: Any) -> str:
@@ -158,18 +1463,526 @@ class ZippedDirectoryBuilder(BuilderInterface):
         target = Path(directory, f"{project_name}-{self.metadata.version}.zip")
 
         install_name: str = build_data["install_name"]
+        cache = self.config.compression_cache
+        shard_max_size = self.config.shard_max_size
+        if shard_max_size is not None:
+            if self.config.output_fd is not None or self.config.variants:
+                raise ValueError(
+                    f"Field `tool.hatch.build.targets.{self.config.plugin_name}."
+                    "shard-max-size` may not be combined with `output-fd` or "
+                    "`variants`"
+                )
+            return os.fspath(
+                self._write_shards(target, install_name, shard_max_size, cache)
+            )
+        report = BuildReport() if self.config.build_report else None
+        manifest = None
+        if self.config.manifest is not None or self.config.manifest_sidecar:
+            manifest = Manifest(self.config.manifest_digest)
+        output_fd = self.config.output_fd
+        if output_fd is None:
+            artifact = os.fspath(target)
+        else:
+            artifact = f"/dev/fd/{output_fd}"
 
-        with ZipArchive.open(
-            target, install_name, reproducible=self.config.reproducible
-        ) as archive:
-            for included_file in self.recurse_included_files():
-                archive.add_file(included_file)
+        variants = [
+            (variant, target.with_name(f"{target.stem}-{variant.name}.zip"))
+            for variant in self.config.variants
+        ]
+        shared = None
+        if variants:
+            shared = SharedCompression(len(variants) + 1, cache)
 
-            json_metadata = metadata_to_json(
-                self.config.core_metadata_constructor(self.metadata)
+        included_files = None
+        fingerprint = None
+        fingerprint_path = target.with_suffix(".fingerprint")
+        if self.config.skip_unchanged and output_fd is None:
+            included_files = list(self.recurse_included_files())
+            fingerprint = self._fingerprint(build_data, included_files)
+            force = os.environ.get(FORCE_ENV_VAR) in {"1", "true"}
+            if (
+                not force
+                and _is_up_to_date(target, fingerprint_path, fingerprint)
+                and all(path.is_file() for _, path in variants)
+            ):
+                self.app.display_info(f"{target.name} is up to date")
+                return artifact
+
+        # NB: compressed data is not reused from the previous archive when
+        # building variants, since it is shared between the archives
+        incremental = self.config.incremental and output_fd is None and not variants
+        index_path = target.with_suffix(".index.json")
+        index = previous_index = None
+        if incremental:
+            settings = self._index_settings()
+            index = BuildIndex(settings)
+            previous_index = BuildIndex.load(index_path, settings)
+        elif output_fd is None:
+            # The index would not describe the new archive
+            index_path.unlink(missing_ok=True)
+        with self._open_output(target, output_fd) as dst:
+            stats = self._write_archive(
+                dst,
+                install_name,
+                included_files,
+                previous=target if incremental else None,
+                previous_index=previous_index,
+                index=index,
+                cache=shared or cache,
+                report=report,
+                manifest=manifest,
+                variants=variants,
             )
-            archive.write_file("METADATA.json", json.dumps(json_metadata, indent=2))
-        return os.fspath(target)
+        for _, path in variants:
+            self.app.display_info(f"Built variant {path}")
+        if manifest is not None and self.config.manifest_sidecar:
+            with self._atomic_write(target.with_suffix(".RECORD")) as fp:
+                fp.write(manifest.to_csv().encode("utf-8"))
+        if index is not None:
+            with self._atomic_write(index_path) as fp:
+                fp.write(index.dumps().encode("utf-8"))
+        if fingerprint is not None:
+            with self._atomic_write(fingerprint_path) as fp:
+                fp.write(fingerprint.encode("ascii"))
+
+        if stats.reused_entries:
+            self.app.display_info(
+                f"Reused the compressed data of {stats.reused_entries} file(s) "
+                "from the previous build"
+            )
+        if stats.incompressible_entries:
+            self.app.display_info(
+                f"Stored {stats.incompressible_entries} incompressible file(s) "
+                "without compression (saving an estimated "
+                f"{stats.incompressible_cpu_time_saved:.2f}s of CPU time)"
+            )
+        if cache is not None:
+            with _report_phase(report, "cache"):
+                cache.prune()
+            self.app.display_info(
+                f"Compression cache: {cache.hits} hit(s), {cache.misses} miss(es)"
+            )
+        if report is not None:
+            self._write_report(target, output_fd is None, report, stats, cache, shared)
+        return artifact
+
+    def build_buffer(self, buffer: BinaryIO | None = None) -> BinaryIO:
+        """Build the archive in memory, without writing it to the filesystem.
+
+        The archive is written to ``buffer`` (at its current position) or,
+        if no buffer is given, to a new ``io.BytesIO``.  The buffer is
+        returned.
+
+        Unlike ``build``, this does not run any build hooks, and ignores
+        the ``incremental``, ``skip-unchanged``, ``output-fd``,
+        ``build-report``, ``manifest-sidecar``, ``variants``,
+        ``shard-max-size`` and ``compression-cache`` options.
+        The builder may be used for any number of builds.
+        """
+        if buffer is None:
+            buffer = io.BytesIO()
+        build_data = self.get_default_build_data()
+        self.set_build_data_defaults(build_data)
+        manifest = None
+        if self.config.manifest is not None:
+            manifest = Manifest(self.config.manifest_digest)
+        with self.config.set_build_data(build_data):
+            self._write_archive(buffer, build_data["install_name"], manifest=manifest)
+        return buffer
+
+    def build_bytes(self) -> bytes:
+        """Build the archive in memory, returning its content."""
+        buffer = io.BytesIO()
+        self.build_buffer(buffer)
+        return buffer.getvalue()
+
+    def _write_archive(
+        self,
+        dst: str | os.PathLike[str] | BinaryIO,
+        install_name: str,
+        included_files: Iterable[IncludedFile] | None = None,
+        *,
+        previous: str | os.PathLike[str] | None = None,
+        previous_index: BuildIndex | None = None,
+        index: BuildIndex | None = None,
+        cache: CompressionCache | SharedCompression | None = None,
+        report: BuildReport | None = None,
+        manifest: Manifest | None = None,
+        variants: Sequence[tuple[Variant, Path]] = (),
+    ) -> ArchiveStats:
+        """Write the archive and, in the same pass, any ``variants``.
+
+        The variants are written to the paths given with them.  (To share
+        the work of reading and compressing files between the archives,
+        ``cache`` should be a ``SharedCompression``.)
+        """
+        if included_files is None:
+            included_files = self.recurse_included_files()
+        preallocate = 0
+        if self.config.preallocate:
+            included_files = list(included_files)
+            preallocate = self._estimate_size(included_files)
+        options = self._archive_options(cache)
+        options["preallocate"] = preallocate
+        with ExitStack() as stack:
+            archive = stack.enter_context(
+                ZipArchive.open(
+                    dst,
+                    install_name,
+                    previous=previous,
+                    previous_index=previous_index,
+                    index=index,
+                    compression=self.config.compression,
+                    report=report,
+                    manifest=manifest,
+                    **options,
+                )
+            )
+            # Each archive, whether to include METADATA.json, and the
+            # name of its manifest entry
+            archives = [(archive, True, self.config.manifest)]
+            for variant, variant_dst in variants:
+                variant_manifest = None
+                if variant.manifest is not None:
+                    variant_manifest = Manifest(self.config.manifest_digest)
+                variant_archive = stack.enter_context(
+                    ZipArchive.open(
+                        variant_dst,
+                        variant.install_name or install_name,
+                        compression=variant.compression,
+                        manifest=variant_manifest,
+                        **options,
+                    )
+                )
+                archives.append((variant_archive, variant.metadata, variant.manifest))
+
+            _add_files_to_all(
+                [zip_archive for zip_archive, _, _ in archives], included_files
+            )
+            for path, prefix in self.config.merge_archives.items():
+                for zip_archive, _, _ in archives:
+                    zip_archive.add_archive(path, prefix)
+
+            with _report_phase(report, "metadata"):
+                metadata_json = self._metadata_json()
+                for zip_archive, metadata, _ in archives:
+                    if metadata:
+                        zip_archive.write_file("METADATA.json", metadata_json)
+            for zip_archive, _, manifest_name in archives:
+                if zip_archive.manifest is not None and manifest_name is not None:
+                    zip_archive.write_manifest(manifest_name)
+        return archive.stats
+
+    def _write_shards(
+        self,
+        target: Path,
+        install_name: str,
+        max_size: int,
+        cache: CompressionCache | None,
+    ) -> Path:
+        """Write the archive as shards of at most ``max_size`` bytes.
+
+        The shards are named after ``target`` (e.g. ``name-1.0-shard1.zip``)
+        and written concurrently, by up to ``workers`` threads.  Each is a
+        self-contained archive, including ``METADATA.json`` and an index,
+        ``SHARDS.json``, which maps the name of each file to the shard
+        which holds it.  The index is also written next to the shards,
+        and its path is returned.
+        """
+        root_path = Path(install_name)
+        metadata_json = self._metadata_json()
+        manifest_name = self.config.manifest
+
+        def record_size(name: str) -> int:
+            # A bound on the size of the manifest line for an entry
+            return 2 * len(name.encode()) + 160 if manifest_name is not None else 0
+
+        metadata_name = (root_path / "METADATA.json").as_posix()
+        index_name = (root_path / "SHARDS.json").as_posix()
+        fixed = entry_size_bound(len(metadata_json.encode()), metadata_name)
+        fixed += record_size(metadata_name) + record_size(index_name)
+        if manifest_name is not None:
+            fixed += entry_size_bound(0, (root_path / manifest_name).as_posix())
+
+        # Each item to be assigned to a shard is either a file or a
+        # merged archive (and its prefix)
+        items: list[tuple[IncludedFile | tuple[str, str], list[str], int]] = []
+        stat_file = os.lstat if self.config.preserve_symlinks else os.stat
+        for included_file in self.recurse_included_files():
+            name = (root_path / included_file.distribution_path).as_posix()
+            st = stat_file(included_file.path)
+            size = entry_size_bound(st.st_size, name)
+            if stat.S_ISREG(st.st_mode) and fixed + size > max_size // 2:
+                # The size of large files' compressed data is found (by
+                # compressing them) so that they are not judged too
+                # large, and shards are not left half empty, on account
+                # of the size of their uncompressed data
+                size = min(
+                    size, self._compressed_size_bound(included_file, name, cache)
+                )
+            items.append((included_file, [name], size + record_size(name)))
+        for path, prefix in self.config.merge_archives.items():
+            names = []
+            size = 0
+            with ZipFile(path) as src:
+                for src_info in src.infolist():
+                    name = (root_path / prefix / src_info.filename).as_posix()
+                    size += entry_size_bound(src_info.compress_size, name)
+                    if not src_info.is_dir():
+                        names.append(name)
+                        size += record_size(name)
+            items.append(((path, prefix), names, size))
+
+        # The size of the index depends on the number of shards, and
+        # vice versa, so plan until the space reserved for it suffices
+        index_size = 0
+        while True:
+            reserved = fixed + entry_size_bound(index_size, index_name)
+            shards = plan_shards(
+                items,
+                max_size,
+                reserved,
+                directory_entries=self.config.directory_entries,
+            ) or [Shard()]
+            paths = [
+                target.with_name(f"{target.stem}-shard{n}.zip")
+                for n in range(1, len(shards) + 1)
+            ]
+            index = json.dumps(
+                {
+                    "shards": [path.name for path in paths],
+                    "files": {
+                        name: path.name
+                        for shard, path in zip(shards, paths)
+                        for name in shard.names
+                    },
+                },
+                indent=2,
+            )
+            if len(index.encode()) <= index_size:
+                break
+            index_size = len(index.encode())
+
+        options = self._archive_options(cache)
+        # The shards are written in parallel, rather than their entries
+        options.update(workers=1, read_ahead=None)
+
+        def write_shard(shard: Shard, path: Path) -> ArchiveStats:
+            manifest = None
+            if manifest_name is not None:
+                manifest = Manifest(self.config.manifest_digest)
+            with ZipArchive.open(
+                path,
+                install_name,
+                compression=self.config.compression,
+                manifest=manifest,
+                **options,
+                preallocate=reserved + shard.size if self.config.preallocate else 0,
+            ) as archive:
+                archive.add_files(
+                    item for item in shard.items if isinstance(item, IncludedFile)
+                )
+                for item in shard.items:
+                    if not isinstance(item, IncludedFile):
+                        archive.add_archive(*item)
+                archive.write_file("METADATA.json", metadata_json)
+                archive.write_file("SHARDS.json", index)
+                if manifest is not None and manifest_name is not None:
+                    archive.write_manifest(manifest_name)
+            return archive.stats
+
+        workers = min(self.config.workers, len(shards))
+        with ThreadPoolExecutor(workers, thread_name_prefix="shard") as executor:
+            all_stats = list(executor.map(write_shard, shards, paths))
+
+        # Remove any shards left over from a previous build
+        shard_re = re.compile(rf"{re.escape(target.stem)}-shard\d+\.zip")
+        for path in target.parent.iterdir():
+            if shard_re.fullmatch(path.name) and path not in paths:
+                path.unlink()
+        index_path = target.with_suffix(".shards.json")
+        with self._atomic_write(index_path) as fp:
+            fp.write(index.encode("utf-8"))
+
+        self.app.display_info(
+            f"Wrote {len(shards)} shard(s) of at most {max_size} bytes"
+        )
+        incompressible = sum(stats.incompressible_entries for stats in all_stats)
+        if incompressible:
+            cpu_time_saved = sum(
+                stats.incompressible_cpu_time_saved for stats in all_stats
+            )
+            self.app.display_info(
+                f"Stored {incompressible} incompressible file(s) "
+                "without compression (saving an estimated "
+                f"{cpu_time_saved:.2f}s of CPU time)"
+            )
+        if cache is not None:
+            cache.prune()
+        return index_path
+
+    def _compressed_size_bound(
+        self, included_file: IncludedFile, name: str, cache: CompressionCache | None
+    ) -> int:
+        """A bound on the size of a file's entry, found by compressing the file.
+
+        The file is compressed as it will be in the archive (and, if a
+        ``cache`` is given, stored in the cache, to be reused when the
+        archive is written).  The bound allows for differences in the
+        compressed data when it is compressed in blocks.
+        """
+        path = included_file.path
+        file_size = os.path.getsize(path)
+        compression = self.config.compression.for_path(
+            Path(included_file.distribution_path).as_posix()
+        )
+        threshold = self.config.incompressible_threshold
+        if compression.compress_type == ZIP_STORED or (
+            threshold is not None and estimate_savings(path, compression)[0] < threshold
+        ):
+            return entry_size_bound(file_size, name)
+        if cache is not None:
+            compressed = cache.compress_file(path, compression, file_size)
+        else:
+            compressed = compress_file(path, *compression)
+        return entry_size_bound(compressed.compress_size, name)
+
+    def _archive_options(
+        self, cache: CompressionCache | SharedCompression | None
+    ) -> dict[str, Any]:
+        """The ``ZipArchive.open`` arguments common to every archive of a build."""
+        return {
+            "reproducible": self.config.reproducible,
+            "workers": self.config.workers,
+            "incompressible_threshold": self.config.incompressible_threshold,
+            "cache": cache,
+            "chunked_threshold": self.config.chunked_deflate_threshold,
+            "read_ahead": self.config.read_ahead,
+            "directory_entries": self.config.directory_entries,
+            "symlinks": self.config.preserve_symlinks,
+            "durability": self.config.durability,
+            "anonymous_tempfile": self.config.anonymous_tempfile,
+            "buffer_size": self.config.output_buffer_size,
+        }
+
+    def _estimate_size(self, included_files: Iterable[IncludedFile]) -> int:
+        """Estimate (generously) the size of the archive.
+
+        This is the size of the included files and merged archives,
+        uncompressed, plus an allowance for the headers of each entry.
+        """
+        size = 0
+        for included_file in included_files:
+            size += os.path.getsize(included_file.path) + _ENTRY_OVERHEAD
+            size += 2 * len(included_file.distribution_path)
+        for path in self.config.merge_archives:
+            size += os.path.getsize(path)
+        return size
+
+    def _index_settings(self) -> dict[str, Any]:
+        """The settings recorded in the index of an incremental build.
+
+        These are those which (besides the compression method and level
+        of each entry, which are recorded with it) affect the compressed
+        data of the entries.
+        """
+        return {
+            "plugin_version": _plugin_version(),
+            "python_version": sys.version,
+            "zlib_version": zlib.ZLIB_RUNTIME_VERSION,
+            "chunked_deflate_threshold": self.config.chunked_deflate_threshold,
+        }
+
+    def _fingerprint(
+        self, build_data: dict[str, Any], included_files: Iterable[IncludedFile]
+    ) -> str:
+        """Compute a digest of everything which determines the built archive.
+
+        Files are assumed to be unchanged if their size and modification
+        time are unchanged.
+        """
+        files = []
+        stat_file = os.lstat if self.config.preserve_symlinks else os.stat
+        for included_file in included_files:
+            st = stat_file(included_file.path)
+            files.append((included_file.distribution_path, st.st_size, st.st_mtime_ns))
+        for path, prefix in self.config.merge_archives.items():
+            st = os.stat(path)
+            files.append((f"{prefix}:{path}", st.st_size, st.st_mtime_ns))
+        inputs = {
+            "plugin_version": _plugin_version(),
+            "target_config": self.target_config,
+            "build_data": build_data,
+            "reproducible": self.config.reproducible,
+            "source_date_epoch": os.environ.get("SOURCE_DATE_EPOCH"),
+            "metadata": self._metadata_json(),
+            "files": files,
+        }
+        serialized = json.dumps(inputs, sort_keys=True, default=repr)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _atomic_write(
+        self, path: str | os.PathLike[str]
+    ) -> AbstractContextManager[io.BufferedRandom]:
+        """Write an output file, with the configured durability."""
+        return atomic_write(
+            path,
+            durability=self.config.durability,
+            anonymous=self.config.anonymous_tempfile,
+        )
+
+    def _metadata_json(self) -> str:
+        """The content of ``METADATA.json``."""
+        return render_metadata_json(
+            self.config.core_metadata_constructor(self.metadata)
+        )
+
+    @staticmethod
+    @contextmanager
+    def _open_output(target: Path, output_fd: int | None) -> Iterator[Path | BinaryIO]:
+        """Get the destination to which to write the archive."""
+        if output_fd is None:
+            yield target
+        else:
+            with os.fdopen(output_fd, "wb", closefd=False) as fp:
+                yield fp
+
+    def _write_report(
+        self,
+        target: Path,
+        written: bool,
+        report: BuildReport,
+        stats: ArchiveStats,
+        cache: CompressionCache | None,
+        shared: SharedCompression | None = None,
+    ) -> None:
+        # NB: when the archive was streamed, its size is not known
+        report_path = target.with_suffix(".report.json")
+        summary = report.to_dict(
+            artifact={
+                "name": target.name,
+                "size": target.stat().st_size if written else None,
+            },
+            incompressible={
+                "entries": stats.incompressible_entries,
+                "cpu_time_saved": stats.incompressible_cpu_time_saved,
+            },
+            cache=(
+                None if cache is None else {"hits": cache.hits, "misses": cache.misses}
+            ),
+            variants=(
+                None
+                if shared is None
+                else {
+                    "archives": shared.consumers,
+                    "file_reads": shared.reads,
+                    "compressions": shared.compressions,
+                }
+            ),
+        )
+        with self._atomic_write(report_path) as fp:
+            fp.write(json.dumps(summary, indent=2).encode("utf-8"))
+        self.app.display_info(f"Build report written to {report_path}")
 
     def get_default_build_data(self) -> dict[str, Any]:
         build_data: dict[str, Any] = super().get_default_build_data()
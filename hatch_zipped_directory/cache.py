@@ -0,0 +1,201 @@
+"""A content-addressed on-disk cache of compressed file data.
+
+The cache may be shared between builds (and between projects).  Cache
+entries are keyed by the SHA-256 digest of the uncompressed data, along
+with the compression method and level and (for deflate and Zstandard)
+the version of the compression library, since the compressed data may
+differ between versions of the library.  Each entry contains the CRC-32
+and size of the uncompressed data and the size of the compressed data,
+followed by the raw compressed data,
+so that it may be spliced directly into a zip archive.
+
+The total size of the cache is bounded.  When it grows too large, the
+least recently used entries are evicted.  (The modification time of an
+entry's file is used to track when it was last used.)
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from contextlib import suppress
+from pathlib import Path
+from zipfile import ZIP_DEFLATED
+
+from .compression import Compression
+from .compression import ZIP_ZSTANDARD
+from .manifest import FileDigest
+from .rawzip import compress_bytes
+from .rawzip import compress_file
+from .rawzip import CompressedData
+from .utils import atomic_write
+
+__all__ = ["CompressionCache", "default_cache_dir"]
+
+_MAGIC = b"HZDC"
+_HEADER = struct.Struct("<4sLQQ")
+
+_READ_SIZE = 1024 * 1024
+
+# The versions of the libraries used by the compression methods
+_LIBRARY_VERSIONS = {ZIP_DEFLATED: zlib.ZLIB_RUNTIME_VERSION}
+try:
+    # python >= 3.14, if built with zstd support
+    from compression.zstd import zstd_version  # type: ignore[import-not-found]
+except ImportError:
+    pass
+else:
+    _LIBRARY_VERSIONS[ZIP_ZSTANDARD] = zstd_version
+
+
+def default_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "hatch-zipped-directory")
+
+
+def _file_digest(path: str, other_digest: FileDigest | None = None) -> str:
+    digest = hashlib.sha256()
+    if other_digest is not None:
+        other_digest.begin()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(_READ_SIZE):
+            digest.update(chunk)
+            if other_digest is not None:
+                other_digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompressionCache:
+    """A size-bounded, content-addressed cache of compressed file data.
+
+    Files smaller than ``min_size`` are not cached, since compressing
+    them is cheap compared to the overhead of caching.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_size: int = 1024**3,
+        min_size: int = 64 * 1024,
+    ):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.min_size = min_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def compress_file(
+        self,
+        path: str,
+        compression: Compression,
+        file_size: int,
+        *,
+        digest: FileDigest | None = None,
+    ) -> CompressedData:
+        """Compress a file, using cached data if available.
+
+        If a ``digest`` is given, it is updated with the file's data.
+        This may be called concurrently from multiple threads.
+        """
+        if file_size < self.min_size:
+            return compress_file(path, *compression, digest=digest)
+
+        entry_path = self._entry_path(_file_digest(path, digest), compression)
+        compressed = self._read_entry(entry_path, compression)
+        with self._lock:
+            if compressed is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if compressed is None:
+            # NB: the digest has already been computed
+            compressed = compress_file(path, *compression)
+            self._write_entry(entry_path, compressed)
+        return compressed
+
+    def compress_data(self, data: bytes, compression: Compression) -> CompressedData:
+        """Compress data which has already been read, using cached data if available.
+
+        This may be called concurrently from multiple threads.
+        """
+        if len(data) < self.min_size:
+            return compress_bytes(data, *compression)
+
+        entry_path = self._entry_path(hashlib.sha256(data).hexdigest(), compression)
+        compressed = self._read_entry(entry_path, compression)
+        with self._lock:
+            if compressed is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if compressed is None:
+            compressed = compress_bytes(data, *compression)
+            self._write_entry(entry_path, compressed)
+        return compressed
+
+    def prune(self) -> None:
+        """Evict least recently used entries until the cache is under its max size."""
+        entries = []
+        for entry_path in self.path.glob("*/*-*"):
+            try:
+                st = entry_path.stat()
+            except FileNotFoundError:  # no cov
+                continue  # removed by a concurrent build
+            entries.append((st.st_mtime, st.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+
+    def _entry_path(self, digest: str, compression: Compression) -> Path:
+        compress_type, compresslevel = compression
+        level = "default" if compresslevel is None else compresslevel
+        name = f"{digest}-{compress_type}-{level}"
+        version = _LIBRARY_VERSIONS.get(compress_type)
+        if version is not None:
+            name += f"-{version}"
+        return self.path / digest[:2] / name
+
+    @staticmethod
+    def _read_entry(
+        entry_path: Path, compression: Compression
+    ) -> CompressedData | None:
+        try:
+            with open(entry_path, "rb") as fp:
+                header = fp.read(_HEADER.size)
+                data = fp.read()
+        except FileNotFoundError:
+            return None
+        fields = _HEADER.unpack(header) if len(header) == _HEADER.size else None
+        if fields is None or fields[0] != _MAGIC or fields[3] != len(data):
+            entry_path.unlink(missing_ok=True)  # corrupt entry
+            return None
+        _, crc, file_size, _ = fields
+        with suppress(FileNotFoundError):  # evicted by a concurrent build
+            os.utime(entry_path)  # mark as recently used
+        return CompressedData(
+            compression.compress_type, crc, file_size, len(data), data
+        )
+
+    @staticmethod
+    def _write_entry(entry_path: Path, compressed: CompressedData) -> None:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(entry_path) as fp:
+            fp.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    compressed.CRC,
+                    compressed.file_size,
+                    compressed.compress_size,
+                )
+            )
+            fp.write(compressed.data)
@@ -0,0 +1,101 @@
+"""Multi-threaded deflate compression of large files.
+
+In the manner of `pigz`__, the input is split into blocks which are
+compressed independently (and concurrently).  Each block is compressed
+using the last 32 KiB of the preceding block as a preset dictionary, so
+little compression is lost.  All but the final block are terminated
+with a sync flush, which aligns their compressed data to a byte
+boundary, so that the compressed blocks may simply be concatenated to
+form a single valid deflate stream.
+
+The compressed result depends only on the input, the block size and
+the compression level — not on the number of threads used.
+
+__ https://zlib.net/pigz/
+
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from zipfile import ZIP_DEFLATED
+
+from .manifest import FileDigest
+from .rawzip import CompressedData
+
+__all__ = ["BLOCK_SIZE", "deflate_block", "deflate_file"]
+
+BLOCK_SIZE = 1024 * 1024
+
+# The size of the deflate sliding window
+_WINDOW_SIZE = 32 * 1024
+
+
+def deflate_block(
+    data: bytes, zdict: bytes, compresslevel: int | None, last: bool
+) -> CompressedData:
+    """Compress one block of a chunked deflate stream.
+
+    ``Zdict`` should be the tail end of the preceding block's data.
+    """
+    if compresslevel is None:
+        compresslevel = zlib.Z_DEFAULT_COMPRESSION
+    if zdict:
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush(
+        zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+    )
+    return CompressedData(
+        ZIP_DEFLATED, zlib.crc32(data), len(data), len(compressed), compressed
+    )
+
+
+def deflate_file(
+    path: str,
+    compresslevel: int | None = None,
+    *,
+    executor: Executor | None = None,
+    max_pending: int = 2,
+    block_size: int = BLOCK_SIZE,
+    digest: FileDigest | None = None,
+) -> Iterator[CompressedData]:
+    """Compress a file as a sequence of deflate blocks.
+
+    If an ``executor`` is given, blocks are compressed concurrently, with
+    at most ``max_pending`` blocks being held in memory at once.  The
+    blocks are generated in order.  If a ``digest`` is given, it is
+    updated with the file's data.
+    """
+    pending: deque[Future[CompressedData]] = deque()
+    if digest is not None:
+        digest.begin()
+    try:
+        with open(path, "rb") as fp:
+            zdict = b""
+            data = fp.read(block_size)
+            while True:
+                if digest is not None:
+                    digest.update(data)
+                next_data = fp.read(block_size)
+                last = not next_data
+                if executor is None:
+                    yield deflate_block(data, zdict, compresslevel, last)
+                else:
+                    pending.append(
+                        executor.submit(deflate_block, data, zdict, compresslevel, last)
+                    )
+                    while pending and (len(pending) >= max_pending or last):
+                        yield pending.popleft().result()
+                if last:
+                    break
+                zdict = data[-_WINDOW_SIZE:]
+                data = next_data
+    finally:
+        for future in pending:
+            future.cancel()
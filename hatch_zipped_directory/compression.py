@@ -0,0 +1,155 @@
+"""Selection of the compression method and level for archive entries."""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections.abc import Iterable
+from typing import NamedTuple
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
+
+import pathspec
+
+from .rawzip import compress_bytes
+
+try:
+    # python >= 3.14, if built with zstd support
+    from compression.zstd import CompressionParameter  # type: ignore[import-not-found]
+    from zipfile import ZIP_ZSTANDARD  # type: ignore[attr-defined]
+except ImportError:
+    CompressionParameter = None
+    # The compression method number assigned to Zstandard by the zip spec
+    ZIP_ZSTANDARD = 93
+
+__all__ = [
+    "COMPRESSION_METHODS",
+    "DEFAULT_COMPRESSION",
+    "SAMPLE_SIZE",
+    "ZIP_ZSTANDARD",
+    "Compression",
+    "CompressionRules",
+    "estimate_savings",
+    "get_compression",
+    "zstd_supported",
+]
+
+COMPRESSION_METHODS = {
+    "stored": ZIP_STORED,
+    "deflated": ZIP_DEFLATED,
+    "bzip2": ZIP_BZIP2,
+    "lzma": ZIP_LZMA,
+    "zstd": ZIP_ZSTANDARD,
+}
+
+# Valid compression levels for the methods which support them
+_COMPRESSION_LEVELS = {
+    ZIP_DEFLATED: range(0, 10),
+    ZIP_BZIP2: range(1, 10),
+}
+if CompressionParameter is not None:
+    _zstd_min, _zstd_max = CompressionParameter.compression_level.bounds()
+    _COMPRESSION_LEVELS[ZIP_ZSTANDARD] = range(_zstd_min, _zstd_max + 1)
+
+
+def zstd_supported() -> bool:
+    """Whether this python supports Zstandard compression in zip archives."""
+    return CompressionParameter is not None
+
+
+class Compression(NamedTuple):
+    """A compression method and level.
+
+    A level of ``None`` means to use the default level for the method.
+    """
+
+    compress_type: int = ZIP_DEFLATED
+    compresslevel: int | None = None
+
+
+DEFAULT_COMPRESSION = Compression()
+
+
+def get_compression(method: str, level: int | None = None) -> Compression:
+    """Look up a compression method (and level) by name.
+
+    Raises ``ValueError`` if the method is unknown or unsupported by
+    this python, or if the level is not valid for the method.
+    """
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(
+            f"Unknown compression method `{method}`. "
+            f'Available: {", ".join(COMPRESSION_METHODS)}'
+        )
+    compress_type = COMPRESSION_METHODS[method]
+    if compress_type == ZIP_ZSTANDARD and not zstd_supported():
+        raise ValueError(
+            f"Compression method `{method}` requires python 3.14 or later "
+            f"(this is python {sys.version_info[0]}.{sys.version_info[1]})"
+        )
+    if level is not None:
+        levels = _COMPRESSION_LEVELS.get(compress_type)
+        if levels is None:
+            raise ValueError(
+                f"Compression method `{method}` does not support compression levels"
+            )
+        if level not in levels:
+            raise ValueError(
+                f"Compression level for `{method}` must be between "
+                f"{levels[0]} and {levels[-1]}"
+            )
+    return Compression(compress_type, level)
+
+
+class CompressionRules:
+    """Choose the compression to use for an archive entry based on its path.
+
+    Rules are ``(pattern, compression)`` pairs, where the patterns use
+    the same gitignore-style syntax as Hatch's ``include`` and
+    ``exclude`` options.  The first rule whose pattern matches the path
+    of an entry determines its compression.  Entries which match no
+    rule get the default compression.
+    """
+
+    def __init__(
+        self,
+        default: Compression = DEFAULT_COMPRESSION,
+        rules: Iterable[tuple[str, Compression]] = (),
+    ):
+        self.default = default
+        self.rules = [
+            (pathspec.GitIgnoreSpec.from_lines([pattern]), compression)
+            for pattern, compression in rules
+        ]
+
+    def for_path(self, path: str) -> Compression:
+        """Get the compression for the entry at path (relative to the install dir)."""
+        for spec, compression in self.rules:
+            if spec.match_file(path):
+                return compression
+        return self.default
+
+
+# The amount of data from the start of a file used to estimate its compressibility
+SAMPLE_SIZE = 64 * 1024
+
+
+def estimate_savings(
+    path: str, compression: Compression, sample_size: int = SAMPLE_SIZE
+) -> tuple[float, float]:
+    """Estimate how much compression will reduce the size of a file.
+
+    This trial-compresses a sample from the start of the file.  Returns
+    the fractional reduction in size of the sample, along with the CPU
+    time, per byte, spent compressing it.
+    """
+    with open(path, "rb") as fp:
+        sample = fp.read(sample_size)
+    if not sample:
+        return 0.0, 0.0
+    start = time.thread_time()
+    compressed = compress_bytes(sample, *compression)
+    cpu_time = time.thread_time() - start
+    return 1 - compressed.compress_size / len(sample), cpu_time / len(sample)
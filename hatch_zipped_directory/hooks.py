@@ -1,8 +1,11 @@
 from hatchling.plugin import hookimpl
 
-from .builder import ZippedDirectoryBuilder
-
 
 @hookimpl
 def hatch_register_builder():
+    # Hatch loads this module whenever it loads its plugins, so the
+    # builder (and its dependencies) are only imported once hatch asks
+    # for the registered builders.
+    from .builder import ZippedDirectoryBuilder
+
     return ZippedDirectoryBuilder
@@ -0,0 +1,142 @@
+"""Reusing compressed data from a previous build of an archive.
+
+When building incrementally, an index is written next to the archive,
+recording, for each file entry, the compression settings it was written
+with, and the size, modification time and SHA-256 digest of the file
+it was read from.  In the next build, an entry of the previous archive
+is reused only if it was written with the same settings, from a file
+with the same content.  If a file's size and modification time are
+unchanged, its content is assumed to be too, and it need not be read;
+otherwise its digest is compared with the recorded digest.
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from typing import Any
+from typing import NamedTuple
+
+from .compression import Compression
+from .manifest import FileDigest
+
+__all__ = ["BuildIndex", "IndexEntry", "SourceDigest", "file_sha256"]
+
+_FORMAT_VERSION = 1
+
+_READ_SIZE = 1024 * 1024
+
+
+class IndexEntry(NamedTuple):
+    """How an entry was written, and the file it was written from."""
+
+    compress_type: int
+    compresslevel: int | None
+    file_size: int
+    mtime_ns: int
+    sha256: str
+    # The CRC and compressed size of the entry, to check that the index
+    # matches the archive
+    CRC: int
+    compress_size: int
+
+    @property
+    def compression(self) -> Compression:
+        return Compression(self.compress_type, self.compresslevel)
+
+
+class BuildIndex:
+    """The index entries of the files in an archive.
+
+    ``Settings`` are any other (archive-wide) settings which affect the
+    compressed data.  An index is only loaded if its settings are equal
+    to those of the current build.
+    """
+
+    def __init__(self, settings: dict[str, Any]):
+        self.settings = settings
+        self.entries: dict[str, IndexEntry] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, entry: IndexEntry) -> None:
+        """Record an entry (this may be called from multiple threads)."""
+        with self._lock:
+            self.entries[name] = entry
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "version": _FORMAT_VERSION,
+                "settings": self.settings,
+                "entries": self.entries,
+            },
+            sort_keys=True,
+        )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], settings: dict[str, Any]) -> BuildIndex:
+        """Load the index written by a previous build.
+
+        If there is no index, or it is unreadable or was written with
+        other settings, an empty index is returned.
+        """
+        index = cls(settings)
+        try:
+            with open(path, encoding="utf-8") as fp:
+                data = json.load(fp)
+            # NB: compare the settings as they would be serialized
+            serialized_settings = json.loads(json.dumps(settings))
+            if (
+                data["version"] != _FORMAT_VERSION
+                or data["settings"] != serialized_settings
+            ):
+                return index
+            entries = {
+                name: IndexEntry(*entry) for name, entry in data["entries"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return index
+        index.entries = entries
+        return index
+
+
+class SourceDigest(FileDigest):
+    """A SHA-256 digest of a file, for the index.
+
+    If ``other`` is given (e.g. a digest for a manifest), it is updated
+    with the same data.
+    """
+
+    def __init__(self, other: FileDigest | None = None):
+        self.other = other
+        super().__init__("sha256")
+
+    def begin(self) -> None:
+        super().begin()
+        if self.other is not None:
+            self.other.begin()
+
+    def update(self, data: bytes | bytearray | memoryview | mmap.mmap) -> None:
+        super().update(data)
+        if self.other is not None:
+            self.other.update(data)
+
+
+def file_sha256(path: str, *, digest: FileDigest | None = None) -> str:
+    """Compute the SHA-256 digest of a file.
+
+    If a ``digest`` is given, it is updated with the file's data.
+    """
+    sha256 = hashlib.sha256()
+    if digest is not None:
+        digest.begin()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(_READ_SIZE):
+            sha256.update(chunk)
+            if digest is not None:
+                digest.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,87 @@
+"""RECORD-style manifests of the files in an archive.
+
+The digests of the files are computed as their data is read for
+compression, so that each file need only be read once.
+
+"""
+
+from __future__ import annotations
+
+import base64
+import csv
+import hashlib
+import io
+import mmap
+from typing import NamedTuple
+
+__all__ = ["FileDigest", "Manifest", "ManifestEntry"]
+
+
+class FileDigest:
+    """A digest of a file's data, updated as the data is read.
+
+    Code which reads a file should call ``begin`` before reading it, so
+    that if the file is read more than once, only the last read counts.
+    """
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        self.begin()
+
+    def begin(self) -> None:
+        self._hash = hashlib.new(self.algorithm)
+
+    def update(self, data: bytes | bytearray | memoryview | mmap.mmap) -> None:
+        self._hash.update(data)
+
+    def record_hash(self) -> str:
+        """The digest in the form used in RECORD files (``<algorithm>=<digest>``)."""
+        digest = base64.urlsafe_b64encode(self._hash.digest()).rstrip(b"=")
+        return f"{self.algorithm}={digest.decode('ascii')}"
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class ManifestEntry(NamedTuple):
+    name: str
+    hash: str
+    size: int
+
+
+class Manifest:
+    """Collect the names, digests and sizes of the files in an archive.
+
+    The manifest is formatted like a wheel's RECORD file: a CSV file with
+    a line for each file, giving its path, its digest (in the form
+    ``<algorithm>=<urlsafe-base64-digest>``) and its size.
+    """
+
+    def __init__(self, algorithm: str = "sha256"):
+        if algorithm not in hashlib.algorithms_available:
+            raise ValueError(
+                f"Unknown digest algorithm `{algorithm}`. "
+                f'Available: {", ".join(sorted(hashlib.algorithms_guaranteed))}'
+            )
+        self.algorithm = algorithm
+        self.entries: list[ManifestEntry] = []
+
+    def new_digest(self) -> FileDigest:
+        return FileDigest(self.algorithm)
+
+    def add(self, name: str, digest: FileDigest, size: int) -> None:
+        self.entries.append(ManifestEntry(name, digest.record_hash(), size))
+
+    def to_csv(self, own_name: str | None = None) -> str:
+        """Format the manifest.
+
+        If the manifest is to be included in the archive, ``own_name``
+        should be its name in the archive.  It is listed (as in RECORD
+        files) without a digest or size.
+        """
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerows(self.entries)
+        if own_name is not None:
+            writer.writerow([own_name, "", ""])
+        return buf.getvalue()
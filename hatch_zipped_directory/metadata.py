@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import email
+import json
+import re
 import textwrap
-from email.message import Message
+from functools import lru_cache
 
-__all__ = ["metadata_to_json"]
+__all__ = ["metadata_to_json", "render_metadata_json"]
 
 
 _MULTIPLE_USE_KEYS = {
@@ -40,13 +41,60 @@ def _dedent(value: str) -> str:
     return first + nl + textwrap.dedent(rest)
 
 
-def _get_value(headers: Message, key: str) -> str | list[str]:
-    lkey = key.lower()
-    if lkey in _MULTIPLE_USE_KEYS:
-        return list(map(_dedent, headers.get_all(key, [])))
-    elif lkey == "keywords":
-        return _dedent(headers[key]).split(",")
-    return _dedent(headers[key])
+# A line, and its line ending (if any)
+_LINE_RE = re.compile(r"([^\r\n]*)(\r\n|\r|\n|)")
+
+# The start of a header line (as in email.feedparser)
+_HEADER_RE = re.compile(r"[\041-\071\073-\176]*:")
+
+
+def _parse(metadata: str) -> tuple[list[tuple[str, str]], str]:
+    """Split metadata text into its headers and its body (the description).
+
+    This is equivalent to (but, for large metadata, much faster than)
+    parsing it using ``email.message_from_string`` with the default
+    (``compat32``) policy.  Header values retain their continuation
+    lines (and line endings).
+    """
+    headers: list[tuple[str, str]] = []
+    # The name of the current header, and the pieces of its value
+    name: str | None = None
+    pieces: list[str] = []
+
+    def end_header() -> None:
+        if name is not None:
+            headers.append((name, "".join(pieces)))
+            pieces.clear()
+
+    pos = 0
+    body = ""
+    while pos < len(metadata):
+        m = _LINE_RE.match(metadata, pos)
+        assert m is not None
+        line, eol = m.groups()
+        if not line:
+            # A blank line separates the headers from the body
+            body = metadata[m.end() :]
+            break
+        if line[0] in " \t":
+            # A continuation line (ignored if there is no header to continue)
+            if name is not None:
+                pieces.append(m.group())
+        elif line.startswith("From "):
+            pass  # a unix-from line
+        elif _HEADER_RE.match(line):
+            key, _, value = line.partition(":")
+            if key:
+                end_header()
+                name = key
+                pieces.append(value.lstrip(" \t") + eol)
+        else:
+            # The body starts without a separating blank line
+            body = metadata[pos:]
+            break
+        pos = m.end()
+    end_header()
+    return headers, body
 
 
 def metadata_to_json(metadata: str) -> dict[str, str | list[str]]:
@@ -54,18 +102,31 @@ def metadata_to_json(metadata: str) -> dict[str, str | list[str]]:
 
     __ https://peps.python.org/pep-0566/#json-compatible-metadata
     """
-    headers = email.message_from_string(metadata)
-    assert not headers.is_multipart()
-    description = headers.get_payload()
-    assert isinstance(description, str)
+    headers, description = _parse(metadata)
 
     data: dict[str, str | list[str]] = {}
-    for key in headers:
-        json_key = key.lower().replace("-", "_")
-        if json_key not in data:
-            data[json_key] = _get_value(headers, key)
+    for key, raw_value in headers:
+        lkey = key.lower()
+        json_key = lkey.replace("-", "_")
+        value = _dedent(raw_value.rstrip("\r\n"))
+        if lkey in _MULTIPLE_USE_KEYS:
+            values = data.setdefault(json_key, [])
+            assert isinstance(values, list)
+            values.append(value)
+        elif json_key not in data:
+            data[json_key] = value.split(",") if lkey == "keywords" else value
 
     if description:
         data["description"] = description
 
     return data
+
+
+@lru_cache(maxsize=16)
+def render_metadata_json(metadata: str) -> str:
+    """Render metadata text as the content of ``METADATA.json``.
+
+    The result is cached, since the same metadata is typically rendered
+    more than once per build (and by each build of an in-memory builder).
+    """
+    return json.dumps(metadata_to_json(metadata), indent=2)
@@ -0,0 +1,214 @@
+"""A write-coalescing output layer for zip archives.
+
+``ZipFile`` writes each local header, data chunk and central directory
+record separately, and seeks back to rewrite each local header once its
+entry's data has been written.  When an archive contains many small
+files, that makes for many small writes.  ``CoalescingWriter``
+collects them in a large buffer, patching rewritten headers in place
+when they are still buffered, so that the underlying file sees a few
+large writes.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Any
+from typing import BinaryIO
+from typing import NamedTuple
+
+__all__ = ["CoalescingWriter", "OutputStats"]
+
+
+class OutputStats(NamedTuple):
+    """Statistics for the writes made to the underlying file."""
+
+    buffer_size: int
+    # Number of writes (system calls, for an unbuffered file)
+    writes: int
+    bytes_written: int
+    # Wall time spent in writes
+    write_time: float
+    # Number of bytes preallocated for the file (if any)
+    preallocated: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "buffer_size": self.buffer_size,
+            "writes": self.writes,
+            "bytes": self.bytes_written,
+            "write_time": self.write_time,
+            "write_throughput_mb_s": (
+                self.bytes_written / self.write_time / 1e6
+                if self.write_time > 0
+                else None
+            ),
+            "preallocated": self.preallocated,
+        }
+
+
+class CoalescingWriter:
+    """A file-like object which coalesces writes to a binary file.
+
+    Writes are collected in a buffer of up to ``buffer_size`` bytes.
+    (Writes which would not fit in the buffer are written through,
+    after the buffer, so it never grows beyond that size.)
+    Seeks are lazy: seeking within the buffered data, then writing,
+    modifies the buffer.  The underlying file should be unbuffered (or
+    its buffer should be small), and must not be used directly while
+    the writer is in use.
+
+    If the file is seekable and ``preallocate`` is given, that many
+    bytes of disk space are allocated for the file (using
+    ``os.posix_fallocate``, where available) up front.  The file is
+    truncated to the size of the data written when the writer is
+    closed.
+    """
+
+    def __init__(self, fp: BinaryIO, buffer_size: int, preallocate: int = 0):
+        self._fp = fp
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        try:
+            # The position of the underlying file, where the buffer starts
+            self._buffer_start = fp.tell()
+        except (AttributeError, OSError):
+            self._seekable = False
+            self._buffer_start = 0
+        else:
+            self._seekable = True
+        self._pos = self._buffer_start
+        # The end of the data written
+        self._end = self._pos
+        self.writes = 0
+        self.bytes_written = 0
+        self.write_time = 0.0
+        self.preallocated = 0
+        if preallocate > 0 and self._seekable:
+            self._preallocate(preallocate)
+
+    def _preallocate(self, size: int) -> None:
+        posix_fallocate = getattr(os, "posix_fallocate", None)
+        if posix_fallocate is None:
+            return  # no cov
+        try:
+            posix_fallocate(self._fp.fileno(), self._buffer_start, size)
+        except (AttributeError, OSError):
+            return
+        self.preallocated = size
+
+    @property
+    def stats(self) -> OutputStats:
+        return OutputStats(
+            self.buffer_size,
+            self.writes,
+            self.bytes_written,
+            self.write_time,
+            self.preallocated,
+        )
+
+    def __enter__(self) -> CoalescingWriter:
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.close()
+
+    def close(self) -> None:
+        """Flush the buffer and, if space was preallocated, truncate the file.
+
+        The underlying file is left open.
+        """
+        self.flush()
+        if self.preallocated:
+            self._fp.truncate(self._end)
+
+    def seekable(self) -> bool:
+        return self._seekable
+
+    def writable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._fp.fileno()
+
+    def tell(self) -> int:
+        if not self._seekable:
+            raise OSError("Underlying file is not seekable")
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if not self._seekable:
+            raise OSError("Underlying file is not seekable")
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        elif whence == os.SEEK_END:
+            file_end = 0
+            if not self.preallocated:
+                file_end = self._fp.seek(0, os.SEEK_END)
+                self._fp.seek(self._buffer_start)
+            self._pos = max(file_end, self._end) + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        return self._pos
+
+    def write(self, data: Any) -> int:
+        data = memoryview(data).cast("B")
+        buffer_end = self._buffer_start + len(self._buffer)
+        if not self._buffer_start <= self._pos <= buffer_end:
+            # Writing outside of the buffered region
+            self._write_buffer()
+            self._fp.seek(self._pos)
+            self._buffer_start = self._pos
+        size = len(data)
+        offset = self._pos - self._buffer_start
+        if offset + size > max(self.buffer_size, len(self._buffer)):
+            # The data would take the buffer over its size, so the
+            # buffer is written first (and the data may bypass it)
+            self._write_buffer()
+            if self._pos != self._buffer_start:
+                self._fp.seek(self._pos)
+                self._buffer_start = self._pos
+            offset = 0
+        if not self._buffer and size >= self.buffer_size:
+            self._write(data)
+            self._buffer_start += size
+        else:
+            self._buffer[offset : offset + size] = data
+            if len(self._buffer) >= self.buffer_size:
+                self._write_buffer()
+        self._pos += size
+        self._end = max(self._end, self._pos)
+        return size
+
+    def flush(self) -> None:
+        """Write the buffer, and leave the underlying file at the current position.
+
+        (So that the file may be written to directly, e.g. by
+        ``os.sendfile``, after which the position must be set using
+        ``seek``.)
+        """
+        self._write_buffer()
+        if self._seekable and self._pos != self._buffer_start:
+            self._fp.seek(self._pos)
+            self._buffer_start = self._pos
+        self._fp.flush()
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer_start += len(self._buffer)
+            self._buffer.clear()
+
+    def _write(self, data: bytes | bytearray | memoryview) -> None:
+        start = time.perf_counter()
+        with memoryview(data) as view:
+            while view:
+                # NB: unbuffered files may write only part of the data
+                written = self._fp.write(view)
+                self.writes += 1
+                view = view[written:]
+        self.write_time += time.perf_counter() - start
+        self.bytes_written += len(data)
@@ -0,0 +1,367 @@
+"""Support for reading and writing the raw compressed data of zip entries.
+
+The standard library's ``zipfile`` module insists on doing its own
+compression.  The code here allows the compression of an entry's data
+to happen elsewhere (e.g. in a worker thread) with the compressed
+result being spliced into the archive later.  It also allows copying
+the compressed data of an entry from one archive to another without
+decompressing and recompressing it.
+
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from collections.abc import Iterable
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Callable
+from typing import IO
+from typing import NamedTuple
+from zipfile import _get_compressor  # type: ignore[attr-defined]
+from zipfile import BadZipFile
+from zipfile import sizeFileHeader  # type: ignore[attr-defined]
+from zipfile import structFileHeader  # type: ignore[attr-defined]
+from zipfile import ZIP64_LIMIT
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
+from zipfile import ZipFile
+from zipfile import ZipInfo
+
+from .manifest import FileDigest
+
+__all__ = [
+    "CompressedData",
+    "can_sendfile",
+    "compress_bytes",
+    "compress_file",
+    "crc32_combine",
+    "read_raw",
+    "sendfile_stored",
+    "write_raw",
+    "write_raw_blocks",
+]
+
+# Bit 1 of the general purpose flags (set by zipfile for LZMA entries)
+_MASK_COMPRESS_OPTION_1 = 0x02
+_MASK_ENCRYPTED = 0x01
+# Bit 3 of the general purpose flags: the CRC and sizes follow the data
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+
+_DD_SIGNATURE = 0x08074B50
+
+_FILE_HEADER_SIGNATURE = b"PK\003\004"
+
+_READ_SIZE = 1024 * 1024
+
+# As in shutil, sendfile is only used on Linux, where it supports
+# copying to regular files
+_USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+
+
+class CompressedData(NamedTuple):
+    """The compressed data for a zip archive entry."""
+
+    compress_type: int
+    CRC: int
+    file_size: int
+    compress_size: int
+    data: bytes | bytearray
+
+
+def compress_bytes(
+    data: bytes, compress_type: int, compresslevel: int | None = None
+) -> CompressedData:
+    """Compress data for inclusion in a zip archive."""
+    compressor = _get_compressor(compress_type, compresslevel)
+    if compressor is not None:
+        compressed = compressor.compress(data) + compressor.flush()
+    else:
+        compressed = data
+    return CompressedData(
+        compress_type, zlib.crc32(data), len(data), len(compressed), compressed
+    )
+
+
+def compress_file(
+    path: str,
+    compress_type: int,
+    compresslevel: int | None = None,
+    *,
+    digest: FileDigest | None = None,
+) -> CompressedData:
+    """Read and compress a file for inclusion in a zip archive.
+
+    If a ``digest`` is given, it is updated with the file's data.
+    """
+    compressor = _get_compressor(compress_type, compresslevel)
+    crc = file_size = 0
+    # NB: the compressed data is accumulated in place, rather than
+    # joined, to avoid holding it in memory twice
+    data = bytearray()
+    if digest is not None:
+        digest.begin()
+    with open(path, "rb") as fp:
+        while chunk := fp.read(_READ_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            if digest is not None:
+                digest.update(chunk)
+            file_size += len(chunk)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            data += chunk
+    if compressor is not None:
+        data += compressor.flush()
+    return CompressedData(compress_type, crc, file_size, len(data), data)
+
+
+def read_raw(zipfd: ZipFile, zinfo: ZipInfo) -> CompressedData:
+    """Read the raw compressed data for an entry of a zip archive.
+
+    ``Zipfd`` must have been opened for reading.  Raises ``ValueError``
+    if the entry is encrypted.
+    """
+    if zinfo.flag_bits & _MASK_ENCRYPTED:
+        archive = zipfd.filename or "archive"
+        raise ValueError(
+            f"Entry {zinfo.filename!r} of {archive} is encrypted, "
+            "which is not supported"
+        )
+
+    # Logic mostly copied from zipfile.ZipFile.open
+    with zipfd._lock:  # type: ignore[attr-defined]
+        fp = zipfd.fp
+        assert fp is not None
+        fp.seek(zinfo.header_offset)
+        fheader = struct.unpack(structFileHeader, fp.read(sizeFileHeader))
+        if fheader[0] != _FILE_HEADER_SIGNATURE:
+            raise BadZipFile("Bad magic number for file header")
+        filename_length, extra_length = fheader[-2:]
+        fp.seek(filename_length + extra_length, 1)
+        data = fp.read(zinfo.compress_size)
+
+    if len(data) != zinfo.compress_size:
+        raise BadZipFile(f"Truncated data for entry {zinfo.filename!r}")
+    return CompressedData(
+        zinfo.compress_type, zinfo.CRC, zinfo.file_size, zinfo.compress_size, data
+    )
+
+
+def write_raw(zipfd: ZipFile, zinfo: ZipInfo, compressed: CompressedData) -> None:
+    """Write a pre-compressed entry to a zip archive.
+
+    ``Zinfo.compress_type`` is set to the compression method used to
+    produce ``compressed``.
+
+    The result is byte-for-byte identical to what
+    ``zipfd.open(zinfo, "w")`` would have produced had it been used to
+    write the uncompressed data.
+    """
+    _write_entry(zipfd, zinfo, compressed.compress_type, (), compressed)
+
+
+def can_sendfile(zipfd: ZipFile) -> bool:
+    """Whether entries may be copied into an archive using ``os.sendfile``."""
+    if not _USE_SENDFILE or not zipfd._seekable:  # type: ignore[attr-defined]
+        return False
+    try:
+        zipfd.fp.fileno()  # type: ignore[union-attr]
+    except (AttributeError, OSError):
+        return False
+    return True
+
+
+def sendfile_stored(
+    zipfd: ZipFile, zinfo: ZipInfo, path: str, *, digest: FileDigest | None = None
+) -> None:
+    """Write a file to a zip archive, without compression, using ``os.sendfile``.
+
+    The file's data is copied by the kernel, without passing through
+    user space.  Its CRC (and ``digest``, if given) is computed (without
+    copying) from a memory map of the file.  ``can_sendfile(zipfd)``
+    must be true.
+    """
+    if digest is not None:
+        digest.begin()
+    with open(path, "rb") as src:
+        file_size = os.fstat(src.fileno()).st_size
+        crc = 0
+        if file_size:
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                crc = zlib.crc32(mm)
+                if digest is not None:
+                    digest.update(mm)
+
+        def copy_data(fp: IO[bytes]) -> None:
+            fp.flush()
+            start = fp.tell()
+            offset = 0
+            while offset < file_size:
+                sent = os.sendfile(
+                    fp.fileno(), src.fileno(), offset, file_size - offset
+                )
+                if sent == 0:
+                    raise OSError(f"{path} was truncated while being copied")
+                offset += sent
+            fp.seek(start + file_size)
+
+        total = CompressedData(ZIP_STORED, crc, file_size, file_size, b"")
+        _write_entry(zipfd, zinfo, ZIP_STORED, (), total, copy_data)
+
+
+def write_raw_blocks(
+    zipfd: ZipFile, zinfo: ZipInfo, compress_type: int, blocks: Iterable[CompressedData]
+) -> None:
+    """Write a pre-compressed entry to a zip archive, a block at a time.
+
+    The compressed data of the blocks, when concatenated, must form a
+    single valid compressed stream.  The CRC of the entry is computed by
+    combining the CRCs of the blocks.
+
+    If the archive is seekable, the entry's header is rewritten with the
+    correct CRC and sizes once all the blocks have been written.
+    Otherwise, these are written in a data descriptor following the
+    entry's data.
+    """
+    _write_entry(zipfd, zinfo, compress_type, blocks, None)
+
+
+def _write_entry(
+    zipfd: ZipFile,
+    zinfo: ZipInfo,
+    compress_type: int,
+    blocks: Iterable[CompressedData],
+    total: CompressedData | None,
+    copy_data: Callable[[IO[bytes]], None] | None = None,
+) -> None:
+    # Logic mostly copied from zipfile.ZipFile._open_to_write and
+    # zipfile._ZipWriteFile.close
+    # https://github.com/python/cpython/blob/f00512db20561370faad437853f6ecee0eec4856/Lib/zipfile/__init__.py#L1703-L1741
+    if zipfd._writing:  # type: ignore[attr-defined]
+        raise ValueError(  # no cov
+            "Can't write to ZIP archive while an open writing handle exists."
+        )
+
+    # When streaming to an unseekable archive, the header can not be
+    # rewritten once the CRC and sizes of the data are known.  (As with
+    # zipfile, a data descriptor is used even if they are already known.)
+    seekable = zipfd._seekable  # type: ignore[attr-defined]
+    use_data_descriptor = not seekable
+
+    zinfo.compress_type = compress_type
+    zinfo.flag_bits = 0x00
+    if use_data_descriptor:
+        zinfo.flag_bits |= _MASK_USE_DATA_DESCRIPTOR
+    if zinfo.compress_type == ZIP_LZMA:
+        # Compressed data includes an end-of-stream (EOS) marker
+        zinfo.flag_bits |= _MASK_COMPRESS_OPTION_1
+    if not zinfo.external_attr:
+        zinfo.external_attr = 0o600 << 16  # permissions: ?rw-------
+
+    # NB: zipfile decides whether to use zip64 extensions based on the
+    # size of the file *before* it is written.
+    zip64 = zinfo.file_size * 1.05 > ZIP64_LIMIT
+    if total is not None:
+        zinfo.CRC = total.CRC
+        zinfo.file_size = total.file_size
+        zinfo.compress_size = total.compress_size
+    else:
+        # Size and CRC are overwritten with correct data after writing the data
+        zinfo.CRC = 0
+        zinfo.compress_size = 0
+        file_size = 0
+
+    with zipfd._lock:  # type: ignore[attr-defined]
+        fp = zipfd.fp
+        assert fp is not None
+        if seekable:
+            fp.seek(zipfd.start_dir)
+        zinfo.header_offset = fp.tell()
+        zipfd._writecheck(zinfo)  # type: ignore[attr-defined]
+        zipfd._didModify = True  # type: ignore[attr-defined]
+
+        fp.write(zinfo.FileHeader(zip64))
+        if copy_data is not None:
+            copy_data(fp)
+        elif total is not None:
+            fp.write(total.data)
+        else:
+            for block in blocks:
+                fp.write(block.data)
+                zinfo.CRC = crc32_combine(zinfo.CRC, block.CRC, block.file_size)
+                zinfo.compress_size += block.compress_size
+                file_size += block.file_size
+            zinfo.file_size = file_size
+        if use_data_descriptor:
+            fmt = "<LLQQ" if zip64 else "<LLLL"
+            fp.write(
+                struct.pack(
+                    fmt,
+                    _DD_SIGNATURE,
+                    zinfo.CRC,
+                    zinfo.compress_size,
+                    zinfo.file_size,
+                )
+            )
+        zipfd.start_dir = fp.tell()
+
+        if total is None and not use_data_descriptor:
+            fp.seek(zinfo.header_offset)
+            fp.write(zinfo.FileHeader(zip64))
+            fp.seek(zipfd.start_dir)
+        if not zip64 and max(zinfo.file_size, zinfo.compress_size) > ZIP64_LIMIT:
+            raise RuntimeError("File size too large")  # no cov
+
+        zipfd.filelist.append(zinfo)
+        zipfd.NameToInfo[zinfo.filename] = zinfo
+
+
+def _gf2_matrix_times(matrix: Sequence[int], vector: int) -> int:
+    result = 0
+    for row in matrix:
+        if not vector:
+            break
+        if vector & 1:
+            result ^= row
+        vector >>= 1
+    return result
+
+
+def _gf2_matrix_square(matrix: Sequence[int]) -> tuple[int, ...]:
+    return tuple(_gf2_matrix_times(matrix, row) for row in matrix)
+
+
+@lru_cache(maxsize=16)
+def _crc32_shift_operator(length: int) -> tuple[int, ...]:
+    """Compute the operator which appends ``length`` zero bytes to a CRC-32."""
+    # Logic copied from crc32_combine in zlib 1.2.8
+    # https://github.com/madler/zlib/blob/v1.2.8/crc32.c#L372-L428
+    odd = (0xEDB88320, *(1 << n for n in range(31)))  # operator for one zero bit
+    even = _gf2_matrix_square(odd)  # operator for two zero bits
+    odd = _gf2_matrix_square(even)  # operator for four zero bits
+
+    # Start with the identity operator
+    operator: tuple[int, ...] = tuple(1 << n for n in range(32))
+    while length:
+        # Each iteration squares the operator for the next bit of length
+        even = _gf2_matrix_square(odd)
+        if length & 1:
+            operator = tuple(_gf2_matrix_times(even, row) for row in operator)
+        length >>= 1
+        odd, even = even, odd
+    return operator
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """Combine the CRC-32s of two consecutive pieces of data.
+
+    Returns the CRC-32 of the concatenation of two pieces of data, given
+    the CRC-32 of each and the length of the second.
+    """
+    if length2 == 0:
+        return crc1
+    return _gf2_matrix_times(_crc32_shift_operator(length2), crc1) ^ crc2
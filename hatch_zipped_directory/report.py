@@ -0,0 +1,165 @@
+"""Timing and size statistics for archive builds."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+from typing import NamedTuple
+from typing import TypeVar
+
+from .compression import COMPRESSION_METHODS
+from .output import OutputStats
+
+__all__ = ["BuildReport", "EntryReport"]
+
+_T = TypeVar("_T")
+
+_METHOD_NAMES = {
+    compress_type: method for method, compress_type in COMPRESSION_METHODS.items()
+}
+
+
+class EntryReport(NamedTuple):
+    """Statistics for a single archive entry."""
+
+    name: str
+    size: int
+    compressed_size: int
+    compress_type: int
+    # Wall time spent reading and compressing the entry's data
+    compression_time: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": self.size,
+            "compressed_size": self.compressed_size,
+            "method": _METHOD_NAMES.get(self.compress_type, str(self.compress_type)),
+            "compression_time": self.compression_time,
+        }
+
+
+class BuildReport:
+    """Collect timings of the phases of a build, and statistics for each entry.
+
+    Phase timings are wall times measured in the main thread.  Phases
+    may be nested, in which case time spent in the inner phase is not
+    counted towards the outer one, so that the phase timings add up to
+    the total time.
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.entries: list[EntryReport] = []
+        # Statistics of the writes to the archive, if buffered
+        self.output: OutputStats | None = None
+        self._start = time.perf_counter()
+        self._start_io = _io_counters()
+        self._phase_stack: list[str] = []
+        self._phase_start = self._start
+
+    def _switch_phase(self) -> None:
+        now = time.perf_counter()
+        if self._phase_stack:
+            name = self._phase_stack[-1]
+            self.phases[name] = self.phases.get(name, 0.0) + now - self._phase_start
+        self._phase_start = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the build."""
+        self._switch_phase()
+        self._phase_stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch_phase()
+            self._phase_stack.pop()
+
+    def iter_phase(self, name: str, iterable: Iterable[_T]) -> Iterator[_T]:
+        """Iterate, attributing the time spent producing items to a phase."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def record_entry(
+        self,
+        name: str,
+        size: int,
+        compressed_size: int,
+        compress_type: int,
+        compression_time: float,
+    ) -> None:
+        self.entries.append(
+            EntryReport(name, size, compressed_size, compress_type, compression_time)
+        )
+
+    def to_dict(self, **sections: Any) -> dict[str, Any]:
+        """Summarize the report in a form suitable for serializing to JSON.
+
+        Any ``sections`` are included in the summary, before the entries.
+
+        Where the platform provides them (i.e. on Linux), the numbers of
+        read and write system calls made, and bytes read and written, by
+        the process since the report was created are included as ``io``.
+        If the archive was written through a write-coalescing buffer, the
+        number of writes made, and their throughput, are included as
+        ``output``.
+        """
+        wall_time = time.perf_counter() - self._start
+        end_io = _io_counters()
+        io = None
+        if self._start_io is not None and end_io is not None:
+            io = {key: end_io[key] - self._start_io[key] for key in end_io}
+        size = sum(entry.size for entry in self.entries)
+        compression_time = sum(entry.compression_time for entry in self.entries)
+        return {
+            "wall_time": wall_time,
+            "phases": dict(self.phases),
+            "totals": {
+                "entries": len(self.entries),
+                "size": size,
+                "compressed_size": sum(entry.compressed_size for entry in self.entries),
+                "compression_time": compression_time,
+                "throughput_mb_s": _mb_per_s(size, wall_time),
+                "compression_throughput_mb_s": _mb_per_s(size, compression_time),
+            },
+            "io": io,
+            "output": None if self.output is None else self.output.to_dict(),
+            **sections,
+            "entries": [entry.to_dict() for entry in self.entries],
+        }
+
+
+# Fields of /proc/self/io, and the names by which they are reported
+_IO_COUNTERS = {
+    "syscr": "read_syscalls",
+    "syscw": "write_syscalls",
+    "rchar": "read_bytes",
+    "wchar": "write_bytes",
+}
+
+
+def _io_counters() -> dict[str, int] | None:
+    """Get the I/O counters for this process, if available."""
+    try:
+        with open("/proc/self/io") as fp:
+            fields = dict(line.split(":", 1) for line in fp if ":" in line)
+    except OSError:
+        return None
+    try:
+        return {name: int(fields[field]) for field, name in _IO_COUNTERS.items()}
+    except (KeyError, ValueError):  # no cov
+        return None
+
+
+def _mb_per_s(size: int, seconds: float) -> float | None:
+    return size / seconds / 1e6 if seconds > 0 else None
@@ -0,0 +1,122 @@
+"""Splitting an archive into size-capped shards.
+
+Each shard is a self-contained zip archive.  Files are assigned to
+shards, in order, before most are compressed, so the size of each entry
+is bounded by that of its data stored without compression (plus the
+worst-case expansion of any compression method, and its headers).
+Shards whose files compress well may therefore be well under the
+maximum size.  (Where the size of an entry's compressed data is known,
+e.g. for the entries of merged archives, it is bounded by that
+instead.)
+
+"""
+
+from __future__ import annotations
+
+import posixpath
+from collections.abc import Iterable
+from collections.abc import Sequence
+from typing import Generic
+from typing import TypeVar
+
+__all__ = ["Shard", "entry_size_bound", "plan_shards"]
+
+_T = TypeVar("_T")
+
+# An allowance for the local and central directory headers of an entry
+# (excluding its name), including any zip64 extra fields
+_ENTRY_OVERHEAD = 128
+
+# An allowance for the end of central directory records
+_ARCHIVE_OVERHEAD = 128
+
+
+def entry_size_bound(size: int, name: str) -> int:
+    """An upper bound on the space taken by an entry in an archive.
+
+    ``Size`` is the size of the entry's uncompressed data.  None of the
+    supported compression methods expands (incompressible) data by more
+    than about 1.5% (plus a small constant).  If ``size`` is instead
+    the size of the entry's compressed data, the same allowance covers
+    differences in compressed data when it is compressed in blocks.
+    """
+    return size + size // 32 + 1024 + _ENTRY_OVERHEAD + 2 * len(name.encode())
+
+
+def _directory_size_bound(name: str) -> int:
+    return _ENTRY_OVERHEAD + 2 * len(name.encode())
+
+
+class Shard(Generic[_T]):
+    """The items assigned to a shard, and (a bound on) their size."""
+
+    def __init__(self) -> None:
+        self.items: list[_T] = []
+        # The names of the (non-directory) entries in the shard
+        self.names: list[str] = []
+        self.size = 0
+        self._dirs: set[str] = set()
+
+    def cost(self, names: Sequence[str], size: int, directory_entries: bool) -> int:
+        """The size of an item, plus that of any directory entries it needs."""
+        if not directory_entries:
+            return size
+        new_dirs = {
+            parent
+            for name in names
+            for parent in _parents(name)
+            if parent not in self._dirs
+        }
+        return size + sum(_directory_size_bound(d + "/") for d in new_dirs)
+
+    def add(self, item: _T, names: Sequence[str], cost: int) -> None:
+        self.items.append(item)
+        self.names.extend(names)
+        self.size += cost
+        self._dirs.update(parent for name in names for parent in _parents(name))
+
+
+def _parents(name: str) -> Iterable[str]:
+    parent = posixpath.dirname(name)
+    while parent:
+        yield parent
+        parent = posixpath.dirname(parent)
+
+
+def plan_shards(
+    items: Iterable[tuple[_T, Sequence[str], int]],
+    max_size: int,
+    reserved: int,
+    *,
+    directory_entries: bool = True,
+) -> list[Shard[_T]]:
+    """Assign items to shards, in order.
+
+    Each item is given with the names of the entries it adds to the
+    archive and a bound on their size (see ``entry_size_bound``).  A
+    new shard is started whenever the next item would take the current
+    shard over ``max_size``, allowing ``reserved`` bytes in each shard
+    for other entries.  Raises ``ValueError`` if an item does not fit
+    in a shard on its own.
+    """
+    reserved += _ARCHIVE_OVERHEAD
+    shards: list[Shard[_T]] = []
+    for item, names, size in items:
+        shard = shards[-1] if shards else None
+        if shard is not None:
+            cost = shard.cost(names, size, directory_entries)
+            if reserved + shard.size + cost > max_size:
+                shard = None
+        if shard is None:
+            shard = Shard()
+            cost = shard.cost(names, size, directory_entries)
+            if reserved + cost > max_size:
+                description = ", ".join(names) or repr(item)
+                raise ValueError(
+                    f"{description} (at most {cost} bytes, including any "
+                    f"directory entries, plus {reserved} bytes of metadata) "
+                    f"does not fit in a shard of {max_size} bytes"
+                )
+            shards.append(shard)
+        shard.add(item, names, cost)
+    return shards
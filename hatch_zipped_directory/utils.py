@@ -2,20 +2,164 @@ from __future__ import annotations
 
 import io
 import os
+import queue
+import secrets
 import tempfile
+import threading
+from collections.abc import Iterable
 from collections.abc import Iterator
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Any
+from typing import TypeVar
+
+_T = TypeVar("_T")
+
+DURABILITY_MODES = ("none", "rename", "full")
 
 
 @contextmanager
-def atomic_write(dst: str | os.PathLike[str]) -> Iterator[io.BufferedRandom]:
+def atomic_write(
+    dst: str | os.PathLike[str], *, durability: str = "rename", anonymous: bool = False
+) -> Iterator[io.BufferedRandom]:
+    """Write a file, replacing ``dst`` once it is complete.
+
+    ``Durability`` is one of:
+
+    ``"none"``
+        Write to ``dst`` directly.  If the write fails, ``dst`` is
+        removed, but a crash may leave a partially written file.
+
+    ``"rename"``
+        Write to a temporary file in the same directory, then rename it
+        to ``dst``.  Readers see either the old or the new file, but
+        after a crash the new file may be incomplete, since its data is
+        not flushed to disk before the rename.
+
+    ``"full"``
+        As ``"rename"``, but the file is flushed to disk before the
+        rename, and the directory is flushed after it.
+
+    If ``anonymous`` is true, the temporary file is created without a
+    name (using ``O_TMPFILE``, on Linux), and is only linked into the
+    directory once complete, so that a crash does not leave a stray
+    temporary file behind.  Where that is not supported, a named
+    temporary file is used.
+    """
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown durability mode {durability!r}")
     dst_path = Path(dst)
-    fd, tmp_path = tempfile.mkstemp(dir=dst_path.parent, suffix=dst_path.suffix)
+    if durability == "none":
+        # The file is replaced, rather than truncated, so that anything
+        # reading the old file (e.g. via an open file or a memory map)
+        # is not affected.
+        dst_path.unlink(missing_ok=True)
+        try:
+            with open(dst_path, mode="w+b") as fp:
+                yield fp
+        except BaseException:
+            dst_path.unlink(missing_ok=True)
+            raise
+        return
+
+    tmp_path = None
+    fd = _open_anonymous(dst_path.parent) if anonymous else None
+    if fd is None:
+        fd, tmp_path = tempfile.mkstemp(dir=dst_path.parent, suffix=dst_path.suffix)
     try:
         with open(fd, mode="w+b") as fp:
             yield fp
+            if durability == "full":
+                fp.flush()
+                os.fsync(fp.fileno())
+            if tmp_path is None:
+                tmp_path = _link_anonymous(fp.fileno(), dst_path)
         os.replace(tmp_path, dst_path)
     except BaseException:
-        os.unlink(tmp_path)
+        if tmp_path is not None:
+            os.unlink(tmp_path)
         raise
+    if durability == "full":
+        _fsync_dir(dst_path.parent)
+
+
+def _open_anonymous(directory: Path) -> int | None:
+    """Create an unnamed temporary file in a directory, if supported."""
+    o_tmpfile = getattr(os, "O_TMPFILE", None)
+    if o_tmpfile is None:
+        return None  # no cov
+    try:
+        return os.open(directory, o_tmpfile | os.O_RDWR, 0o600)
+    except OSError:
+        # E.g. EOPNOTSUPP, if the filesystem does not support O_TMPFILE
+        return None
+
+
+def _link_anonymous(fd: int, dst_path: Path) -> str:
+    """Give an unnamed temporary file a temporary name next to ``dst_path``."""
+    # NB: os.link only follows the /proc symlink (using linkat with
+    # AT_SYMLINK_FOLLOW) when given a directory fd
+    dir_fd = os.open(dst_path.parent, os.O_RDONLY)
+    try:
+        while True:
+            tmp_name = f"tmp{secrets.token_hex(4)}{dst_path.suffix}"
+            try:
+                os.link(f"/proc/self/fd/{fd}", tmp_name, dst_dir_fd=dir_fd)
+            except FileExistsError:  # no cov
+                continue
+            return os.path.join(dst_path.parent, tmp_name)
+    finally:
+        os.close(dir_fd)
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name == "nt":
+        return  # no cov: directories can not be opened on Windows
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def prefetch(iterable: Iterable[_T], maxsize: int) -> Iterator[_T]:
+    """Iterate over iterable in a background thread.
+
+    Up to ``maxsize`` items are produced ahead of the consumer.  Any
+    exception raised while iterating is re-raised in the consumer.
+    """
+    items: queue.Queue[tuple[bool, Any]] = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item: tuple[bool, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except BaseException as exc:
+            put((False, exc))
+        else:
+            put((False, None))
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, value = items.get()
+            if not ok:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+        thread.join()
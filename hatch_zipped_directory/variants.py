@@ -0,0 +1,148 @@
+"""Sharing the work of building several variants of an archive.
+
+A project may be published as several variants of the same archive,
+differing, e.g., in their install name or compression.  When the
+variants are built in the same pass over the included files,
+``SharedCompression`` ensures that each file is read only once, and
+compressed only once with each distinct compression method and level,
+however many archives it is added to.  (Except for large files, which
+are not held in memory, but streamed for each archive.)
+
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import NamedTuple
+
+from .cache import CompressionCache
+from .compression import Compression
+from .compression import CompressionRules
+from .manifest import FileDigest
+from .rawzip import compress_bytes
+from .rawzip import compress_file
+from .rawzip import CompressedData
+
+__all__ = ["SharedCompression", "Variant"]
+
+# Files larger than this are not shared
+_MAX_SHARED_SIZE = 4 * 1024 * 1024
+
+
+class Variant(NamedTuple):
+    """An additional archive, built from the same files as the main archive."""
+
+    name: str
+    # If None, the install name of the main archive is used
+    install_name: str | None
+    compression: CompressionRules
+    # Whether to include METADATA.json
+    metadata: bool
+    # The name of the manifest entry, if any
+    manifest: str | None
+
+
+class _SharedFile:
+    """The data of a file, and its compressed forms, while they are needed."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.data: bytes | None = None
+        self.compressed: dict[Compression, CompressedData] = {}
+        # The number of archives which have asked for the file
+        self.uses = 0
+
+
+class SharedCompression:
+    """Compress files once for a number of archives.
+
+    This has the same ``compress_file`` interface as
+    ``CompressionCache``, and is passed to each of the ``consumers``
+    archives as their cache.  The first request for a file reads it;
+    its data, and each compression of it, are kept in memory until
+    every archive has asked for it.  (So the archives should be built in
+    lockstep.)  Files larger than ``max_size`` are instead compressed,
+    streaming their data, for each request, so that neither they nor
+    their compressed forms are held in memory any longer than a single
+    archive needs.  If a ``cache`` is given, compressed data is looked
+    up in (and stored in) it.
+    """
+
+    def __init__(
+        self,
+        consumers: int,
+        cache: CompressionCache | None = None,
+        *,
+        max_size: int = _MAX_SHARED_SIZE,
+    ):
+        self.consumers = consumers
+        self.cache = cache
+        self.max_size = max_size
+        # The number of times files were read, and compressed
+        self.reads = 0
+        self.compressions = 0
+        self._lock = threading.Lock()
+        self._files: dict[str, _SharedFile] = {}
+
+    def compress_file(
+        self,
+        path: str,
+        compression: Compression,
+        file_size: int,
+        *,
+        digest: FileDigest | None = None,
+    ) -> CompressedData:
+        """Compress a file, using the data of an earlier request if available.
+
+        If a ``digest`` is given, it is updated with the file's data.
+        This may be called concurrently from multiple threads.
+        """
+        if file_size > self.max_size:
+            return self._compress_unshared(path, compression, file_size, digest)
+
+        with self._lock:
+            shared = self._files.get(path)
+            if shared is None:
+                shared = self._files[path] = _SharedFile()
+            shared.uses += 1
+            if shared.uses >= self.consumers:
+                # This is the last request, so the data need not be kept
+                del self._files[path]
+
+        with shared.lock:
+            data = shared.data
+            if data is None:
+                with open(path, "rb") as fp:
+                    data = shared.data = fp.read()
+                with self._lock:
+                    self.reads += 1
+            compressed = shared.compressed.get(compression)
+            if compressed is None:
+                compressed = shared.compressed[compression] = self._compress(
+                    data, compression
+                )
+                with self._lock:
+                    self.compressions += 1
+        if digest is not None:
+            digest.begin()
+            digest.update(data)
+        return compressed
+
+    def _compress_unshared(
+        self,
+        path: str,
+        compression: Compression,
+        file_size: int,
+        digest: FileDigest | None,
+    ) -> CompressedData:
+        with self._lock:
+            self.reads += 1
+            self.compressions += 1
+        if self.cache is not None:
+            return self.cache.compress_file(path, compression, file_size, digest=digest)
+        return compress_file(path, *compression, digest=digest)
+
+    def _compress(self, data: bytes, compression: Compression) -> CompressedData:
+        if self.cache is not None:
+            return self.cache.compress_data(data, compression)
+        return compress_bytes(data, *compression)
@@ -1,11 +1,30 @@
+import base64
+import csv
+import hashlib
+import io
 import json
 import os
+import posixpath
+import random
 import re
+import shutil
 import stat
+import subprocess
+import sys
 import time
+import zipfile
+import zipimport
+import zlib
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
 from zipfile import ZipFile
+from zipfile import ZipInfo
 
 import pytest
 from hatchling.builders.plugin.interface import IncludedFile
@@ -13,6 +32,17 @@ from hatchling.metadata.core import ProjectMetadata
 
 from hatch_zipped_directory.builder import ZipArchive
 from hatch_zipped_directory.builder import ZippedDirectoryBuilder
+from hatch_zipped_directory.cache import CompressionCache
+from hatch_zipped_directory.compression import Compression
+from hatch_zipped_directory.compression import CompressionRules
+from hatch_zipped_directory.compression import ZIP_ZSTANDARD
+from hatch_zipped_directory.compression import zstd_supported
+from hatch_zipped_directory.incremental import BuildIndex
+from hatch_zipped_directory.manifest import Manifest
+from hatch_zipped_directory.rawzip import compress_file
+from hatch_zipped_directory.rawzip import CompressedData
+from hatch_zipped_directory.rawzip import read_raw
+from hatch_zipped_directory.report import BuildReport
 
 
 def zip_contents(path):
@@ -210,6 +240,1119 @@ def test_ZipArchive_nonreproducible_directory_timestamps(tmp_path: Path) -> None
     )
 
 
+def test_ZipArchive_ensure_dir_scaling(tmp_path: Path) -> None:
+    # Each file lives in its own directory, so the number of directory
+    # entries grows with the number of files.  With a linear scan of the
+    # archive's file list per directory lookup, total build time would
+    # grow quadratically.
+    src_path = tmp_path / "src"
+    src_path.touch()
+
+    def build_time(nfiles: int) -> float:
+        archive_path = tmp_path / f"test-{nfiles}.zip"
+        included_files = [
+            IncludedFile(os.fspath(src_path), f"d{n}/f", f"d{n}/f")
+            for n in range(nfiles)
+        ]
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            with ZipArchive.open(archive_path, "root") as archive:
+                for included_file in included_files:
+                    archive.add_file(included_file)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    # Linear growth gives a ratio of about 4; quadratic growth would be about 16
+    assert build_time(4000) / build_time(1000) < 8
+
+
+def test_ZipArchive_compresses_entries(tmp_path: Path) -> None:
+    archive_path = tmp_path / "test.zip"
+    src_path = tmp_path / "bar"
+    src_path.write_text("content" * 100)
+
+    with ZipArchive.open(archive_path, root_path="") as archive:
+        archive.write_file("foo", "contents\n" * 100)
+        archive.add_file(IncludedFile(os.fspath(src_path), "bar", "bar"))
+
+    with ZipFile(archive_path) as zf:
+        infolist = zf.infolist()
+    assert len(infolist) == 2
+    assert all(info.compress_type == ZIP_DEFLATED for info in infolist)
+    assert all(info.compress_size < info.file_size for info in infolist)
+
+
+def _build_test_tree(root: Path) -> list[IncludedFile]:
+    rng = random.Random(42)
+    included_files = []
+    for n in range(50):
+        relpath = f"d{n % 7}/sub{n % 3}/f{n}"
+        path = root / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = rng.choice([0, 10, 1000, 100_000, 3_000_000])
+        path.write_bytes(rng.choice([b"text", rng.randbytes(4)]) * (size // 4))
+        included_files.append(IncludedFile(os.fspath(path), relpath, relpath))
+    return included_files
+
+
+@pytest.mark.parametrize("workers", [2, 8])
+def test_ZipArchive_parallel_is_identical(
+    tmp_path: Path, reproducible: bool, workers: int
+) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED),
+        [
+            ("/d1/", Compression(ZIP_STORED)),
+            ("/d2/", Compression(ZIP_BZIP2, 1)),
+            ("/d3/", Compression(ZIP_LZMA)),
+            ("/d4/", Compression(ZIP_DEFLATED, 9)),
+        ],
+    )
+
+    def build(archive_path: Path, workers: int) -> bytes:
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            reproducible=reproducible,
+            workers=workers,
+            compression=compression,
+        ) as archive:
+            archive.write_file("first", "data" * 100)
+            for included_file in included_files:
+                archive.add_file(included_file)
+            archive.write_file("last", "data" * 100)
+        return archive_path.read_bytes()
+
+    serial = build(tmp_path / "serial.zip", workers=1)
+    parallel = build(tmp_path / "parallel.zip", workers=workers)
+    assert parallel == serial
+    with ZipFile(tmp_path / "parallel.zip") as zf:
+        assert zf.testzip() is None
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("read_ahead", [1, 1_000_000])
+def test_ZipArchive_read_ahead_is_identical(
+    tmp_path: Path, workers: int, read_ahead: int
+) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+
+    def build(archive_path: Path, read_ahead: int | None) -> bytes:
+        report = BuildReport()
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            workers=workers,
+            read_ahead=read_ahead,
+            chunked_threshold=2_000_000,
+            report=report,
+        ) as archive:
+            archive.write_file("first", "data" * 100)
+            archive.add_files(included_files)
+            archive.write_file("last", "data" * 100)
+        assert "discovery" in report.phases
+        return archive_path.read_bytes()
+
+    serial = build(tmp_path / "serial.zip", None)
+    pipelined = build(tmp_path / "pipelined.zip", read_ahead)
+    assert pipelined == serial
+
+
+def test_ZipArchive_read_ahead_budget(tmp_path: Path) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+    max_pending_bytes = 0
+
+    with ZipArchive.open(
+        tmp_path / "test.zip", "root", workers=4, read_ahead=200_000
+    ) as archive:
+        for included_file in included_files:
+            archive.add_file(included_file)
+            max_pending_bytes = max(max_pending_bytes, archive._pending_bytes)
+
+    assert 0 < max_pending_bytes <= 200_000
+
+
+def test_ZipArchive_read_ahead_streams_large_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    sizes = {"small": 1000, "large": 500_000, "last": 1000}
+    for name, size in sizes.items():
+        src_path.joinpath(name).write_bytes(b"x" * size)
+    compressed_in_memory = []
+
+    def spy_compress_file(path: str, *args: Any, **kwargs: Any) -> CompressedData:
+        compressed_in_memory.append(os.path.basename(path))
+        return compress_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(
+        "hatch_zipped_directory.builder.compress_file", spy_compress_file
+    )
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(
+        archive_path, "root", workers=2, read_ahead=100_000
+    ) as archive:
+        for name in sizes:
+            archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+
+    # The large file does not fit in the budget, so it is streamed
+    assert sorted(compressed_in_memory) == ["last", "small"]
+    contents = zip_contents(archive_path)
+    assert {name: len(contents[f"root/{name}"]) for name in sizes} == sizes
+
+
+def test_ZipArchive_parallel_streams_large_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    sizes = {"small": 1000, "large": 500_000, "last": 1000}
+    for name, size in sizes.items():
+        src_path.joinpath(name).write_bytes(b"x" * size)
+    compressed_in_memory = []
+
+    def spy_compress_file(path: str, *args: Any, **kwargs: Any) -> CompressedData:
+        compressed_in_memory.append(os.path.basename(path))
+        return compress_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(
+        "hatch_zipped_directory.builder.compress_file", spy_compress_file
+    )
+    monkeypatch.setattr("hatch_zipped_directory.builder._MAX_IN_MEMORY_SIZE", 100_000)
+
+    def build(archive_path: Path, workers: int) -> bytes:
+        with ZipArchive.open(archive_path, "root", workers=workers) as archive:
+            for name in sizes:
+                archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+        return archive_path.read_bytes()
+
+    assert build(tmp_path / "parallel.zip", 2) == build(tmp_path / "serial.zip", 1)
+    # The large file is streamed, rather than compressed into memory
+    assert sorted(compressed_in_memory) == ["last", "small"]
+    contents = zip_contents(tmp_path / "parallel.zip")
+    assert {name: len(contents[f"root/{name}"]) for name in sizes} == sizes
+
+
+@pytest.mark.parametrize("compress_type", [ZIP_STORED, ZIP_DEFLATED])
+@pytest.mark.parametrize("size", [0, 100, 1024 * 1024, 3 * 1024 * 1024 + 1])
+def test_ZipArchive_copy_strategies(
+    tmp_path: Path, compress_type: int, size: int
+) -> None:
+    src_path = tmp_path / "src"
+    data = (b"text" * size)[:size]
+    src_path.write_bytes(data)
+    compression = CompressionRules(Compression(compress_type))
+
+    def build(archive_path: Path, workers: int) -> bytes:
+        with ZipArchive.open(
+            archive_path, "", workers=workers, compression=compression
+        ) as archive:
+            archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+        return archive_path.read_bytes()
+
+    # The parallel build compresses using compress_file, independently
+    assert build(tmp_path / "serial.zip", 1) == build(tmp_path / "parallel.zip", 2)
+    with ZipFile(tmp_path / "serial.zip") as zf:
+        assert zf.read("src") == data
+
+
+class _Unseekable(io.RawIOBase):
+    """A writable stream which, like a pipe, does not support seek or tell."""
+
+    def __init__(self) -> None:
+        self.buffer = io.BytesIO()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        return self.buffer.write(data)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_streaming(tmp_path: Path, workers: int) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+
+    def build(dst: Path | _Unseekable) -> None:
+        with ZipArchive.open(
+            dst, "root", workers=workers, chunked_threshold=1_000_000
+        ) as archive:
+            for included_file in included_files:
+                archive.add_file(included_file)
+            archive.write_file("METADATA.json", "{}")
+
+    stream = _Unseekable()
+    build(stream)
+    assert not stream.closed
+    build(tmp_path / "test.zip")
+
+    assert set(tmp_path.iterdir()) == {tmp_path / "src", tmp_path / "test.zip"}
+    with (
+        ZipFile(io.BytesIO(stream.buffer.getvalue())) as streamed,
+        ZipFile(tmp_path / "test.zip") as expected,
+    ):
+        assert streamed.testzip() is None
+        assert streamed.namelist() == expected.namelist()
+        for name in expected.namelist():
+            assert streamed.read(name) == expected.read(name)
+
+
+def test_ZipArchive_streaming_parallel_is_identical(tmp_path: Path) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+
+    def build(workers: int) -> bytes:
+        stream = _Unseekable()
+        with ZipArchive.open(
+            stream,
+            "root",
+            workers=workers,
+            compression=CompressionRules(Compression(ZIP_DEFLATED)),
+            chunked_threshold=1_000_000,
+        ) as archive:
+            for included_file in included_files:
+                archive.add_file(included_file)
+            archive.write_file("METADATA.json", "{}")
+        return stream.buffer.getvalue()
+
+    assert build(2) == build(1)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("buffer_size", [1, 4096, 1024 * 1024])
+def test_ZipArchive_buffered_is_identical(
+    tmp_path: Path, workers: int, buffer_size: int
+) -> None:
+    included_files = _build_test_tree(tmp_path / "src")
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED), [("/d1/", Compression(ZIP_STORED))]
+    )
+
+    def build(dst: Path | _Unseekable, **kwargs) -> BuildReport:
+        report = BuildReport()
+        with ZipArchive.open(
+            dst,
+            "root",
+            workers=workers,
+            compression=compression,
+            chunked_threshold=2_000_000,
+            report=report,
+            **kwargs,
+        ) as archive:
+            for included_file in included_files:
+                archive.add_file(included_file)
+            archive.write_file("METADATA.json", "{}")
+        return report
+
+    build(tmp_path / "unbuffered.zip")
+    report = build(
+        tmp_path / "buffered.zip", buffer_size=buffer_size, preallocate=100_000_000
+    )
+    stream = _Unseekable()
+    build(stream, buffer_size=buffer_size, preallocate=100_000_000)
+
+    expected = (tmp_path / "unbuffered.zip").read_bytes()
+    assert (tmp_path / "buffered.zip").read_bytes() == expected
+    with ZipFile(io.BytesIO(stream.buffer.getvalue())) as zf:
+        assert zf.testzip() is None
+    assert report.output is not None
+    assert report.output.buffer_size == buffer_size
+    assert 0 < report.output.bytes_written <= len(expected)
+    if buffer_size > 1:
+        assert report.output.writes < len(included_files)
+
+
+def test_ZipArchive_parallel_cleanup_on_error(tmp_path: Path) -> None:
+    archive_path = tmp_path / "test.zip"
+    with pytest.raises(FileNotFoundError):
+        with ZipArchive.open(archive_path, "root", workers=2) as archive:
+            archive.add_file(
+                IncludedFile(os.fspath(tmp_path / "missing"), "missing", "missing")
+            )
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+def _raw_data(archive_path: Path, name: str) -> bytes:
+    with ZipFile(archive_path) as zf:
+        info = zf.getinfo(name)
+        return read_raw(zf, info).data
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_compression_rules(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_text("content" * 100)
+    compression = CompressionRules(
+        Compression(ZIP_BZIP2),
+        [("*.png", Compression(ZIP_STORED)), ("*.json", Compression(ZIP_LZMA))],
+    )
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(
+        archive_path, "root", workers=workers, compression=compression
+    ) as archive:
+        for name in "image.png", "sub/image.png", "data.txt":
+            archive.add_file(IncludedFile(os.fspath(src_path), name, name))
+        archive.write_file("METADATA.json", "{}")
+
+    with ZipFile(archive_path) as zf:
+        compress_types = {info.filename: info.compress_type for info in zf.infolist()}
+        assert zf.testzip() is None
+    assert compress_types == {
+        "root/": ZIP_STORED,
+        "root/image.png": ZIP_STORED,
+        "root/sub/": ZIP_STORED,
+        "root/sub/image.png": ZIP_STORED,
+        "root/data.txt": ZIP_BZIP2,
+        "root/METADATA.json": ZIP_LZMA,
+    }
+
+
+def test_ZipArchive_compression_level(tmp_path: Path) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_bytes(b"content" * 1000)
+    compression = CompressionRules(Compression(ZIP_DEFLATED, 1))
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "", compression=compression) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+
+    assert _raw_data(archive_path, "src") == zlib.compress(
+        b"content" * 1000, level=1, wbits=-15
+    )
+
+
+@pytest.mark.skipif(not zstd_supported(), reason="zstd requires python >= 3.14")
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_zstd(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_bytes(b"content" * 1000)
+    compression = CompressionRules(Compression(ZIP_ZSTANDARD, 3))
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(
+        archive_path, "", workers=workers, compression=compression
+    ) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+        archive.write_file("METADATA.json", "{}")
+
+    with ZipFile(archive_path) as zf:
+        assert zf.testzip() is None
+        assert {info.compress_type for info in zf.infolist()} == {ZIP_ZSTANDARD}
+        assert zf.read("src") == b"content" * 1000
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_stores_incompressible(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    src_path.joinpath("text").write_bytes(b"text" * 100_000)
+    src_path.joinpath("random").write_bytes(random.Random(42).randbytes(400_000))
+    src_path.joinpath("png").write_bytes(random.Random(42).randbytes(400_000))
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED), [("png", Compression(ZIP_BZIP2))]
+    )
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(
+        archive_path,
+        "",
+        workers=workers,
+        compression=compression,
+        incompressible_threshold=0.1,
+    ) as archive:
+        for name in "text", "random", "png":
+            archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+
+    with ZipFile(archive_path) as zf:
+        compress_types = {info.filename: info.compress_type for info in zf.infolist()}
+        assert zf.testzip() is None
+    assert compress_types == {
+        "text": ZIP_DEFLATED,
+        "random": ZIP_STORED,
+        "png": ZIP_STORED,
+    }
+    assert archive.stats.incompressible_entries == 2
+    assert archive.stats.incompressible_cpu_time_saved >= 0
+
+
+def test_ZipArchive_stores_incompressible_disabled(tmp_path: Path) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_bytes(random.Random(42).randbytes(1000))
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "") as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+
+    with ZipFile(archive_path) as zf:
+        assert zf.getinfo("src").compress_type == ZIP_DEFLATED
+    assert archive.stats.incompressible_entries == 0
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_ZipArchive_chunked_deflate(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    rng = random.Random(42)
+    large = b"".join(rng.choice([b"foo", b"bar", b"baz "]) for _ in range(1_500_000))
+    src_path.joinpath("large").write_bytes(large)
+    src_path.joinpath("small").write_bytes(b"small" * 100)
+    src_path.joinpath("image.png").write_bytes(large)
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED), [("*.png", Compression(ZIP_STORED))]
+    )
+
+    def build(archive_path: Path, chunked_threshold: int | None) -> bytes:
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            workers=workers,
+            compression=compression,
+            chunked_threshold=chunked_threshold,
+        ) as archive:
+            for name in "small", "large", "image.png":
+                archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+        return archive_path.read_bytes()
+
+    chunked = build(tmp_path / "chunked.zip", chunked_threshold=1000)
+    build(tmp_path / "single.zip", chunked_threshold=None)
+
+    with ZipFile(tmp_path / "chunked.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.read("root/large") == large
+        assert zf.getinfo("root/image.png").compress_type == ZIP_STORED
+    # Large deflated entries differ from single-stream compression
+    assert _raw_data(tmp_path / "chunked.zip", "root/large") != _raw_data(
+        tmp_path / "single.zip", "root/large"
+    )
+    for name in "root/small", "root/image.png":
+        assert _raw_data(tmp_path / "chunked.zip", name) == _raw_data(
+            tmp_path / "single.zip", name
+        )
+    # The output does not depend on the number of workers
+    with ZipArchive.open(
+        tmp_path / "serial.zip",
+        "root",
+        compression=compression,
+        chunked_threshold=1000,
+    ) as archive:
+        for name in "small", "large", "image.png":
+            archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+    assert (tmp_path / "serial.zip").read_bytes() == chunked
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_report(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    src_path.joinpath("text").write_bytes(b"text" * 10_000)
+    src_path.joinpath("random").write_bytes(random.Random(42).randbytes(10_000))
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED), [("random", Compression(ZIP_STORED))]
+    )
+
+    report = BuildReport()
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(
+        archive_path, "root", workers=workers, compression=compression, report=report
+    ) as archive:
+        for name in "text", "sub/random":
+            path = os.fspath(src_path / posixpath.basename(name))
+            archive.add_file(IncludedFile(path, name, name))
+        archive.write_file("METADATA.json", "{}")
+
+    with ZipFile(archive_path) as zf:
+        expected = [
+            (info.filename, info.file_size, info.compress_size, info.compress_type)
+            for info in zf.infolist()
+            if not info.is_dir()
+        ]
+    assert [entry[:4] for entry in report.entries] == expected
+    assert [entry.name for entry in report.entries] == [
+        "root/text",
+        "root/sub/random",
+        "root/METADATA.json",
+    ]
+    assert all(entry.compression_time >= 0 for entry in report.entries)
+    assert set(report.phases) == {"setup", "compression", "directories", "finalize"}
+
+
+def _touch(path: Path) -> None:
+    """Change the modification time of a file (whatever its resolution)."""
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_reuses_previous(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    names = ["unchanged", "touched", "changed"]
+    for name in names:
+        src_path.joinpath(name).write_text(name * 1000)
+    compression = CompressionRules(Compression(ZIP_DEFLATED, 1))
+
+    def build(
+        archive_path: Path, previous_index: BuildIndex | None = None
+    ) -> tuple[ZipArchive, BuildIndex]:
+        index = BuildIndex({})
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            workers=workers,
+            previous=archive_path if previous_index is not None else None,
+            previous_index=previous_index,
+            index=index,
+            compression=compression,
+        ) as archive:
+            for name in names:
+                archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+        return archive, index
+
+    archive_path = tmp_path / "test.zip"
+    _, previous_index = build(archive_path)
+    assert set(previous_index.entries) == {f"root/{name}" for name in names}
+    entry = previous_index.entries["root/changed"]
+    assert entry.compression == Compression(ZIP_DEFLATED, 1)
+    assert entry.sha256 == hashlib.sha256(b"changed" * 1000).hexdigest()
+
+    # The touched file has the same content, so its digest still matches
+    _touch(src_path / "touched")
+    # (The changed file's size is unchanged)
+    src_path.joinpath("changed").write_text("CHANGED" * 1000)
+    _touch(src_path / "changed")
+    archive, index = build(archive_path, previous_index)
+
+    assert zip_contents(archive_path) == {
+        "root/": "",
+        "root/unchanged": "unchanged" * 1000,
+        "root/touched": "touched" * 1000,
+        "root/changed": "CHANGED" * 1000,
+    }
+    assert archive.stats.reused_entries == 2
+    assert index.entries["root/unchanged"] == previous_index.entries["root/unchanged"]
+    assert (
+        index.entries["root/touched"].mtime_ns
+        == (src_path / "touched").stat().st_mtime_ns
+    )
+    assert index.entries["root/changed"].sha256 == (
+        hashlib.sha256(b"CHANGED" * 1000).hexdigest()
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_reuse_requires_same_compression(
+    tmp_path: Path, workers: int
+) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_text("content " * 1000)
+
+    def build(
+        archive_path: Path, level: int, previous_index: BuildIndex | None = None
+    ) -> ZipArchive:
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            workers=workers,
+            previous=archive_path if previous_index is not None else None,
+            previous_index=previous_index,
+            index=BuildIndex({}),
+            compression=CompressionRules(Compression(ZIP_DEFLATED, level)),
+        ) as archive:
+            archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+        assert archive.index is not None
+        return archive
+
+    archive_path = tmp_path / "test.zip"
+    previous_index = build(archive_path, 9).index
+    archive = build(archive_path, 1, previous_index)
+    clean_path = tmp_path / "clean.zip"
+    build(clean_path, 1)
+
+    assert archive.stats.reused_entries == 0
+    assert archive_path.read_bytes() == clean_path.read_bytes()
+
+
+def test_ZipArchive_reuse_checks_previous_archive(tmp_path: Path) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_text("content " * 1000)
+    index = BuildIndex({})
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "root", index=index) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+
+    # The archive is replaced by one which the index does not describe
+    with ZipFile(archive_path, "w", ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("root/src", src_path.read_bytes())
+    with ZipArchive.open(
+        tmp_path / "new.zip", "root", previous=archive_path, previous_index=index
+    ) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+
+    assert archive.stats.reused_entries == 0
+    assert _raw_data(tmp_path / "new.zip", "root/src") == zlib.compress(
+        b"content " * 1000, wbits=-15
+    )
+
+
+@pytest.mark.parametrize("durability", ["none", "rename", "full"])
+@pytest.mark.parametrize("anonymous_tempfile", [False, True])
+def test_ZipArchive_durability(
+    tmp_path: Path, durability: str, anonymous_tempfile: bool
+) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_text("content" * 1000)
+    archive_path = tmp_path / "test.zip"
+    index = BuildIndex({})
+    with ZipArchive.open(archive_path, "root", index=index) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+    previous_data = _raw_data(archive_path, "root/src")
+
+    # The previous archive is also the destination
+    with ZipArchive.open(
+        archive_path,
+        "root",
+        previous=archive_path,
+        previous_index=index,
+        durability=durability,
+        anonymous_tempfile=anonymous_tempfile,
+    ) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+        archive.write_file("new", "new")
+
+    assert zip_contents(archive_path) == {
+        "root/": "",
+        "root/src": "content" * 1000,
+        "root/new": "new",
+    }
+    assert archive.stats.reused_entries == 1
+    assert _raw_data(archive_path, "root/src") == previous_data
+    assert {path.name for path in tmp_path.iterdir()} == {"src", "test.zip"}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_add_archive(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "bundle.zip"
+    with ZipFile(src_path, "w") as zf:
+        zf.writestr(ZipInfo("lib/"), "")
+        zf.writestr("lib/module.py", "module" * 100, ZIP_DEFLATED, compresslevel=1)
+        zf.writestr("data.bin", "data" * 100, ZIP_BZIP2)
+        zf.writestr("README", "readme", ZIP_STORED)
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "root", workers=workers) as archive:
+        archive.write_file("first", "first")
+        archive.add_archive(src_path, "vendor/bundle")
+        archive.write_file("last", "last")
+
+    assert zip_contents(archive_path) == {
+        "root/first": "first",
+        "root/": "",
+        "root/vendor/": "",
+        "root/vendor/bundle/": "",
+        "root/vendor/bundle/lib/": "",
+        "root/vendor/bundle/lib/module.py": "module" * 100,
+        "root/vendor/bundle/data.bin": "data" * 100,
+        "root/vendor/bundle/README": "readme",
+        "root/last": "last",
+    }
+    for name in "lib/module.py", "data.bin", "README":
+        assert _raw_data(archive_path, f"root/vendor/bundle/{name}") == _raw_data(
+            src_path, name
+        )
+    with ZipFile(archive_path) as zf:
+        assert zf.testzip() is None
+        assert [info.filename for info in zf.infolist()][:2] == ["root/first", "root/"]
+
+
+def _check_manifest(archive_path: Path, manifest_name: str) -> list[list[str]]:
+    """Check a manifest entry against the archive, returning its rows."""
+    with ZipFile(archive_path) as zf:
+        rows = list(csv.reader(io.StringIO(zf.read(manifest_name).decode())))
+        assert rows[-1] == [manifest_name, "", ""]
+        files = [info for info in zf.infolist() if not info.is_dir()]
+        assert [row[0] for row in rows] == [info.filename for info in files]
+        for name, record_hash, size in rows[:-1]:
+            data = zf.read(name)
+            digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest())
+            assert record_hash == f"sha256={digest.rstrip(b'=').decode()}"
+            assert int(size) == len(data)
+    return rows
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_manifest(tmp_path: Path, workers: int) -> None:
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    rng = random.Random(42)
+    src_path.joinpath("small").write_text("small")
+    src_path.joinpath("empty").write_text("")
+    src_path.joinpath("large").write_bytes(rng.randbytes(1024) * 2048)
+    src_path.joinpath("chunked").write_bytes(b"chunked" * 200_000)
+    src_path.joinpath("cached").write_bytes(b"cached" * 20_000)
+    src_path.joinpath("reused").write_bytes(b"reused" * 1000)
+    src_path.joinpath("random").write_bytes(rng.randbytes(10_000))
+    previous_path = tmp_path / "previous.zip"
+    previous_index = BuildIndex({})
+    with ZipArchive.open(previous_path, "root", index=previous_index) as archive:
+        archive.add_file(
+            IncludedFile(os.fspath(src_path / "reused"), "reused", "reused")
+        )
+    bundle_path = tmp_path / "bundle.zip"
+    with ZipFile(bundle_path, "w", ZIP_DEFLATED) as zf:
+        zf.writestr("module.py", "module" * 100)
+    compression = CompressionRules(
+        Compression(ZIP_DEFLATED),
+        [("large", Compression(ZIP_STORED)), ("chunked", Compression(ZIP_DEFLATED))],
+    )
+
+    cache = CompressionCache(tmp_path / "cache", min_size=100_000)
+
+    # The second build hits the cache
+    for archive_path in tmp_path / "first.zip", tmp_path / "second.zip":
+        with ZipArchive.open(
+            archive_path,
+            "root",
+            workers=workers,
+            previous=previous_path,
+            previous_index=previous_index,
+            index=BuildIndex({}),
+            compression=compression,
+            incompressible_threshold=0.9,
+            cache=cache,
+            chunked_threshold=1_000_000,
+            manifest=Manifest(),
+        ) as archive:
+            for name in sorted(os.listdir(src_path)):
+                archive.add_file(IncludedFile(os.fspath(src_path / name), name, name))
+            archive.add_archive(bundle_path, "vendor")
+            archive.write_file("METADATA.json", "{}")
+            archive.write_manifest("RECORD")
+
+        rows = _check_manifest(archive_path, "root/RECORD")
+        assert len(rows) == 10
+        assert archive.stats.reused_entries == 1
+    assert cache.hits == 1
+    empty_hash = "sha256=47DEQpj8HBSa-_TImW-5JCeuQeRkm5NMpJWZG3hSuFU"
+    assert ["root/empty", empty_hash, "0"] in rows
+
+
+def test_ZipArchive_manifest_digest(tmp_path: Path) -> None:
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "root", manifest=Manifest("md5")) as archive:
+        archive.write_file("file", "data")
+        archive.write_manifest("sub/MANIFEST")
+
+    with ZipFile(archive_path) as zf:
+        assert zf.read("root/sub/MANIFEST").decode() == (
+            "root/file,md5=jXd_OF09_siBXSD3SWAm3A,4\nroot/sub/MANIFEST,,\n"
+        )
+
+
+@pytest.mark.parametrize("name", ["../escape", "/absolute", "sub/../../escape"])
+def test_ZipArchive_add_archive_unsafe_name(tmp_path: Path, name: str) -> None:
+    src_path = tmp_path / "bundle.zip"
+    with ZipFile(src_path, "w") as zf:
+        zf.writestr(name, "data")
+
+    with pytest.raises(ValueError, match="Unsafe entry name"):
+        with ZipArchive.open(tmp_path / "test.zip", "root") as archive:
+            archive.add_archive(src_path)
+
+
+@pytest.mark.parametrize("prefix", ["../escape", "/abs/dir", "sub/../../escape"])
+def test_ZipArchive_add_archive_unsafe_prefix(tmp_path: Path, prefix: str) -> None:
+    src_path = tmp_path / "bundle.zip"
+    with ZipFile(src_path, "w") as zf:
+        zf.writestr("lib/m.py", "data")
+
+    with pytest.raises(ValueError, match="Unsafe prefix"):
+        with ZipArchive.open(tmp_path / "test.zip", "root") as archive:
+            archive.add_archive(src_path, prefix)
+
+
+def _symlink_info(name: str) -> ZipInfo:
+    zinfo = ZipInfo(name)
+    zinfo.create_system = 3
+    zinfo.external_attr = (stat.S_IFLNK | 0o777) << 16
+    return zinfo
+
+
+@pytest.mark.parametrize(
+    "name, target",
+    [
+        ("link", "../escape"),
+        ("sub/link", "../../escape"),
+        ("link", "/etc/passwd"),
+        ("sub/link", "sub/../../.."),
+    ],
+)
+def test_ZipArchive_add_archive_unsafe_symlink(
+    tmp_path: Path, name: str, target: str
+) -> None:
+    src_path = tmp_path / "bundle.zip"
+    with ZipFile(src_path, "w") as zf:
+        zf.writestr(_symlink_info(name), target)
+
+    with pytest.raises(ValueError, match="Unsafe symlink entry"):
+        with ZipArchive.open(tmp_path / "test.zip", "root") as archive:
+            archive.add_archive(src_path)
+
+
+def test_ZipArchive_add_archive_symlink(tmp_path: Path) -> None:
+    src_path = tmp_path / "bundle.zip"
+    with ZipFile(src_path, "w") as zf:
+        zf.writestr("lib/module.py", "module")
+        zf.writestr(_symlink_info("lib/link.py"), "module.py")
+        # Within the archive, though outside the merged archive
+        zf.writestr(_symlink_info("up"), "../other")
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "root") as archive:
+        archive.add_archive(src_path, "vendor")
+
+    with ZipFile(archive_path) as zf:
+        zinfo = zf.getinfo("root/vendor/lib/link.py")
+        assert stat.S_ISLNK(zinfo.external_attr >> 16)
+        assert zf.read(zinfo) == b"module.py"
+        assert zf.read("root/vendor/up") == b"../other"
+
+
+def _build_tree(tmp_path: Path, directory_entries: bool, workers: int = 1) -> Path:
+    """Build an archive containing packages and an empty directory."""
+    src_path = tmp_path / "src"
+    src_path.mkdir(exist_ok=True)
+    src_path.joinpath("module.py").write_text("X = 1")
+    bundle_path = tmp_path / "bundle.zip"
+    with ZipFile(bundle_path, "w") as zf:
+        zf.writestr(ZipInfo("empty/"), "")
+        zf.writestr(ZipInfo("full/"), "")
+        zf.writestr("full/file", "file")
+
+    archive_path = tmp_path / f"{directory_entries}-{workers}.zip"
+    with ZipArchive.open(
+        archive_path, "root", workers=workers, directory_entries=directory_entries
+    ) as archive:
+        for name in "pkg/__init__.py", "ns/sub/module.py":
+            path = os.fspath(src_path / "module.py")
+            archive.add_file(IncludedFile(path, name, name))
+        archive.add_archive(bundle_path, "data")
+    return archive_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZipArchive_no_directory_entries(tmp_path: Path, workers: int) -> None:
+    with_dirs = _build_tree(tmp_path, directory_entries=True, workers=workers)
+    without_dirs = _build_tree(tmp_path, directory_entries=False, workers=workers)
+
+    with ZipFile(with_dirs) as zf:
+        assert [name for name in zf.namelist() if name.endswith("/")] == [
+            "root/",
+            "root/pkg/",
+            "root/ns/",
+            "root/ns/sub/",
+            "root/data/",
+            "root/data/empty/",
+            "root/data/full/",
+        ]
+    with ZipFile(without_dirs) as zf:
+        # Only the empty directory is preserved
+        assert zf.namelist() == [
+            "root/pkg/__init__.py",
+            "root/ns/sub/module.py",
+            "root/data/empty/",
+            "root/data/full/file",
+        ]
+        assert zf.getinfo("root/data/empty/").is_dir()
+        assert zf.testzip() is None
+    assert os.path.getsize(without_dirs) < os.path.getsize(with_dirs)
+
+
+def _extract_tree(path: Path) -> set[str]:
+    return {
+        p.relative_to(path).as_posix() + ("/" if p.is_dir() else "")
+        for p in path.rglob("*")
+    }
+
+
+def test_ZipArchive_no_directory_entries_extraction(tmp_path: Path) -> None:
+    """Extraction tools create the parent directories of each file.
+
+    The extracted tree is the same, with or without directory entries
+    (though the parent directories get default permissions and times).
+    """
+    with_dirs = _build_tree(tmp_path, directory_entries=True)
+    without_dirs = _build_tree(tmp_path, directory_entries=False)
+
+    expected = {
+        "root/",
+        "root/pkg/",
+        "root/pkg/__init__.py",
+        "root/ns/",
+        "root/ns/sub/",
+        "root/ns/sub/module.py",
+        "root/data/",
+        "root/data/empty/",
+        "root/data/full/",
+        "root/data/full/file",
+    }
+    for archive_path in with_dirs, without_dirs:
+        dest = tmp_path / f"extracted-{archive_path.stem}"
+        with ZipFile(archive_path) as zf:
+            zf.extractall(dest)
+        assert _extract_tree(dest) == expected
+
+        dest = tmp_path / f"unpacked-{archive_path.stem}"
+        shutil.unpack_archive(archive_path, dest)
+        assert _extract_tree(dest) == expected
+
+        if shutil.which("unzip"):
+            dest = tmp_path / f"unzip-{archive_path.stem}"
+            subprocess.run(["unzip", "-q", archive_path, "-d", dest], check=True)
+            assert _extract_tree(dest) == expected
+
+    # zipfile.Path infers the missing directories
+    root = zipfile.Path(without_dirs, "root/")
+    assert sorted(p.name for p in root.iterdir()) == ["data", "ns", "pkg"]
+    assert root.joinpath("ns", "sub").is_dir()
+
+
+def test_ZipArchive_no_directory_entries_zipimport(tmp_path: Path) -> None:
+    """Zipimport needs directory entries to find namespace packages.
+
+    Regular packages and modules are found without them.
+    """
+    with_dirs = _build_tree(tmp_path, directory_entries=True)
+    without_dirs = _build_tree(tmp_path, directory_entries=False)
+
+    for archive_path in with_dirs, without_dirs:
+        importer = zipimport.zipimporter(f"{archive_path}/root/")
+        spec = importer.find_spec("pkg")
+        assert spec is not None and spec.origin is not None
+        assert spec.origin.endswith("__init__.py")
+
+    ns_spec = zipimport.zipimporter(f"{with_dirs}/root/").find_spec("ns")
+    assert ns_spec is not None and ns_spec.loader is None
+    if sys.version_info < (3, 14):
+        assert zipimport.zipimporter(f"{without_dirs}/root/").find_spec("ns") is None
+
+
+symlinks_supported = pytest.mark.skipif(
+    not hasattr(os, "symlink") or sys.platform == "win32",
+    reason="symlinks are not supported",
+)
+
+
+def _build_symlinks(tmp_path: Path, **kwargs) -> Path:
+    """Build an archive of a tree containing symlinks to a shared asset."""
+    src_path = tmp_path / "src"
+    src_path.mkdir()
+    src_path.joinpath("assets").mkdir()
+    src_path.joinpath("assets", "shared.bin").write_bytes(b"shared" * 100_000)
+    src_path.joinpath("a").mkdir()
+    src_path.joinpath("a", "shared.bin").symlink_to("../assets/shared.bin")
+    src_path.joinpath("b.bin").symlink_to("assets/shared.bin")
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "root", **kwargs) as archive:
+        archive.add_files(
+            IncludedFile(os.fspath(src_path / name), name, name)
+            for name in ["assets/shared.bin", "a/shared.bin", "b.bin"]
+        )
+    return archive_path
+
+
+@symlinks_supported
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"workers": 2}, {"read_ahead": 1024}, {"manifest": Manifest()}]
+)
+def test_ZipArchive_symlinks(tmp_path: Path, kwargs: dict) -> None:
+    archive_path = _build_symlinks(tmp_path, symlinks=True, **kwargs)
+
+    with ZipFile(archive_path) as zf:
+        for name, target in [
+            ("root/a/shared.bin", b"../assets/shared.bin"),
+            ("root/b.bin", b"assets/shared.bin"),
+        ]:
+            info = zf.getinfo(name)
+            assert stat.S_ISLNK(info.external_attr >> 16)
+            assert info.compress_type == ZIP_STORED
+            assert info.create_system == 3
+            assert zf.read(name) == target
+        assert zf.read("root/assets/shared.bin") == b"shared" * 100_000
+    # Only one copy of the shared data is stored
+    assert os.path.getsize(archive_path) < 2 * len(
+        _raw_data(archive_path, "root/assets/shared.bin")
+    )
+
+
+@symlinks_supported
+def test_ZipArchive_symlinks_followed(tmp_path: Path) -> None:
+    archive_path = _build_symlinks(tmp_path)
+
+    with ZipFile(archive_path) as zf:
+        for name in "root/a/shared.bin", "root/b.bin":
+            assert not stat.S_ISLNK(zf.getinfo(name).external_attr >> 16)
+            assert zf.read(name) == b"shared" * 100_000
+
+
+@symlinks_supported
+def test_ZipArchive_symlinks_extraction(tmp_path: Path) -> None:
+    """Unzip restores symlinks, while zipfile writes their targets as files."""
+    archive_path = _build_symlinks(tmp_path, symlinks=True)
+
+    dest = tmp_path / "zipfile"
+    with ZipFile(archive_path) as zf:
+        zf.extractall(dest)
+    assert not dest.joinpath("root", "b.bin").is_symlink()
+    assert dest.joinpath("root", "b.bin").read_text() == "assets/shared.bin"
+
+    if shutil.which("unzip"):
+        dest = tmp_path / "unzip"
+        subprocess.run(["unzip", "-q", archive_path, "-d", dest], check=True)
+        assert dest.joinpath("root", "b.bin").is_symlink()
+        assert os.readlink(dest / "root" / "a" / "shared.bin") == "../assets/shared.bin"
+        assert dest.joinpath("root", "b.bin").read_bytes() == b"shared" * 100_000
+
+
+@symlinks_supported
+@pytest.mark.parametrize(
+    "name, target",
+    [
+        ("link", "../outside"),
+        ("sub/link", "../../outside"),
+        ("sub/link", "inside/../../../outside"),
+        ("link", "/etc/passwd"),
+    ],
+)
+def test_ZipArchive_symlinks_outside(tmp_path: Path, name: str, target: str) -> None:
+    link_path = tmp_path / "link"
+    link_path.symlink_to(target)
+
+    with pytest.raises(ValueError, match="points outside the archive"):
+        with ZipArchive.open(tmp_path / "test.zip", "root", symlinks=True) as archive:
+            archive.add_file(IncludedFile(os.fspath(link_path), name, name))
+
+
+@pytest.mark.parametrize("previous_content", [None, b"", b"not a zip file"])
+def test_ZipArchive_ignores_bad_previous(
+    tmp_path: Path, previous_content: bytes | None
+) -> None:
+    src_path = tmp_path / "src"
+    src_path.write_text("content")
+    previous_path = tmp_path / "previous.zip"
+    if previous_content is not None:
+        previous_path.write_bytes(previous_content)
+
+    archive_path = tmp_path / "test.zip"
+    with ZipArchive.open(archive_path, "", previous=previous_path) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "src", "src"))
+
+    assert zip_contents(archive_path) == {"src": "content"}
+
+
 @pytest.mark.parametrize(
     "original_mode, normalized_mode",
     [
@@ -227,83 +1370,665 @@ def test_ZipArchive_file_modes(
         # make file "executable" on windows
         src_path = src_path.with_suffix(".bat")
 
-    src_path.touch()
-    src_path.chmod(original_mode)
+    src_path.touch()
+    src_path.chmod(original_mode)
+
+    with ZipArchive.open(
+        archive_path, root_path="", reproducible=reproducible
+    ) as archive:
+        archive.add_file(IncludedFile(os.fspath(src_path), "testfile", "testfile"))
+
+    with ZipFile(archive_path) as zf:
+        infolist = zf.infolist()
+    assert len(infolist) == 1
+    st_mode = infolist[0].external_attr >> 16
+    assert stat.S_ISREG(st_mode)
+    assert stat.S_IMODE(st_mode) == normalized_mode if reproducible else original_mode
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    root_path = tmp_path / "root"
+    root_path.mkdir()
+    return root_path
+
+
+@pytest.fixture
+def project_config():
+    return {
+        "name": "project-name",
+        "version": "1.23",
+    }
+
+
+@pytest.fixture
+def target_config():
+    return {
+        "install-name": "org.example.project",
+    }
+
+
+@pytest.fixture
+def project_metadata(project_config, target_config, project_root):
+    hatch_config = {
+        "build": {
+            "targets": {
+                "zipped-directory": target_config,
+            },
+        },
+    }
+    config = {
+        "project": project_config,
+        "tool": {
+            "hatch": hatch_config,
+        },
+    }
+    return ProjectMetadata(project_root, None, config=config)
+
+
+@pytest.fixture
+def builder(project_root, project_metadata):
+    return ZippedDirectoryBuilder(project_root, metadata=project_metadata)
+
+
+@pytest.mark.parametrize("target_config", [{"core-metadata-version": "2.2"}])
+def test_config_core_metadata_constructor(builder):
+    metadata = builder.config.core_metadata_constructor(builder.metadata)
+    assert re.search(r"(?im)^Metadata-Version: 2.2$", metadata)
+
+
+@pytest.mark.parametrize("target_config", [{"core-metadata-version": None}])
+def test_config_core_metadata_constructor_type_error(builder):
+    with pytest.raises(TypeError, match="must be a string"):
+        builder.config.core_metadata_constructor(builder.metadata)
+
+
+@pytest.mark.parametrize("target_config", [{"core-metadata-version": "42.203"}])
+def test_config_core_metadata_constructor_value_error(builder):
+    with pytest.raises(ValueError, match="(?i)unknown metadata version"):
+        builder.config.core_metadata_constructor(builder.metadata)
+
+
+@pytest.mark.parametrize("target_config", [{"workers": 4}])
+def test_config_workers(builder):
+    assert builder.config.workers == 4
+
+
+@pytest.mark.parametrize("target_config", [{}])
+def test_config_workers_default(builder):
+    assert builder.config.workers == 1
+
+
+@pytest.mark.parametrize("target_config", [{"workers": 0}])
+def test_config_workers_auto(builder, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 32)
+    assert builder.config.workers == 32
+
+
+@pytest.mark.parametrize("target_config", [{"workers": "4"}, {"workers": True}])
+def test_config_workers_type_error(builder):
+    with pytest.raises(TypeError, match="must be an integer"):
+        builder.config.workers
+
+
+@pytest.mark.parametrize("target_config", [{"workers": -1}])
+def test_config_workers_value_error(builder):
+    with pytest.raises(ValueError, match="must not be negative"):
+        builder.config.workers
+
+
+@pytest.mark.parametrize("target_config", [{"incremental": True}])
+def test_config_incremental(builder):
+    assert builder.config.incremental is True
+
+
+@pytest.mark.parametrize("target_config", [{"incremental": "yes"}])
+def test_config_incremental_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.incremental
+
+
+@pytest.mark.parametrize(
+    "target_config, expected_default, expected_rules",
+    [
+        ({}, Compression(ZIP_STORED), []),
+        ({"compression": "deflated"}, Compression(ZIP_DEFLATED), []),
+        (
+            {"compression": "bzip2", "compression-level": 3},
+            Compression(ZIP_BZIP2, 3),
+            [],
+        ),
+        (
+            {
+                "compression": "deflated",
+                "compression-level": 1,
+                "compression-patterns": {
+                    "*.png": "stored",
+                    "*.txt": {"compression": "lzma"},
+                    "*.json": {"compression": "deflated", "compression-level": 9},
+                },
+            },
+            Compression(ZIP_DEFLATED, 1),
+            [
+                Compression(ZIP_STORED),
+                Compression(ZIP_LZMA),
+                Compression(ZIP_DEFLATED, 9),
+            ],
+        ),
+    ],
+)
+def test_config_compression(builder, expected_default, expected_rules):
+    rules = builder.config.compression
+    assert rules.default == expected_default
+    assert [compression for _, compression in rules.rules] == expected_rules
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"compression": 8}, "compression` must be a string"),
+        ({"compression-level": "9"}, "compression-level` must be an integer"),
+        ({"compression-patterns": ["*.png"]}, "must be a table"),
+        ({"compression-patterns": {"*.png": 0}}, "must be a string or a table"),
+        (
+            {"compression-patterns": {"*.png": {"compression": None}}},
+            r"compression-patterns\.\*\.png\.compression` must be a string",
+        ),
+    ],
+)
+def test_config_compression_type_error(builder, message):
+    with pytest.raises(TypeError, match=message):
+        builder.config.compression
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"compression": "zip"}, "(?i)unknown compression method"),
+        ({"compression": "deflated", "compression-level": 10}, "must be between"),
+        (
+            {
+                "compression-patterns": {
+                    "*.png": {"compression": "deflated", "compression-level": -2}
+                }
+            },
+            "must be between",
+        ),
+        # The default method, stored, has no levels
+        ({"compression-level": 9}, "does not support compression levels"),
+    ],
+)
+def test_config_compression_value_error(builder, message):
+    with pytest.raises(ValueError, match=message):
+        builder.config.compression
+
+
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [
+        ({}, None),
+        ({"incompressible-threshold": 0.5}, None),
+        ({"store-incompressible": True}, 0.1),
+        ({"store-incompressible": True, "incompressible-threshold": 0}, 0.0),
+    ],
+)
+def test_config_incompressible_threshold(builder, expected):
+    assert builder.config.incompressible_threshold == expected
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"store-incompressible": 1}, "must be a boolean"),
+        ({"incompressible-threshold": "0.5"}, "must be a number"),
+    ],
+)
+def test_config_incompressible_threshold_type_error(builder, message):
+    with pytest.raises(TypeError, match=message):
+        builder.config.incompressible_threshold
+
+
+@pytest.mark.parametrize("target_config", [{"incompressible-threshold": 1.5}])
+def test_config_incompressible_threshold_value_error(builder):
+    with pytest.raises(ValueError, match="must be between 0 and 1"):
+        builder.config.incompressible_threshold
+
+
+@pytest.mark.parametrize(
+    "target_config, expected_path",
+    [
+        ({"compression-cache": True}, "xdg-cache/hatch-zipped-directory"),
+        ({"compression-cache": "cache-dir"}, "root/cache-dir"),
+    ],
+)
+def test_config_compression_cache(
+    builder, tmp_path, monkeypatch, target_config, expected_path
+):
+    monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path / "xdg-cache"))
+    target_config["compression-cache-max-size"] = 1000
+    cache = builder.config.compression_cache
+    assert cache.path == tmp_path / expected_path
+    assert cache.max_size == 1000
+
+
+@pytest.mark.parametrize("target_config", [{}, {"compression-cache": False}])
+def test_config_compression_cache_disabled(builder):
+    assert builder.config.compression_cache is None
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"compression-cache": 1}, "must be a boolean or a string"),
+        ({"compression-cache-max-size": "1G"}, "must be an integer"),
+    ],
+)
+def test_config_compression_cache_type_error(builder, message):
+    with pytest.raises(TypeError, match=message):
+        builder.config.compression_cache
+
+
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [
+        ({}, None),
+        ({"chunked-deflate-threshold": 16 * 1024 * 1024}, 16 * 1024 * 1024),
+    ],
+)
+def test_config_chunked_deflate_threshold(builder, expected):
+    assert builder.config.chunked_deflate_threshold == expected
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [{"chunked-deflate-threshold": "16M"}, {"chunked-deflate-threshold": True}],
+)
+def test_config_chunked_deflate_threshold_type_error(builder):
+    with pytest.raises(TypeError, match="must be an integer"):
+        builder.config.chunked_deflate_threshold
+
+
+@pytest.mark.parametrize("target_config", [{"chunked-deflate-threshold": 0}])
+def test_config_chunked_deflate_threshold_value_error(builder):
+    with pytest.raises(ValueError, match="must be positive"):
+        builder.config.chunked_deflate_threshold
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"build-report": True}, True)]
+)
+def test_config_build_report(builder, expected):
+    assert builder.config.build_report is expected
+
+
+@pytest.mark.parametrize("target_config", [{"build-report": "yes"}])
+def test_config_build_report_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.build_report
+
+
+@pytest.mark.parametrize("target_config, expected", [({}, None), ({"output-fd": 3}, 3)])
+def test_config_output_fd(builder, expected):
+    assert builder.config.output_fd == expected
+
+
+@pytest.mark.parametrize("target_config", [{"output-fd": "3"}])
+def test_config_output_fd_type_error(builder):
+    with pytest.raises(TypeError, match="must be an integer"):
+        builder.config.output_fd
+
+
+@pytest.mark.parametrize("target_config", [{"output-fd": -1}])
+def test_config_output_fd_value_error(builder):
+    with pytest.raises(ValueError, match="must not be negative"):
+        builder.config.output_fd
+
+
+@pytest.mark.parametrize(
+    "target_config, expected_prefix",
+    [
+        ({"merge-archives": {"vendor/bundle.zip": "lib"}}, "lib"),
+        ({"merge-archives": {"vendor/bundle.zip": "lib/./sub/"}}, "lib/sub"),
+        ({"merge-archives": {"vendor/bundle.zip": "lib/../other"}}, "other"),
+        ({"merge-archives": {"vendor/bundle.zip": "."}}, ""),
+        ({"merge-archives": {"vendor/bundle.zip": ""}}, ""),
+    ],
+)
+def test_config_merge_archives(builder, project_root, expected_prefix):
+    assert builder.config.merge_archives == {
+        os.path.join(project_root, "vendor", "bundle.zip"): expected_prefix
+    }
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"merge-archives": {"bundle.zip": "/abs/dir"}}, "must be a relative path"),
+        (
+            {"merge-archives": {"bundle.zip": "../../escape"}},
+            "must not refer to a parent directory",
+        ),
+        (
+            {"merge-archives": {"bundle.zip": "lib/../../escape"}},
+            "must not refer to a parent directory",
+        ),
+    ],
+)
+def test_config_merge_archives_value_error(builder, message):
+    with pytest.raises(ValueError, match=message):
+        builder.config.merge_archives
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [{"merge-archives": {"bundle.zip": "../../escape"}, "exclude": ["bundle.zip"]}],
+)
+def test_ZippedDirectoryBuilder_merge_archives_unsafe_prefix(
+    builder, project_root, tmp_path
+):
+    with ZipFile(project_root / "bundle.zip", "w") as zf:
+        zf.writestr("lib/m.py", "module")
+
+    with pytest.raises(ValueError, match="must not refer to a parent directory"):
+        list(builder.build(directory=os.fspath(tmp_path / "dist")))
+    assert not (tmp_path / "dist" / "project_name-1.23.zip").exists()
+
+
+@pytest.mark.parametrize(
+    "target_config, message",
+    [
+        ({"merge-archives": ["bundle.zip"]}, "must be a table"),
+        ({"merge-archives": {"bundle.zip": 1}}, r"bundle\.zip` must be a string"),
+    ],
+)
+def test_config_merge_archives_type_error(builder, message):
+    with pytest.raises(TypeError, match=message):
+        builder.config.merge_archives
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, None), ({"read-ahead": 1000}, 1000)]
+)
+def test_config_read_ahead(builder, expected):
+    assert builder.config.read_ahead == expected
+
+
+@pytest.mark.parametrize("target_config", [{"read-ahead": True}])
+def test_config_read_ahead_type_error(builder):
+    with pytest.raises(TypeError, match="must be an integer"):
+        builder.config.read_ahead
+
+
+@pytest.mark.parametrize("target_config", [{"read-ahead": 0}])
+def test_config_read_ahead_value_error(builder):
+    with pytest.raises(ValueError, match="must be positive"):
+        builder.config.read_ahead
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"skip-unchanged": True}, True)]
+)
+def test_config_skip_unchanged(builder, expected):
+    assert builder.config.skip_unchanged is expected
+
+
+@pytest.mark.parametrize("target_config", [{"skip-unchanged": 1}])
+def test_config_skip_unchanged_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.skip_unchanged
+
+
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [
+        ({}, None),
+        ({"manifest": False}, None),
+        ({"manifest": True}, "RECORD"),
+        ({"manifest": "meta/MANIFEST.csv"}, "meta/MANIFEST.csv"),
+    ],
+)
+def test_config_manifest(builder, expected):
+    assert builder.config.manifest == expected
+
+
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"manifest": 1}, TypeError, "must be a boolean or a string"),
+        ({"manifest": ""}, ValueError, "must not be empty"),
+    ],
+)
+def test_config_manifest_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.manifest
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"manifest-sidecar": True}, True)]
+)
+def test_config_manifest_sidecar(builder, expected):
+    assert builder.config.manifest_sidecar is expected
+
+
+@pytest.mark.parametrize("target_config", [{"manifest-sidecar": "yes"}])
+def test_config_manifest_sidecar_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.manifest_sidecar
+
+
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [({}, "sha256"), ({"manifest-digest": "sha512"}, "sha512")],
+)
+def test_config_manifest_digest(builder, expected):
+    assert builder.config.manifest_digest == expected
+
+
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"manifest-digest": 256}, TypeError, "must be a string"),
+        ({"manifest-digest": "nope"}, ValueError, "Unknown digest algorithm"),
+    ],
+)
+def test_config_manifest_digest_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.manifest_digest
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, True), ({"directory-entries": False}, False)]
+)
+def test_config_directory_entries(builder, expected):
+    assert builder.config.directory_entries is expected
+
+
+@pytest.mark.parametrize("target_config", [{"directory-entries": "no"}])
+def test_config_directory_entries_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.directory_entries
+
+
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"preserve-symlinks": True}, True)]
+)
+def test_config_preserve_symlinks(builder, expected):
+    assert builder.config.preserve_symlinks is expected
+
+
+@pytest.mark.parametrize("target_config", [{"preserve-symlinks": 1}])
+def test_config_preserve_symlinks_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.preserve_symlinks
+
+
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [
+        ({}, "rename"),
+        ({"durability": "none"}, "none"),
+        ({"durability": "full"}, "full"),
+    ],
+)
+def test_config_durability(builder, expected):
+    assert builder.config.durability == expected
+
+
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"durability": True}, TypeError, "must be a string"),
+        ({"durability": "fast"}, ValueError, "must be one of: none, rename, full"),
+    ],
+)
+def test_config_durability_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.durability
+
 
-    with ZipArchive.open(
-        archive_path, root_path="", reproducible=reproducible
-    ) as archive:
-        archive.add_file(IncludedFile(os.fspath(src_path), "testfile", "testfile"))
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"anonymous-tempfile": True}, True)]
+)
+def test_config_anonymous_tempfile(builder, expected):
+    assert builder.config.anonymous_tempfile is expected
 
-    with ZipFile(archive_path) as zf:
-        infolist = zf.infolist()
-    assert len(infolist) == 1
-    st_mode = infolist[0].external_attr >> 16
-    assert stat.S_ISREG(st_mode)
-    assert stat.S_IMODE(st_mode) == normalized_mode if reproducible else original_mode
 
+@pytest.mark.parametrize("target_config", [{"anonymous-tempfile": "yes"}])
+def test_config_anonymous_tempfile_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.anonymous_tempfile
 
-@pytest.fixture
-def project_root(tmp_path):
-    root_path = tmp_path / "root"
-    root_path.mkdir()
-    return root_path
 
+@pytest.mark.parametrize(
+    "target_config, expected",
+    [({}, 1024 * 1024), ({"output-buffer-size": 0}, 0)],
+)
+def test_config_output_buffer_size(builder, expected):
+    assert builder.config.output_buffer_size == expected
 
-@pytest.fixture
-def project_config():
-    return {
-        "name": "project-name",
-        "version": "1.23",
-    }
+
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"output-buffer-size": "1M"}, TypeError, "must be an integer"),
+        ({"output-buffer-size": -1}, ValueError, "must not be negative"),
+    ],
+)
+def test_config_output_buffer_size_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.output_buffer_size
 
 
-@pytest.fixture
-def target_config():
-    return {
-        "install-name": "org.example.project",
-    }
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, False), ({"preallocate": True}, True)]
+)
+def test_config_preallocate(builder, expected):
+    assert builder.config.preallocate is expected
 
 
-@pytest.fixture
-def project_metadata(project_config, target_config, project_root):
-    hatch_config = {
-        "build": {
-            "targets": {
-                "zipped-directory": target_config,
+@pytest.mark.parametrize("target_config", [{"preallocate": 1}])
+def test_config_preallocate_type_error(builder):
+    with pytest.raises(TypeError, match="must be a boolean"):
+        builder.config.preallocate
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [
+        {
+            "compression": "bzip2",
+            "compression-level": 5,
+            "compression-patterns": {"*.png": "stored"},
+            "manifest": True,
+            "variants": {
+                "default": {},
+                "fast": {
+                    "compression": "deflated",
+                    "compression-level": 1,
+                    "install-name": "fast",
+                },
+                "plain": {"compression": "stored", "metadata": False},
+                "bare": {"compression-patterns": {}, "manifest": False},
             },
-        },
-    }
-    config = {
-        "project": project_config,
-        "tool": {
-            "hatch": hatch_config,
-        },
-    }
-    return ProjectMetadata(project_root, None, config=config)
+        }
+    ],
+)
+def test_config_variants(builder):
+    variants = {variant.name: variant for variant in builder.config.variants}
+    assert list(variants) == ["default", "fast", "plain", "bare"]
+
+    assert variants["default"].install_name is None
+    assert variants["default"].compression.default == Compression(ZIP_BZIP2, 5)
+    assert variants["default"].compression.rules == builder.config.compression.rules
+    assert variants["default"].metadata is True
+    assert variants["default"].manifest == "RECORD"
+    assert variants["fast"].install_name == "fast"
+    assert variants["fast"].compression.default == Compression(ZIP_DEFLATED, 1)
+    # NB: the level is only inherited along with the method
+    assert variants["plain"].compression.default == Compression(ZIP_STORED)
+    assert [c for _, c in variants["plain"].compression.rules] == [
+        Compression(ZIP_STORED)
+    ]
+    assert variants["plain"].metadata is False
+    assert variants["bare"].compression.rules == []
+    assert variants["bare"].manifest is None
 
 
-@pytest.fixture
-def builder(project_root, project_metadata):
-    return ZippedDirectoryBuilder(project_root, metadata=project_metadata)
+def test_config_variants_default(builder):
+    assert builder.config.variants == []
 
 
-@pytest.mark.parametrize("target_config", [{"core-metadata-version": "2.2"}])
-def test_config_core_metadata_constructor(builder):
-    metadata = builder.config.core_metadata_constructor(builder.metadata)
-    assert re.search(r"(?im)^Metadata-Version: 2.2$", metadata)
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"variants": ["slim"]}, TypeError, "variants` must be a table"),
+        ({"variants": {"slim": True}}, TypeError, "variants.slim` must be a table"),
+        ({"variants": {"a-b": {}}}, ValueError, "variant names may only contain"),
+        ({"variants": {"a/b": {}}}, ValueError, "variant names may only contain"),
+        (
+            {"variants": {"slim": {"install-name": 1}}},
+            TypeError,
+            "slim.install-name` must be a string",
+        ),
+        (
+            {"variants": {"slim": {"metadata": "no"}}},
+            TypeError,
+            "slim.metadata` must be a boolean",
+        ),
+        (
+            {"variants": {"slim": {"compression": "zip"}}},
+            ValueError,
+            "(?i)variants.slim`: unknown compression method",
+        ),
+        (
+            {"variants": {"slim": {"manifest": 1}}},
+            TypeError,
+            "slim.manifest` must be a boolean or a string",
+        ),
+    ],
+)
+def test_config_variants_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.variants
 
 
-@pytest.mark.parametrize("target_config", [{"core-metadata-version": None}])
-def test_config_core_metadata_constructor_type_error(builder):
-    with pytest.raises(TypeError, match="must be a string"):
-        builder.config.core_metadata_constructor(builder.metadata)
+@pytest.mark.parametrize(
+    "target_config, expected", [({}, None), ({"shard-max-size": 1000}, 1000)]
+)
+def test_config_shard_max_size(builder, expected):
+    assert builder.config.shard_max_size == expected
 
 
-@pytest.mark.parametrize("target_config", [{"core-metadata-version": "42.203"}])
-def test_config_core_metadata_constructor_value_error(builder):
-    with pytest.raises(ValueError, match="(?i)unknown metadata version"):
-        builder.config.core_metadata_constructor(builder.metadata)
+@pytest.mark.parametrize(
+    "target_config, exc_type, message",
+    [
+        ({"shard-max-size": "1M"}, TypeError, "must be an integer"),
+        ({"shard-max-size": 0}, ValueError, "must be positive"),
+    ],
+)
+def test_config_shard_max_size_error(builder, exc_type, message):
+    with pytest.raises(exc_type, match=message):
+        builder.config.shard_max_size
 
 
 def test_ZippedDirectoryBuilder_clean(builder, tmp_path):
@@ -311,6 +2036,11 @@ def test_ZippedDirectoryBuilder_clean(builder, tmp_path):
     dist_path.mkdir()
     dist_path.joinpath("foo.whl").touch()
     dist_path.joinpath("bar.zip").touch()
+    dist_path.joinpath("bar.report.json").touch()
+    dist_path.joinpath("bar.fingerprint").touch()
+    dist_path.joinpath("bar.RECORD").touch()
+    dist_path.joinpath("bar-shard1.zip").touch()
+    dist_path.joinpath("bar.shards.json").touch()
 
     builder.clean(os.fspath(dist_path), ["standard"])
 
@@ -347,6 +2077,526 @@ def test_ZippedDirectoryBuilder_build(builder, project_root, tmp_path, arcname_p
     assert json_metadata["version"] == "1.23"
 
 
+@pytest.fixture
+def pipe():
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, "rb") as reader, open(write_fd, "wb") as writer:
+        yield reader, writer
+
+
+def test_ZippedDirectoryBuilder_build_output_fd(
+    builder, target_config, project_root, tmp_path, pipe
+):
+    reader, writer = pipe
+    target_config.update({"output-fd": writer.fileno(), "build-report": True})
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    with ThreadPoolExecutor(1) as executor:
+        streamed = executor.submit(reader.read)
+        (artifact,) = builder.build(directory=os.fspath(dist_path))
+        writer.close()
+        data = streamed.result()
+
+    assert artifact == f"/dev/fd/{target_config['output-fd']}"
+    contents = zip_contents(io.BytesIO(data))
+    assert contents["org.example.project/test.txt"] == "content"
+    assert [path.name for path in dist_path.iterdir()] == [
+        "project_name-1.23.report.json"
+    ]
+    report = json.loads((dist_path / "project_name-1.23.report.json").read_text())
+    assert report["artifact"]["size"] is None
+
+
+@pytest.mark.parametrize(
+    "target_config", [{"compression": "deflated", "build-report": True, "workers": 2}]
+)
+def test_ZippedDirectoryBuilder_build_report(builder, project_root, tmp_path, capsys):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content" * 1000)
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    report_path = dist_path / "project_name-1.23.report.json"
+    assert f"Build report written to {report_path}" in capsys.readouterr().err
+    report = json.loads(report_path.read_text())
+    assert report["artifact"] == {
+        "name": "project_name-1.23.zip",
+        "size": os.path.getsize(artifact),
+    }
+    assert set(report["phases"]) == {
+        "setup",
+        "discovery",
+        "compression",
+        "directories",
+        "metadata",
+        "finalize",
+    }
+    assert sum(report["phases"].values()) <= report["wall_time"]
+    assert [entry["name"] for entry in report["entries"]] == [
+        "project_name/test.txt",
+        "project_name/METADATA.json",
+    ]
+    assert report["entries"][0]["size"] == 7000
+    assert report["entries"][0]["method"] == "deflated"
+    assert report["totals"]["entries"] == 2
+    assert report["incompressible"] == {"entries": 0, "cpu_time_saved": 0.0}
+    assert report["cache"] is None
+    if sys.platform.startswith("linux"):
+        assert report["io"]["write_syscalls"] > 0
+
+
+def test_ZippedDirectoryBuilder_no_build_report(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    list(builder.build(directory=os.fspath(dist_path)))
+
+    assert [path.name for path in dist_path.iterdir()] == ["project_name-1.23.zip"]
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [{"merge-archives": {"bundle.zip": "vendor"}, "exclude": ["bundle.zip"]}],
+)
+def test_ZippedDirectoryBuilder_merge_archives(builder, project_root, tmp_path):
+    project_root.joinpath("test.txt").write_text("content")
+    with ZipFile(project_root / "bundle.zip", "w") as zf:
+        zf.writestr("module.py", "module")
+
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    contents = zip_contents(artifact)
+    assert contents["project_name/vendor/module.py"] == "module"
+    assert "project_name/bundle.zip" not in contents
+
+
+@pytest.mark.parametrize("target_config", [{"skip-unchanged": True}])
+def test_ZippedDirectoryBuilder_skip_unchanged(
+    builder, target_config, project_root, tmp_path, capsys, monkeypatch
+):
+    dist_path = tmp_path / "dist"
+    test_txt = project_root / "test.txt"
+    test_txt.write_text("content")
+
+    def build() -> bool:
+        """Build, returning whether the archive was rebuilt."""
+        capsys.readouterr()
+        (artifact,) = builder.build(directory=os.fspath(dist_path))
+        return "up to date" not in capsys.readouterr().err
+
+    assert build()
+    assert dist_path.joinpath("project_name-1.23.fingerprint").is_file()
+    assert not build()
+
+    test_txt.write_text("changed")
+    assert build()
+    assert not build()
+
+    target_config["compression"] = "stored"
+    assert build()
+    assert not build()
+
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1580601600")
+    assert build()
+    assert not build()
+
+    monkeypatch.setenv("HATCH_ZIPPED_DIRECTORY_FORCE", "1")
+    assert build()
+
+    monkeypatch.delenv("HATCH_ZIPPED_DIRECTORY_FORCE")
+    dist_path.joinpath("project_name-1.23.zip").unlink()
+    assert build()
+    assert (
+        zip_contents(dist_path / "project_name-1.23.zip")["project_name/test.txt"]
+        == "changed"
+    )
+
+
+@pytest.mark.parametrize(
+    "target_config", [{"manifest": True, "manifest-sidecar": True, "workers": 2}]
+)
+def test_ZippedDirectoryBuilder_manifest(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    rows = _check_manifest(Path(artifact), "project_name/RECORD")
+    assert [row[0] for row in rows] == [
+        "project_name/test.txt",
+        "project_name/METADATA.json",
+        "project_name/RECORD",
+    ]
+    sidecar = dist_path / "project_name-1.23.RECORD"
+    assert sidecar.read_text() == "".join(
+        f"{name},{record_hash},{size}\n" for name, record_hash, size in rows[:-1]
+    )
+    assert builder.build_bytes() == Path(artifact).read_bytes()
+
+
+@pytest.mark.parametrize("target_config", [{"manifest-sidecar": True}])
+def test_ZippedDirectoryBuilder_manifest_sidecar_only(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    assert "project_name/RECORD" not in zip_contents(artifact)
+    sidecar = dist_path / "project_name-1.23.RECORD"
+    assert sidecar.read_text().splitlines()[0].startswith("project_name/test.txt,")
+
+
+@pytest.mark.parametrize("target_config", [{"directory-entries": False}])
+def test_ZippedDirectoryBuilder_no_directory_entries(builder, project_root, tmp_path):
+    project_root.joinpath("sub").mkdir()
+    project_root.joinpath("sub", "test.txt").write_text("content")
+
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    assert set(zip_contents(artifact)) == {
+        "project_name/sub/test.txt",
+        "project_name/METADATA.json",
+    }
+
+
+@symlinks_supported
+@pytest.mark.parametrize("target_config", [{"preserve-symlinks": True}])
+def test_ZippedDirectoryBuilder_preserve_symlinks(builder, project_root, tmp_path):
+    project_root.joinpath("test.txt").write_text("content")
+    project_root.joinpath("link.txt").symlink_to("test.txt")
+
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    with ZipFile(artifact) as zf:
+        info = zf.getinfo("project_name/link.txt")
+        assert stat.S_ISLNK(info.external_attr >> 16)
+        assert zf.read(info) == b"test.txt"
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [{"durability": "full", "anonymous-tempfile": True, "skip-unchanged": True}],
+)
+def test_ZippedDirectoryBuilder_durability(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    assert zip_contents(artifact)["project_name/test.txt"] == "content"
+    assert {path.name for path in dist_path.iterdir()} == {
+        "project_name-1.23.zip",
+        "project_name-1.23.fingerprint",
+    }
+
+
+@pytest.mark.parametrize("target_config", [{"preallocate": True, "build-report": True}])
+def test_ZippedDirectoryBuilder_preallocate(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content" * 1000)
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    assert zip_contents(artifact)["project_name/test.txt"] == "content" * 1000
+    report = json.loads((dist_path / "project_name-1.23.report.json").read_text())
+    output = report["output"]
+    assert output["buffer_size"] == 1024 * 1024
+    assert output["bytes"] == os.path.getsize(artifact)
+    assert output["writes"] == 1
+    if output["preallocated"]:
+        assert output["preallocated"] > 7000
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZippedDirectoryBuilder_variants(
+    builder, target_config, project_root, tmp_path, workers, capsys
+):
+    included_files = _build_test_tree(project_root)
+    target_config.update(
+        {
+            "compression": "deflated",
+            "build-report": True,
+            "workers": workers,
+            "chunked-deflate-threshold": 2_000_000,
+            "variants": {
+                "stored": {"compression": "stored"},
+                "other": {"install-name": "other", "metadata": False},
+                "record": {"manifest": True},
+            },
+        }
+    )
+    dist_path = tmp_path / "dist"
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    assert {path.name for path in dist_path.iterdir()} == {
+        "project_name-1.23.zip",
+        "project_name-1.23-stored.zip",
+        "project_name-1.23-other.zip",
+        "project_name-1.23-record.zip",
+        "project_name-1.23.report.json",
+    }
+    err = capsys.readouterr().err
+    assert f"Built variant {dist_path / 'project_name-1.23-stored.zip'}" in err
+    report = json.loads((dist_path / "project_name-1.23.report.json").read_text())
+    # Files which are not deflated in chunks are read once
+    small_files = [f for f in included_files if os.path.getsize(f.path) < 2_000_000]
+    assert report["variants"] == {
+        "archives": 4,
+        "file_reads": len(small_files),
+        "compressions": 2 * len(small_files),
+    }
+    assert report["entries"][-1]["name"] == "org.example.project/METADATA.json"
+
+    # Each variant is identical to the archive built with its options alone
+    del target_config["variants"]
+    del target_config["build-report"]
+
+    def build_alone(name: str, **options: Any) -> bytes:
+        saved = dict(target_config)
+        target_config.update(options)
+        (alone,) = builder.build(directory=os.fspath(tmp_path / name))
+        target_config.clear()
+        target_config.update(saved)
+        return Path(alone).read_bytes()
+
+    assert Path(artifact).read_bytes() == build_alone("main")
+    assert dist_path.joinpath("project_name-1.23-stored.zip").read_bytes() == (
+        build_alone("stored", compression="stored")
+    )
+    assert dist_path.joinpath("project_name-1.23-record.zip").read_bytes() == (
+        build_alone("record", manifest=True)
+    )
+    with (
+        ZipFile(dist_path / "project_name-1.23-other.zip") as other,
+        ZipFile(artifact) as main,
+    ):
+        assert other.namelist() == [
+            name.replace("org.example.project/", "other/")
+            for name in main.namelist()
+            if name != "org.example.project/METADATA.json"
+        ]
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [{"skip-unchanged": True, "variants": {"stored": {"compression": "stored"}}}],
+)
+def test_ZippedDirectoryBuilder_variants_skip_unchanged(
+    builder, project_root, tmp_path, capsys
+):
+    dist_path = tmp_path / "dist"
+    project_root.joinpath("test.txt").write_text("content")
+
+    def build() -> bool:
+        """Build, returning whether the archives were rebuilt."""
+        capsys.readouterr()
+        list(builder.build(directory=os.fspath(dist_path)))
+        return "up to date" not in capsys.readouterr().err
+
+    assert build()
+    assert not build()
+    dist_path.joinpath("project_name-1.23-stored.zip").unlink()
+    assert build()
+    assert dist_path.joinpath("project_name-1.23-stored.zip").is_file()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_ZippedDirectoryBuilder_shards(
+    builder, target_config, project_root, tmp_path, workers, capsys
+):
+    _build_test_tree(project_root)
+    with ZipFile(project_root / "bundle.zip", "w") as zf:
+        zf.writestr("module.py", "module")
+    target_config["merge-archives"] = {"bundle.zip": "vendor"}
+    target_config["exclude"] = ["bundle.zip"]
+    (unsharded,) = builder.build(directory=os.fspath(tmp_path / "unsharded"))
+    max_size = 8_000_000
+    target_config.update({"shard-max-size": max_size, "workers": workers})
+    dist_path = tmp_path / "dist"
+
+    (artifact,) = builder.build(directory=os.fspath(dist_path))
+
+    assert artifact == os.fspath(dist_path / "project_name-1.23.shards.json")
+    index = json.loads(Path(artifact).read_text())
+    shard_paths = sorted(dist_path.glob("project_name-1.23-shard*.zip"))
+    assert len(shard_paths) > 1
+    assert sorted(index["shards"]) == [path.name for path in shard_paths]
+    assert f"Wrote {len(shard_paths)} shard(s)" in capsys.readouterr().err
+
+    files = {}
+    for path in shard_paths:
+        assert path.stat().st_size <= max_size
+        with ZipFile(path) as zf:
+            # Each shard is self-contained
+            assert json.loads(zf.read("org.example.project/SHARDS.json")) == index
+            assert "org.example.project/METADATA.json" in zf.namelist()
+            names = {
+                name
+                for name in zf.namelist()
+                if not name.endswith("/")
+                and name.rsplit("/", 1)[-1] not in {"METADATA.json", "SHARDS.json"}
+            }
+            assert _parent_paths(names) <= set(zf.namelist())
+            for name in names:
+                assert index["files"][name] == path.name
+                files[name] = zf.read(name)
+    with ZipFile(unsharded) as zf:
+        assert files == {
+            name: zf.read(name)
+            for name in zf.namelist()
+            if not name.endswith("/") and name != "org.example.project/METADATA.json"
+        }
+
+    # The shards are reproducible, however many are built in parallel
+    target_config["workers"] = 5 - workers
+    (rebuilt,) = builder.build(directory=os.fspath(tmp_path / "rebuilt"))
+    for path in shard_paths:
+        assert (tmp_path / "rebuilt" / path.name).read_bytes() == path.read_bytes()
+
+    # Stale shards are removed
+    target_config["shard-max-size"] = 100_000_000
+    list(builder.build(directory=os.fspath(dist_path)))
+    assert sorted(dist_path.glob("project_name-1.23-shard*.zip")) == [
+        dist_path / "project_name-1.23-shard1.zip"
+    ]
+
+
+@pytest.mark.parametrize(
+    "target_config", [{"shard-max-size": 100_000, "manifest": True}]
+)
+def test_ZippedDirectoryBuilder_shards_manifest(builder, project_root, tmp_path):
+    for n in range(20):
+        project_root.joinpath(f"f{n}").write_bytes(os.urandom(10_000))
+
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    index = json.loads(Path(artifact).read_text())
+    assert len(index["shards"]) > 1
+    for name in index["shards"]:
+        path = tmp_path / "dist" / name
+        assert path.stat().st_size <= 100_000
+        rows = _check_manifest(path, "project_name/RECORD")
+        assert [row[0] for row in rows][-3:] == [
+            "project_name/METADATA.json",
+            "project_name/SHARDS.json",
+            "project_name/RECORD",
+        ]
+
+
+@pytest.mark.parametrize("target_config", [{"shard-max-size": 1000}])
+def test_ZippedDirectoryBuilder_shards_empty(builder, tmp_path):
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    assert json.loads(Path(artifact).read_text()) == {
+        "shards": ["project_name-1.23-shard1.zip"],
+        "files": {},
+    }
+    assert set(zip_contents(tmp_path / "dist/project_name-1.23-shard1.zip")) == {
+        "project_name/METADATA.json",
+        "project_name/SHARDS.json",
+    }
+
+
+@pytest.mark.parametrize("target_config", [{"shard-max-size": 10_000}])
+def test_ZippedDirectoryBuilder_shards_file_too_large(builder, project_root, tmp_path):
+    project_root.joinpath("large").write_bytes(random.Random(42).randbytes(10_000))
+
+    with pytest.raises(ValueError, match="project_name/large .* does not fit"):
+        list(builder.build(directory=os.fspath(tmp_path / "dist")))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZippedDirectoryBuilder_shards_compressible_large_file(
+    builder, project_root, tmp_path, target_config, workers
+):
+    target_config.update(
+        {
+            "compression": "deflated",
+            "shard-max-size": 20_000,
+            "workers": workers,
+            "compression-cache": os.fspath(tmp_path / "cache"),
+            "chunked-deflate-threshold": 1_000_000,
+        }
+    )
+    # Larger than a shard uncompressed, but not once compressed
+    project_root.joinpath("large").write_bytes(b"x" * 3_000_000)
+    project_root.joinpath("small").write_bytes(b"small" * 1000)
+
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+
+    index = json.loads(Path(artifact).read_text())
+    assert set(index["files"]) == {
+        "org.example.project/large",
+        "org.example.project/small",
+    }
+    for name in index["shards"]:
+        path = tmp_path / "dist" / name
+        assert path.stat().st_size <= 20_000
+        with ZipFile(path) as zf:
+            assert zf.testzip() is None
+    large_shard = tmp_path / "dist" / index["files"]["org.example.project/large"]
+    assert zip_contents(large_shard)["org.example.project/large"] == "x" * 3_000_000
+
+
+@pytest.mark.parametrize(
+    "target_config",
+    [
+        {"shard-max-size": 10_000, "output-fd": 1},
+        {"shard-max-size": 10_000, "variants": {"stored": {"compression": "stored"}}},
+    ],
+)
+def test_ZippedDirectoryBuilder_shards_incompatible(builder, tmp_path):
+    with pytest.raises(ValueError, match="may not be combined"):
+        list(builder.build(directory=os.fspath(tmp_path / "dist")))
+
+
+def test_ZippedDirectoryBuilder_build_bytes(builder, project_root, tmp_path):
+    project_root.joinpath("test.txt").write_text("content")
+
+    data = builder.build_bytes()
+
+    assert list(project_root.iterdir()) == [project_root / "test.txt"]
+    (artifact,) = builder.build(directory=os.fspath(tmp_path / "dist"))
+    assert data == Path(artifact).read_bytes()
+
+
+def test_ZippedDirectoryBuilder_build_buffer(builder, project_root):
+    project_root.joinpath("test.txt").write_text("content")
+    buffer = io.BytesIO()
+
+    for content in "first", "second":
+        project_root.joinpath("test.txt").write_text(content)
+        buffer.seek(0)
+        buffer.truncate()
+        assert builder.build_buffer(buffer) is buffer
+
+        buffer.seek(0)
+        contents = zip_contents(buffer)
+        assert contents["org.example.project/test.txt"] == content
+
+
+def test_ZippedDirectoryBuilder_build_bytes_ignores_cache(
+    builder, project_root, tmp_path, target_config
+):
+    project_root.joinpath("test.txt").write_text("content" * 100_000)
+    target_config["compression-cache"] = os.fspath(tmp_path / "cache")
+
+    builder.build_bytes()
+
+    assert not tmp_path.joinpath("cache").exists()
+
+
+def test_ZippedDirectoryBuilder_build_buffer_default(builder, project_root):
+    project_root.joinpath("test.txt").write_text("content")
+
+    buffer = builder.build_buffer()
+
+    assert isinstance(buffer, io.BytesIO)
+    assert "org.example.project/METADATA.json" in zip_contents(buffer)
+
+
 @pytest.mark.parametrize("target_config", [{"reproducible": True}])
 def test_ZippedDirectoryBuilder_reproducible(builder, project_root, tmp_path):
     dist_path = tmp_path / "dist"
@@ -368,6 +2618,113 @@ def test_ZippedDirectoryBuilder_reproducible(builder, project_root, tmp_path):
     assert zip1.read_bytes() == zip2.read_bytes()
 
 
+@pytest.mark.parametrize("target_config", [{"reproducible": True, "workers": 4}])
+def test_ZippedDirectoryBuilder_parallel_reproducible(builder, project_root, tmp_path):
+    _build_test_tree(project_root)
+
+    def build(directory: Path) -> bytes:
+        artifacts = list(builder.build(directory=os.fspath(directory)))
+        assert len(artifacts) == 1
+        return Path(artifacts[0]).read_bytes()
+
+    parallel = build(tmp_path / "parallel")
+    builder.config.target_config["workers"] = 1
+    assert builder.config.workers == 1
+    serial = build(tmp_path / "serial")
+
+    assert parallel == serial
+
+
+@pytest.mark.parametrize("target_config", [{"incremental": True}])
+def test_ZippedDirectoryBuilder_incremental(builder, project_root, tmp_path):
+    dist_path = tmp_path / "dist"
+    _build_test_tree(project_root)
+
+    def build() -> bytes:
+        artifacts = list(builder.build(directory=os.fspath(dist_path)))
+        assert len(artifacts) == 1
+        return Path(artifacts[0]).read_bytes()
+
+    first = build()
+    index_path = dist_path / "project_name-1.23.index.json"
+    assert index_path.is_file()
+    second = build()
+    project_root.joinpath("d1/sub1/f1").write_text("changed")
+    third = build()
+
+    assert second == first
+    assert third != first
+    builder.config.target_config["incremental"] = False
+    assert build() == third
+    # The index would not describe archives built without it
+    assert not index_path.exists()
+
+
+@pytest.mark.parametrize(
+    "target_config", [{"compression": "deflated", "incremental": True}]
+)
+def test_ZippedDirectoryBuilder_incremental_compression_changed(
+    builder, project_root, tmp_path, capsys
+):
+    dist_path = tmp_path / "dist"
+    _build_test_tree(project_root)
+
+    def build(directory: Path, level: int) -> bytes:
+        builder.config.target_config["compression-level"] = level
+        # NB: the config caches its properties
+        builder.config.__dict__.pop("compression", None)
+        artifacts = list(builder.build(directory=os.fspath(directory)))
+        assert len(artifacts) == 1
+        return Path(artifacts[0]).read_bytes()
+
+    build(dist_path, 9)
+    build(dist_path, 9)
+    assert "Reused the compressed data of" in capsys.readouterr().err
+    incremental = build(dist_path, 1)
+    assert "Reused" not in capsys.readouterr().err
+    builder.config.target_config["incremental"] = False
+    assert incremental == build(tmp_path / "clean", 1)
+
+
+@pytest.mark.parametrize(
+    "target_config", [{"compression": "deflated", "store-incompressible": True}]
+)
+def test_ZippedDirectoryBuilder_stores_incompressible(
+    builder, project_root, tmp_path, capsys
+):
+    project_root.joinpath("random").write_bytes(random.Random(42).randbytes(1000))
+
+    artifacts = list(builder.build(directory=os.fspath(tmp_path / "dist")))
+
+    with ZipFile(artifacts[0]) as zf:
+        assert zf.getinfo("project_name/random").compress_type == ZIP_STORED
+    assert "Stored 1 incompressible file(s)" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ZippedDirectoryBuilder_compression_cache(
+    builder, project_root, tmp_path, target_config, workers, capsys
+):
+    _build_test_tree(project_root)
+
+    def build(directory: Path) -> bytes:
+        artifacts = list(builder.build(directory=os.fspath(directory)))
+        assert len(artifacts) == 1
+        return Path(artifacts[0]).read_bytes()
+
+    uncached = build(tmp_path / "uncached")
+    target_config["compression-cache"] = os.fspath(tmp_path / "cache")
+    target_config["workers"] = workers
+    first = build(tmp_path / "first")
+    # NB: the test tree contains some files with identical content
+    assert " 0 miss(es)" not in capsys.readouterr().err
+    second = build(tmp_path / "second")
+    assert " 0 miss(es)" in capsys.readouterr().err
+
+    assert first == uncached
+    assert second == uncached
+
+
 @pytest.mark.parametrize(
     "target_config, install_name",
     [
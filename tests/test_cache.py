@@ -0,0 +1,151 @@
+import os
+from pathlib import Path
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+
+import pytest
+
+from hatch_zipped_directory.cache import CompressionCache
+from hatch_zipped_directory.cache import default_cache_dir
+from hatch_zipped_directory.compression import Compression
+from hatch_zipped_directory.rawzip import compress_file
+
+
+DATA = b"Some data which compresses well. " * 1000
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> CompressionCache:
+    return CompressionCache(tmp_path / "cache", min_size=1024)
+
+
+@pytest.fixture
+def src_path(tmp_path: Path) -> str:
+    path = tmp_path / "src"
+    path.write_bytes(DATA)
+    return os.fspath(path)
+
+
+def cache_entries(cache: CompressionCache) -> list[Path]:
+    return sorted(cache.path.glob("*/*"))
+
+
+def test_default_cache_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", os.fspath(tmp_path))
+    assert default_cache_dir() == tmp_path / "hatch-zipped-directory"
+
+
+def test_default_cache_dir_home(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    assert default_cache_dir() == Path.home() / ".cache/hatch-zipped-directory"
+
+
+def test_CompressionCache(cache: CompressionCache, src_path: str) -> None:
+    compression = Compression(ZIP_DEFLATED)
+    expected = compress_file(src_path, *compression)
+
+    assert cache.compress_file(src_path, compression, len(DATA)) == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(cache_entries(cache)) == 1
+
+    assert cache.compress_file(src_path, compression, len(DATA)) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_CompressionCache_keyed_by_compression(
+    cache: CompressionCache, src_path: str
+) -> None:
+    for compression in (
+        Compression(ZIP_DEFLATED),
+        Compression(ZIP_DEFLATED, 1),
+        Compression(ZIP_BZIP2),
+    ):
+        compressed = cache.compress_file(src_path, compression, len(DATA))
+        assert compressed == compress_file(src_path, *compression)
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert len(cache_entries(cache)) == 3
+
+
+def test_CompressionCache_keyed_by_library_version(
+    cache: CompressionCache, src_path: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    compression = Compression(ZIP_DEFLATED)
+    cache.compress_file(src_path, compression, len(DATA))
+    monkeypatch.setattr(
+        "hatch_zipped_directory.cache._LIBRARY_VERSIONS", {ZIP_DEFLATED: "0.0.0"}
+    )
+
+    cache.compress_file(src_path, compression, len(DATA))
+
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(cache_entries(cache)) == 2
+
+
+def test_CompressionCache_compress_data(cache: CompressionCache, src_path: str) -> None:
+    compression = Compression(ZIP_DEFLATED)
+    expected = compress_file(src_path, *compression)
+
+    assert cache.compress_data(DATA, compression) == expected
+    # Entries are shared with compress_file
+    assert cache.compress_file(src_path, compression, len(DATA)) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.compress_data(b"small", compression).file_size == 5
+    assert len(cache_entries(cache)) == 1
+
+
+def test_CompressionCache_skips_small_files(
+    cache: CompressionCache, tmp_path: Path
+) -> None:
+    path = tmp_path / "small"
+    path.write_bytes(b"small")
+
+    compressed = cache.compress_file(os.fspath(path), Compression(), 5)
+
+    assert compressed == compress_file(os.fspath(path), *Compression())
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert cache_entries(cache) == []
+
+
+@pytest.mark.parametrize("corruption", [b"", b"junk", b"x" * 100])
+def test_CompressionCache_corrupt_entry(
+    cache: CompressionCache, src_path: str, corruption: bytes
+) -> None:
+    compression = Compression(ZIP_DEFLATED)
+    cache.compress_file(src_path, compression, len(DATA))
+    (entry,) = cache_entries(cache)
+    entry.write_bytes(corruption)
+
+    compressed = cache.compress_file(src_path, compression, len(DATA))
+
+    assert compressed == compress_file(src_path, *compression)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert cache.compress_file(src_path, compression, len(DATA)) == compressed
+    assert cache.hits == 1
+
+
+def test_CompressionCache_prune(cache: CompressionCache, tmp_path: Path) -> None:
+    paths = []
+    for n in range(3):
+        path = tmp_path / f"src{n}"
+        path.write_bytes(DATA + bytes([n]))
+        cache.compress_file(os.fspath(path), Compression(), len(DATA) + 1)
+        paths.append(path)
+    entry_size = max(entry.stat().st_size for entry in cache_entries(cache))
+
+    # Make the first entry the most recently used
+    for n, entry in enumerate(cache_entries(cache)):
+        os.utime(entry, (1000 + n, 1000 + n))
+    cache.compress_file(os.fspath(paths[0]), Compression(), len(DATA) + 1)
+
+    cache.max_size = 2 * entry_size
+    cache.prune()
+
+    remaining = cache_entries(cache)
+    assert len(remaining) == 2
+    cache.compress_file(os.fspath(paths[0]), Compression(), len(DATA) + 1)
+    assert cache.hits == 2
+
+
+def test_CompressionCache_prune_empty(cache: CompressionCache) -> None:
+    cache.prune()
+    assert not cache.path.exists()
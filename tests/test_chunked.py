@@ -0,0 +1,87 @@
+import random
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from hatch_zipped_directory.chunked import deflate_file
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+def _test_data(size: int) -> bytes:
+    rng = random.Random(42)
+    words = [rng.randbytes(rng.randrange(1, 8)) for _ in range(1000)]
+    data = b" ".join(rng.choice(words) for _ in range(size // 4 + 1))
+    return data[:size]
+
+
+def _inflate(data: bytes) -> bytes:
+    decompressor = zlib.decompressobj(-15)
+    result = decompressor.decompress(data)
+    assert decompressor.eof
+    assert decompressor.unused_data == b""
+    return result
+
+
+@pytest.mark.parametrize(
+    "size", [1, BLOCK_SIZE - 1, BLOCK_SIZE, 4 * BLOCK_SIZE, 4 * BLOCK_SIZE + 17]
+)
+@pytest.mark.parametrize("compresslevel", [None, 1, 9])
+def test_deflate_file(tmp_path: Path, size: int, compresslevel) -> None:
+    path = tmp_path / "test"
+    data = _test_data(size)
+    path.write_bytes(data)
+
+    blocks = list(deflate_file(str(path), compresslevel, block_size=BLOCK_SIZE))
+
+    assert len(blocks) == max(1, -(-size // BLOCK_SIZE))
+    assert sum(block.file_size for block in blocks) == size
+    assert blocks[0].CRC == zlib.crc32(data[:BLOCK_SIZE])
+    assert _inflate(b"".join(block.data for block in blocks)) == data
+
+
+@pytest.mark.parametrize("workers, max_pending", [(1, 1), (4, 8)])
+def test_deflate_file_parallel(tmp_path: Path, workers: int, max_pending: int) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(_test_data(10 * BLOCK_SIZE + 5))
+
+    serial = list(deflate_file(str(path), block_size=BLOCK_SIZE))
+    with ThreadPoolExecutor(workers) as executor:
+        parallel = list(
+            deflate_file(
+                str(path),
+                executor=executor,
+                max_pending=max_pending,
+                block_size=BLOCK_SIZE,
+            )
+        )
+
+    assert parallel == serial
+
+
+def test_deflate_file_compression_ratio(tmp_path: Path) -> None:
+    path = tmp_path / "test"
+    data = _test_data(16 * BLOCK_SIZE)
+    path.write_bytes(data)
+
+    blocks = list(deflate_file(str(path), block_size=BLOCK_SIZE))
+
+    # Using the preceding block as a dictionary loses little compression
+    chunked_size = sum(block.compress_size for block in blocks)
+    single_stream_size = len(zlib.compress(data, wbits=-15))
+    assert chunked_size < single_stream_size * 1.01
+
+
+def test_deflate_file_cancels_pending(tmp_path: Path) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(_test_data(10 * BLOCK_SIZE))
+
+    with ThreadPoolExecutor(1) as executor:
+        blocks = deflate_file(
+            str(path), executor=executor, max_pending=4, block_size=BLOCK_SIZE
+        )
+        next(blocks)
+        blocks.close()
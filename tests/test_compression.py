@@ -0,0 +1,127 @@
+import random
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
+
+import pytest
+
+from hatch_zipped_directory.compression import Compression
+from hatch_zipped_directory.compression import CompressionRules
+from hatch_zipped_directory.compression import estimate_savings
+from hatch_zipped_directory.compression import get_compression
+from hatch_zipped_directory.compression import ZIP_ZSTANDARD
+from hatch_zipped_directory.compression import zstd_supported
+from hatch_zipped_directory.rawzip import compress_bytes
+
+requires_zstd = pytest.mark.skipif(
+    not zstd_supported(), reason="zstd requires python >= 3.14"
+)
+
+
+@pytest.mark.parametrize(
+    "method, level, expected",
+    [
+        ("stored", None, Compression(ZIP_STORED)),
+        ("deflated", None, Compression(ZIP_DEFLATED)),
+        ("deflated", 0, Compression(ZIP_DEFLATED, 0)),
+        ("deflated", 9, Compression(ZIP_DEFLATED, 9)),
+        ("bzip2", 1, Compression(ZIP_BZIP2, 1)),
+        ("lzma", None, Compression(ZIP_LZMA)),
+    ],
+)
+def test_get_compression(method: str, level: int | None, expected) -> None:
+    assert get_compression(method, level) == expected
+
+
+def test_get_compression_unknown_method() -> None:
+    with pytest.raises(ValueError, match="(?i)unknown compression method"):
+        get_compression("zip")
+
+
+@pytest.mark.parametrize("method", ["stored", "lzma"])
+def test_get_compression_level_not_supported(method: str) -> None:
+    with pytest.raises(ValueError, match="does not support compression levels"):
+        get_compression(method, 1)
+
+
+@pytest.mark.parametrize("method, level", [("deflated", 10), ("bzip2", 0)])
+def test_get_compression_level_out_of_range(method: str, level: int) -> None:
+    with pytest.raises(ValueError, match="must be between"):
+        get_compression(method, level)
+
+
+@requires_zstd
+@pytest.mark.parametrize("level", [None, 1, 19, -5])
+def test_get_compression_zstd(level: int | None) -> None:
+    assert get_compression("zstd", level) == Compression(ZIP_ZSTANDARD, level)
+
+
+@requires_zstd
+def test_get_compression_zstd_level_out_of_range() -> None:
+    with pytest.raises(ValueError, match="must be between"):
+        get_compression("zstd", 100)
+
+
+@requires_zstd
+def test_compress_bytes_zstd() -> None:
+    from compression import zstd
+
+    compressed = compress_bytes(b"content" * 1000, ZIP_ZSTANDARD, 3)
+    assert compressed.compress_size < 1000
+    assert zstd.decompress(compressed.data) == b"content" * 1000
+
+
+@pytest.mark.skipif(zstd_supported(), reason="zstd is supported")
+def test_get_compression_zstd_unsupported() -> None:
+    with pytest.raises(ValueError, match="requires python 3.14 or later"):
+        get_compression("zstd")
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("image.png", Compression(ZIP_STORED)),
+        ("sub/dir/image.png", Compression(ZIP_STORED)),
+        ("data/file.txt", Compression(ZIP_BZIP2, 9)),
+        ("data/image.png", Compression(ZIP_STORED)),
+        ("file.txt", Compression(ZIP_DEFLATED, 1)),
+    ],
+)
+def test_CompressionRules(path: str, expected: Compression) -> None:
+    rules = CompressionRules(
+        Compression(ZIP_DEFLATED, 1),
+        [
+            ("*.png", Compression(ZIP_STORED)),
+            ("/data/", Compression(ZIP_BZIP2, 9)),
+        ],
+    )
+    assert rules.for_path(path) == expected
+
+
+def test_CompressionRules_default() -> None:
+    assert CompressionRules().for_path("foo") == Compression(ZIP_DEFLATED)
+
+
+def test_estimate_savings(tmp_path) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(b"compressible " * 10000)
+
+    savings, cpu_time_per_byte = estimate_savings(str(path), Compression())
+    assert savings > 0.9
+    assert cpu_time_per_byte >= 0
+
+
+def test_estimate_savings_random(tmp_path) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(random.Random(42).randbytes(100_000))
+
+    savings, _ = estimate_savings(str(path), Compression())
+    assert savings < 0.01
+
+
+def test_estimate_savings_empty(tmp_path) -> None:
+    path = tmp_path / "test"
+    path.touch()
+
+    assert estimate_savings(str(path), Compression()) == (0.0, 0.0)
@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 from hatchling.plugin.manager import PluginManager
 
 from hatch_zipped_directory.builder import ZippedDirectoryBuilder
@@ -6,3 +9,15 @@ from hatch_zipped_directory.builder import ZippedDirectoryBuilder
 def test_hooks():
     plugin_manager = PluginManager()
     assert plugin_manager.builder.get("zipped-directory") is ZippedDirectoryBuilder
+
+
+def test_hooks_import_is_lazy():
+    # Hatch imports the hooks module whenever it loads plugins
+    code = (
+        "import sys, hatch_zipped_directory.hooks as hooks;"
+        "assert 'hatch_zipped_directory.builder' not in sys.modules;"
+        "assert 'hatchling.builders.config' not in sys.modules;"
+        "assert hooks.hatch_register_builder().PLUGIN_NAME == 'zipped-directory';"
+        "assert 'hatch_zipped_directory.builder' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
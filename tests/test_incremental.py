@@ -0,0 +1,88 @@
+import hashlib
+from pathlib import Path
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+
+import pytest
+
+from hatch_zipped_directory.compression import Compression
+from hatch_zipped_directory.incremental import BuildIndex
+from hatch_zipped_directory.incremental import file_sha256
+from hatch_zipped_directory.incremental import IndexEntry
+from hatch_zipped_directory.incremental import SourceDigest
+from hatch_zipped_directory.manifest import FileDigest
+
+DATA = b"Some data. " * 1000
+
+ENTRY = IndexEntry(ZIP_DEFLATED, 9, 1000, 123456789, "0" * 64, 42, 100)
+
+
+def test_IndexEntry_compression() -> None:
+    assert ENTRY.compression == Compression(ZIP_DEFLATED, 9)
+    assert ENTRY._replace(
+        compress_type=ZIP_STORED, compresslevel=None
+    ).compression == Compression(ZIP_STORED)
+
+
+def test_BuildIndex_round_trip(tmp_path: Path) -> None:
+    settings = {"chunked_deflate_threshold": None, "version": "1.0"}
+    index = BuildIndex(settings)
+    index.add("root/file", ENTRY)
+    path = tmp_path / "index.json"
+    path.write_text(index.dumps())
+
+    loaded = BuildIndex.load(path, dict(settings))
+
+    assert loaded.entries == {"root/file": ENTRY}
+    assert loaded.settings == settings
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None,
+        "",
+        "not json",
+        "[]",
+        '{"version": 1}',
+        '{"version": 0, "settings": {}, "entries": {}}',
+        '{"version": 1, "settings": {}, "entries": {"a": [1]}}',
+    ],
+)
+def test_BuildIndex_load_invalid(tmp_path: Path, content: str | None) -> None:
+    path = tmp_path / "index.json"
+    if content is not None:
+        path.write_text(content)
+
+    assert BuildIndex.load(path, {}).entries == {}
+
+
+def test_BuildIndex_load_other_settings(tmp_path: Path) -> None:
+    index = BuildIndex({"chunked_deflate_threshold": 1000})
+    index.add("root/file", ENTRY)
+    path = tmp_path / "index.json"
+    path.write_text(index.dumps())
+
+    assert BuildIndex.load(path, {"chunked_deflate_threshold": None}).entries == {}
+
+
+def test_SourceDigest() -> None:
+    other = FileDigest("md5")
+    digest = SourceDigest(other)
+    digest.update(b"discarded")
+    digest.begin()
+    digest.update(DATA)
+
+    assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
+    expected = FileDigest("md5")
+    expected.update(DATA)
+    assert other.record_hash() == expected.record_hash()
+
+
+def test_file_sha256(tmp_path: Path) -> None:
+    path = tmp_path / "file"
+    path.write_bytes(DATA)
+    digest = FileDigest("sha256")
+
+    assert file_sha256(str(path), digest=digest) == hashlib.sha256(DATA).hexdigest()
+    assert digest.hexdigest() == hashlib.sha256(DATA).hexdigest()
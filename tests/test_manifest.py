@@ -0,0 +1,35 @@
+import pytest
+
+from hatch_zipped_directory.manifest import FileDigest
+from hatch_zipped_directory.manifest import Manifest
+from hatch_zipped_directory.manifest import ManifestEntry
+
+
+def test_FileDigest() -> None:
+    digest = FileDigest("sha256")
+    digest.update(b"partial")
+    # Restarting discards the data read so far
+    digest.begin()
+    digest.update(b"da")
+    digest.update(memoryview(b"ta"))
+    assert digest.record_hash() == (
+        "sha256=Om6weQ85rIfJTzhWst0sXREOaBFgImGpqSPTuyOtyLc"
+    )
+
+
+def test_Manifest() -> None:
+    manifest = Manifest("md5")
+    digest = manifest.new_digest()
+    digest.update(b"data")
+    manifest.add("root/file,name", digest, 4)
+
+    assert manifest.entries == [
+        ManifestEntry("root/file,name", "md5=jXd_OF09_siBXSD3SWAm3A", 4)
+    ]
+    assert manifest.to_csv() == '"root/file,name",md5=jXd_OF09_siBXSD3SWAm3A,4\n'
+    assert manifest.to_csv("root/RECORD").endswith("\nroot/RECORD,,\n")
+
+
+def test_Manifest_unknown_algorithm() -> None:
+    with pytest.raises(ValueError, match="Unknown digest algorithm `nope`"):
+        Manifest("nope")
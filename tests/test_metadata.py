@@ -1,8 +1,17 @@
+import email
 import inspect
+import json
+from email.message import Message
+from pathlib import Path
 
 import pytest
+from hatchling.metadata.core import ProjectMetadata
+from hatchling.metadata.spec import DEFAULT_METADATA_VERSION
+from hatchling.metadata.spec import get_core_metadata_constructors
 
+from hatch_zipped_directory.metadata import _dedent
 from hatch_zipped_directory.metadata import metadata_to_json
+from hatch_zipped_directory.metadata import render_metadata_json
 
 
 REQUIRED_METADATA = (
@@ -116,3 +125,115 @@ def test_metadata_to_json_description() -> None:
         "description": description,
     }
     assert metadata_to_json(metadata) == expected
+
+
+_EMAIL_MULTIPLE_USE_KEYS = {
+    key.lower()
+    for key in [
+        # PEP 345 (1.2)
+        "Platform",
+        "Supported-Platform",
+        "Classifier",
+        "Requires-Dist",
+        "Provides-Dist",
+        "Obsoletes-Dist",
+        "Requires-External",
+        "Project-URL",
+        # PEP 566 (2.1)
+        "Provides-Extra",
+        # PEP 643
+        "Dynamic",
+        # PEP 639
+        "License-File",
+    ]
+}
+
+
+def _email_get_value(headers: Message, key: str) -> str | list[str]:
+    lkey = key.lower()
+    if lkey in _EMAIL_MULTIPLE_USE_KEYS:
+        return list(map(_dedent, headers.get_all(key, [])))
+    elif lkey == "keywords":
+        return _dedent(headers[key]).split(",")
+    return _dedent(headers[key])
+
+
+def _email_metadata_to_json(metadata: str) -> dict[str, str | list[str]]:
+    """The previous, ``email``-based implementation of ``metadata_to_json``.
+
+    This (and its list of multiple-use keys) is kept as it was, rather
+    than shared with the module, so that it remains a fixed reference.
+    """
+    headers = email.message_from_string(metadata)
+    assert not headers.is_multipart()
+    description = headers.get_payload()
+    assert isinstance(description, str)
+
+    data: dict[str, str | list[str]] = {}
+    for key in headers:
+        json_key = key.lower().replace("-", "_")
+        if json_key not in data:
+            data[json_key] = _email_get_value(headers, key)
+
+    if description:
+        data["description"] = description
+
+    return data
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        REQUIRED_METADATA,
+        "Name: x\r\nLicense: a\r\n  b\r\n\r\nbody\r\n",
+        "Name: x\rSummary: s\r\rbody",
+        "Name: x\nnot a header\nSummary: s\n\nbody\n",
+        " continuation\nName: x\n",
+        "Name: x\n:no name\nX-Y:no space\nZ:\n",
+        "Name: x\n\tcontinued\n \n\n\nbody\n",
+        "Name: x\n\nbody\nwith a blank line\n\nSummary: not a header\n",
+        "Name: x",
+        "",
+        "Name: x\nProvides-Extra: a\nProvides-Extra: b\nprovides-extra: c\n",
+        "Name: x\nLicense-File: LICENSE\nLicense-File: NOTICE\n  continued\n",
+        "Name: x\nDynamic: Version\nSummary: s\nDynamic: Requires-Dist\n",
+        "Name: x\nPlatform: a\nSupported-Platform: b\nProvides-Dist: c\n"
+        "Obsoletes-Dist: d\nRequires-External: e\nPlatform: f\n",
+    ],
+)
+def test_metadata_to_json_matches_email(metadata: str) -> None:
+    assert metadata_to_json(metadata) == _email_metadata_to_json(metadata)
+
+
+def test_metadata_to_json_matches_email_hatchling(tmp_path: Path) -> None:
+    config = {
+        "project": {
+            "name": "big-project",
+            "version": "1.0",
+            "description": "A project with a lot of metadata",
+            "readme": {
+                "content-type": "text/markdown",
+                "text": "# Big\n\n" + "Some text.\n\n" * 1000,
+            },
+            "license": {"text": "Copyright\nAll rights\n  reserved"},
+            "keywords": ["a", "b c"],
+            "classifiers": [f"Private :: Thing :: {n}" for n in range(300)],
+            "dependencies": [f"dep{n}>={n}" for n in range(300)],
+            "urls": {"Homepage": "https://example.org"},
+        }
+    }
+    metadata = ProjectMetadata(str(tmp_path), None, config)
+    text = get_core_metadata_constructors()[DEFAULT_METADATA_VERSION](metadata)
+
+    data = metadata_to_json(text)
+    assert data == _email_metadata_to_json(text)
+    assert len(data["classifier"]) == 300
+    assert data["license"] == "Copyright\nAll rights\n  reserved"
+
+
+def test_render_metadata_json() -> None:
+    render_metadata_json.cache_clear()
+    rendered = render_metadata_json(REQUIRED_METADATA)
+    assert json.loads(rendered) == REQUIRED_METADATA_JSON
+    assert render_metadata_json(REQUIRED_METADATA) is rendered
+    assert render_metadata_json.cache_info().hits == 1
@@ -0,0 +1,155 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from hatch_zipped_directory.output import CoalescingWriter
+
+
+def test_CoalescingWriter_coalesces_writes(tmp_path: Path) -> None:
+    with open(tmp_path / "out", "w+b", buffering=0) as fp:
+        with CoalescingWriter(fp, 100) as writer:
+            for n in range(30):
+                writer.write(b"%d," % n)
+            assert writer.tell() == 80
+            assert writer.writes == 0
+            writer.write(b"x" * 30)
+            assert writer.writes == 1
+        assert writer.bytes_written == 110
+    assert (tmp_path / "out").read_bytes() == (
+        b"".join(b"%d," % n for n in range(30)) + b"x" * 30
+    )
+
+
+def test_CoalescingWriter_patches_buffer() -> None:
+    fp = io.BytesIO()
+    writer = CoalescingWriter(fp, 100)
+    writer.write(b"header....data")
+    writer.seek(6)
+    writer.write(b"!!!!")
+    writer.seek(0, os.SEEK_END)
+    writer.write(b"more")
+    writer.close()
+    assert fp.getvalue() == b"header!!!!datamore"
+    assert writer.writes == 1
+
+
+class _UnseekableBytesIO(io.BytesIO):
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        raise OSError("unseekable")
+
+
+@pytest.mark.parametrize("buffer_class", [io.BytesIO, _UnseekableBytesIO])
+def test_CoalescingWriter_bounded_buffer(buffer_class: type[io.BytesIO]) -> None:
+    fp = buffer_class()
+    writer = CoalescingWriter(fp, 1024)
+    sizes = []
+    for data in b"h" * 10, b"d" * 10_000_000, b"x" * 1000, b"y" * 1000:
+        writer.write(data)
+        sizes.append(len(writer._buffer))
+    writer.close()
+
+    assert max(sizes) <= 1024
+    assert fp.getvalue() == b"h" * 10 + b"d" * 10_000_000 + b"x" * 1000 + b"y" * 1000
+    # The large write bypasses the buffer
+    assert writer.writes == 4
+
+
+def test_CoalescingWriter_overlapping_write() -> None:
+    """A write which starts in the buffer, but would overflow it."""
+    fp = io.BytesIO()
+    with CoalescingWriter(fp, 8) as writer:
+        writer.write(b"012345")
+        writer.seek(4)
+        writer.write(b"abcdefgh")
+        assert len(writer._buffer) <= 8
+        writer.write(b"!")
+    assert fp.getvalue() == b"0123abcdefgh!"
+
+
+def test_CoalescingWriter_seek_outside_buffer() -> None:
+    fp = io.BytesIO()
+    with CoalescingWriter(fp, 4) as writer:
+        writer.write(b"0123456789")
+        writer.write(b"ab")
+        writer.seek(2)
+        writer.write(b"XY")
+        assert writer.seek(-1, os.SEEK_CUR) == 3
+        writer.write(b"Z")
+        writer.seek(12)
+        writer.write(b"c")
+    assert fp.getvalue() == b"01XZ456789abc"
+
+
+def test_CoalescingWriter_write_behind_buffer(tmp_path: Path) -> None:
+    """Data may be written to the underlying file after a flush."""
+    with open(tmp_path / "out", "w+b") as fp:
+        with CoalescingWriter(fp, 100) as writer:
+            writer.write(b"head")
+            writer.flush()
+            start = writer.tell()
+            os.write(writer.fileno(), b"direct")
+            writer.seek(start + 6)
+            writer.write(b"tail")
+    assert (tmp_path / "out").read_bytes() == b"headdirecttail"
+
+
+def test_CoalescingWriter_unseekable() -> None:
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, "rb") as reader, open(write_fd, "wb") as fp:
+        with CoalescingWriter(fp, 100) as writer:
+            assert not writer.seekable()
+            with pytest.raises(OSError):
+                writer.tell()
+            with pytest.raises(OSError):
+                writer.seek(0)
+            writer.write(b"data")
+        fp.close()
+        assert reader.read() == b"data"
+
+
+def test_CoalescingWriter_preallocate(tmp_path: Path) -> None:
+    if not hasattr(os, "posix_fallocate"):
+        pytest.skip("posix_fallocate is not available")
+    with open(tmp_path / "out", "w+b") as fp:
+        writer = CoalescingWriter(fp, 100, preallocate=100_000)
+        if not writer.preallocated:
+            pytest.skip("the filesystem does not support preallocation")
+        assert os.fstat(fp.fileno()).st_size == 100_000
+        writer.write(b"data")
+        writer.close()
+    assert (tmp_path / "out").read_bytes() == b"data"
+    assert writer.stats.to_dict()["preallocated"] == 100_000
+
+
+def test_CoalescingWriter_invalid_whence() -> None:
+    writer = CoalescingWriter(io.BytesIO(), 100)
+    with pytest.raises(ValueError, match="Invalid whence"):
+        writer.seek(0, 3)
+
+
+class _ShortWrites(io.RawIOBase):
+    """An unbuffered file which writes at most three bytes at a time."""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.data += bytes(data[:3])
+        return min(len(data), 3)
+
+
+def test_CoalescingWriter_short_writes() -> None:
+    fp = _ShortWrites()
+    with CoalescingWriter(fp, 4) as writer:  # type: ignore[arg-type]
+        writer.write(b"0123456789")
+        writer.write(b"ab")
+    assert fp.data == b"0123456789ab"
+    assert writer.writes == 5
@@ -0,0 +1,227 @@
+import io
+import re
+import sys
+import zlib
+from pathlib import Path
+from zipfile import BadZipFile
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
+from zipfile import ZipFile
+from zipfile import ZipInfo
+
+import pytest
+
+from hatch_zipped_directory.chunked import deflate_file
+from hatch_zipped_directory.rawzip import can_sendfile
+from hatch_zipped_directory.rawzip import compress_bytes
+from hatch_zipped_directory.rawzip import compress_file
+from hatch_zipped_directory.rawzip import crc32_combine
+from hatch_zipped_directory.rawzip import read_raw
+from hatch_zipped_directory.rawzip import sendfile_stored
+from hatch_zipped_directory.rawzip import write_raw
+from hatch_zipped_directory.rawzip import write_raw_blocks
+
+
+DATA = b"Some data which compresses well. " * 1000
+
+
+def _zinfo(name: str, compress_type: int) -> ZipInfo:
+    zinfo = ZipInfo(name, date_time=(2020, 2, 2, 0, 0, 0))
+    zinfo.compress_type = compress_type
+    return zinfo
+
+
+@pytest.mark.parametrize(
+    "compress_type", [ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2, ZIP_LZMA]
+)
+@pytest.mark.parametrize("compresslevel", [None, 1])
+def test_write_raw_matches_zipfile(compress_type: int, compresslevel) -> None:
+    expected = io.BytesIO()
+    with ZipFile(expected, "w") as zf:
+        zinfo = _zinfo("test", compress_type)
+        zinfo._compresslevel = compresslevel
+        zf.writestr(zinfo, DATA)
+
+    result = io.BytesIO()
+    with ZipFile(result, "w") as zf:
+        zinfo = _zinfo("test", compress_type)
+        zinfo.file_size = len(DATA)
+        write_raw(zf, zinfo, compress_bytes(DATA, compress_type, compresslevel))
+
+    assert result.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize("compress_type", [ZIP_STORED, ZIP_DEFLATED])
+def test_compress_file(tmp_path: Path, compress_type: int) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(DATA)
+
+    assert compress_file(str(path), compress_type) == compress_bytes(
+        DATA, compress_type
+    )
+
+
+def test_read_raw() -> None:
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as zf:
+        zf.writestr("first", b"first")
+        zf.writestr(_zinfo("test", ZIP_DEFLATED), DATA)
+
+    with ZipFile(buf) as zf:
+        compressed = read_raw(zf, zf.getinfo("test"))
+
+    assert compressed == compress_bytes(DATA, ZIP_DEFLATED)
+
+
+def test_read_raw_bad_header() -> None:
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as zf:
+        zf.writestr("test", DATA)
+
+    with ZipFile(buf) as zf:
+        zinfo = zf.getinfo("test")
+        zinfo.header_offset += 1
+        with pytest.raises(BadZipFile, match="Bad magic number"):
+            read_raw(zf, zinfo)
+
+
+def test_read_raw_truncated() -> None:
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as zf:
+        zf.writestr("test", DATA)
+
+    with ZipFile(buf) as zf:
+        zinfo = zf.getinfo("test")
+        zinfo.compress_size += len(buf.getvalue())
+        with pytest.raises(BadZipFile, match="Truncated"):
+            read_raw(zf, zinfo)
+
+
+def test_read_raw_encrypted() -> None:
+    buf = io.BytesIO()
+    with ZipFile(buf, "w") as zf:
+        zf.writestr("test", DATA)
+
+    with ZipFile(buf) as zf:
+        zinfo = zf.getinfo("test")
+        zinfo.flag_bits |= 0x01
+        with pytest.raises(ValueError, match="^Entry 'test' of archive is encrypted"):
+            read_raw(zf, zinfo)
+
+
+def test_read_raw_encrypted_names_archive(tmp_path: Path) -> None:
+    path = tmp_path / "test.zip"
+    with ZipFile(path, "w") as zf:
+        zf.writestr("test", DATA)
+
+    with ZipFile(path) as zf:
+        zinfo = zf.getinfo("test")
+        zinfo.flag_bits |= 0x01
+        with pytest.raises(ValueError, match=f"'test' of {re.escape(str(path))} "):
+            read_raw(zf, zinfo)
+
+
+@pytest.mark.parametrize("split", [0, 1, 1000, len(DATA) - 1, len(DATA)])
+def test_crc32_combine(split: int) -> None:
+    first, second = DATA[:split], DATA[split:]
+    assert crc32_combine(
+        zlib.crc32(first), zlib.crc32(second), len(second)
+    ) == zlib.crc32(DATA)
+
+
+def test_write_raw_blocks_matches_write_raw() -> None:
+    expected = io.BytesIO()
+    with ZipFile(expected, "w") as zf:
+        zinfo = _zinfo("test", ZIP_STORED)
+        zinfo.file_size = len(DATA)
+        write_raw(zf, zinfo, compress_bytes(DATA, ZIP_STORED))
+
+    result = io.BytesIO()
+    with ZipFile(result, "w") as zf:
+        zinfo = _zinfo("test", ZIP_STORED)
+        zinfo.file_size = len(DATA)
+        blocks = [
+            compress_bytes(DATA[i : i + 1000], ZIP_STORED)
+            for i in range(0, len(DATA), 1000)
+        ]
+        write_raw_blocks(zf, zinfo, ZIP_STORED, blocks)
+
+    assert result.getvalue() == expected.getvalue()
+    with ZipFile(result) as zf:
+        assert zf.read("test") == DATA
+
+
+class _Unseekable(io.RawIOBase):
+    """A writable stream which, like a pipe, does not support seek or tell."""
+
+    def __init__(self) -> None:
+        self.buffer = io.BytesIO()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        return self.buffer.write(data)
+
+
+def test_write_raw_blocks_unseekable(tmp_path: Path) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(DATA)
+
+    stream = _Unseekable()
+    with ZipFile(stream, "w") as zf:
+        zinfo = _zinfo("test", ZIP_DEFLATED)
+        zinfo.file_size = len(DATA)
+        blocks = deflate_file(str(path), None, block_size=1000)
+        write_raw_blocks(zf, zinfo, ZIP_DEFLATED, blocks)
+        write_raw(zf, _zinfo("other", ZIP_STORED), compress_bytes(b"x", ZIP_STORED))
+
+    with ZipFile(io.BytesIO(stream.buffer.getvalue())) as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("test").flag_bits & 0x08  # data descriptor
+        assert zf.read("test") == DATA
+        assert zf.read("other") == b"x"
+
+
+@pytest.mark.parametrize("compress_type", [ZIP_STORED, ZIP_DEFLATED])
+def test_write_raw_unseekable(compress_type: int) -> None:
+    expected = _Unseekable()
+    with ZipFile(expected, "w") as zf:
+        with zf.open(_zinfo("test", compress_type), "w") as fp:
+            fp.write(DATA)
+
+    result = _Unseekable()
+    with ZipFile(result, "w") as zf:
+        zinfo = _zinfo("test", compress_type)
+        zinfo.file_size = len(DATA)
+        write_raw(zf, zinfo, compress_bytes(DATA, compress_type))
+
+    assert result.buffer.getvalue() == expected.buffer.getvalue()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="linux only")
+@pytest.mark.parametrize("data", [b"", DATA])
+def test_sendfile_stored(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / "test"
+    path.write_bytes(data)
+
+    expected = tmp_path / "expected.zip"
+    with ZipFile(expected, "w") as zf:
+        zinfo = _zinfo("test", ZIP_STORED)
+        zf.writestr(zinfo, data)
+        zf.writestr("other", "other")
+
+    result = tmp_path / "result.zip"
+    with ZipFile(result, "w") as zf:
+        assert can_sendfile(zf)
+        sendfile_stored(zf, _zinfo("test", ZIP_STORED), str(path))
+        zf.writestr("other", "other")
+
+    assert result.read_bytes() == expected.read_bytes()
+
+
+def test_can_sendfile_in_memory() -> None:
+    with ZipFile(io.BytesIO(), "w") as zf:
+        assert not can_sendfile(zf)
@@ -0,0 +1,109 @@
+import sys
+import time
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+
+import pytest
+
+from hatch_zipped_directory.output import OutputStats
+from hatch_zipped_directory.report import BuildReport
+
+
+def test_phase() -> None:
+    report = BuildReport()
+    with report.phase("outer"):
+        time.sleep(0.01)
+        with report.phase("inner"):
+            time.sleep(0.02)
+        with report.phase("outer"):
+            time.sleep(0.01)
+
+    assert set(report.phases) == {"outer", "inner"}
+    assert 0.02 <= report.phases["outer"] < 0.04
+    assert report.phases["inner"] >= 0.02
+
+
+def test_phase_on_error() -> None:
+    report = BuildReport()
+    with pytest.raises(RuntimeError):
+        with report.phase("failing"):
+            raise RuntimeError("test")
+    with report.phase("next"):
+        pass
+    assert set(report.phases) == {"failing", "next"}
+
+
+def test_iter_phase() -> None:
+    def slow_items():
+        for n in range(3):
+            time.sleep(0.01)
+            yield n
+
+    report = BuildReport()
+    with report.phase("consume"):
+        items = []
+        for item in report.iter_phase("produce", slow_items()):
+            items.append(item)
+
+    assert items == [0, 1, 2]
+    assert report.phases["produce"] >= 0.03
+    assert report.phases["consume"] < report.phases["produce"]
+
+
+def test_to_dict() -> None:
+    report = BuildReport()
+    report.record_entry("a", 2_000_000, 1_000_000, ZIP_DEFLATED, 0.5)
+    report.record_entry("b", 1_000_000, 1_000_000, ZIP_STORED, 0.5)
+
+    summary = report.to_dict(extra={"key": "value"})
+
+    assert summary["totals"]["entries"] == 2
+    assert summary["totals"]["size"] == 3_000_000
+    assert summary["totals"]["compressed_size"] == 2_000_000
+    assert summary["totals"]["compression_throughput_mb_s"] == pytest.approx(3.0)
+    assert summary["totals"]["throughput_mb_s"] > 0
+    assert summary["extra"] == {"key": "value"}
+    assert list(summary)[-1] == "entries"
+    assert summary["entries"] == [
+        {
+            "name": "a",
+            "size": 2_000_000,
+            "compressed_size": 1_000_000,
+            "method": "deflated",
+            "compression_time": 0.5,
+        },
+        {
+            "name": "b",
+            "size": 1_000_000,
+            "compressed_size": 1_000_000,
+            "method": "stored",
+            "compression_time": 0.5,
+        },
+    ]
+
+
+def test_to_dict_empty() -> None:
+    summary = BuildReport().to_dict()
+    assert summary["totals"]["entries"] == 0
+    assert summary["totals"]["compression_throughput_mb_s"] is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="linux only")
+def test_to_dict_io(tmp_path) -> None:
+    report = BuildReport()
+    for n in range(10):
+        (tmp_path / f"file{n}").write_bytes(b"data")
+
+    io = report.to_dict()["io"]
+    assert io["write_syscalls"] >= 10
+    assert io["write_bytes"] >= 40
+    assert set(io) == {"read_syscalls", "write_syscalls", "read_bytes", "write_bytes"}
+
+
+def test_to_dict_output() -> None:
+    report = BuildReport()
+    assert report.to_dict()["output"] is None
+    report.output = OutputStats(1024, 2, 2000, 0.001, 0)
+    output = report.to_dict()["output"]
+    assert output["writes"] == 2
+    assert output["write_throughput_mb_s"] == pytest.approx(2.0)
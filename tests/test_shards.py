@@ -0,0 +1,93 @@
+import io
+import os
+import random
+import zipfile
+from zipfile import ZIP_BZIP2
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_LZMA
+from zipfile import ZIP_STORED
+from zipfile import ZipFile
+
+import pytest
+
+from hatch_zipped_directory.compression import ZIP_ZSTANDARD
+from hatch_zipped_directory.compression import zstd_supported
+from hatch_zipped_directory.shards import entry_size_bound
+from hatch_zipped_directory.shards import plan_shards
+
+
+@pytest.mark.parametrize(
+    "compression",
+    [
+        ZIP_STORED,
+        ZIP_DEFLATED,
+        ZIP_BZIP2,
+        ZIP_LZMA,
+        pytest.param(
+            ZIP_ZSTANDARD,
+            marks=pytest.mark.skipif(
+                not zstd_supported(), reason="zstd requires python >= 3.14"
+            ),
+        ),
+    ],
+)
+@pytest.mark.parametrize("size", [0, 1, 1000, 300_000, 3_000_000])
+def test_entry_size_bound(compression: int, size: int) -> None:
+    data = random.Random(42).randbytes(size)
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w", compression=compression) as zf:
+        zf.writestr("dir/name", data)
+    empty = io.BytesIO()
+    with ZipFile(empty, "w"):
+        pass
+
+    entry_size = len(buffer.getvalue()) - len(empty.getvalue())
+    assert entry_size <= entry_size_bound(size, "dir/name")
+
+
+def test_plan_shards() -> None:
+    items = [(n, [f"f{n}"], 100) for n in range(10)]
+
+    shards = plan_shards(items, 350, 0, directory_entries=False)
+
+    # NB: 128 bytes are allowed for the end of the central directory
+    assert [shard.items for shard in shards] == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+    assert shards[0].names == ["f0", "f1"]
+    assert shards[0].size == 200
+
+
+def test_plan_shards_reserved() -> None:
+    items = [(n, [f"f{n}"], 100) for n in range(4)]
+
+    shards = plan_shards(items, 450, 100, directory_entries=False)
+
+    assert [shard.items for shard in shards] == [[0, 1], [2, 3]]
+
+
+def test_plan_shards_directory_entries() -> None:
+    items = [("a", ["d/a"], 100), ("b", ["d/b"], 100), ("c", ["e/c"], 100)]
+
+    (shard,) = plan_shards(items, 10_000, 0)
+
+    # Each directory is counted once
+    assert shard.size == 300 + 2 * (128 + 2 * len("d/"))
+
+
+def test_plan_shards_too_large() -> None:
+    items = [("a", ["a"], 100), ("b", ["b"], 1000)]
+
+    with pytest.raises(ValueError, match="^b .* does not fit in a shard of 500 bytes"):
+        plan_shards(items, 500, 0)
+
+
+def test_plan_shards_empty() -> None:
+    assert plan_shards([], 500, 0) == []
+
+
+def test_entry_size_bound_zip64(tmp_path) -> None:
+    """The bound allows for zip64 extra fields."""
+    path = tmp_path / "test.zip"
+    with ZipFile(path, "w") as zf:
+        with zf.open(zipfile.ZipInfo("name"), "w", force_zip64=True) as fp:
+            fp.write(b"data")
+    assert os.path.getsize(path) - 22 <= entry_size_bound(4, "name")
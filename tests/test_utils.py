@@ -1,6 +1,10 @@
+import os
+
 import pytest
 
+from hatch_zipped_directory.utils import _open_anonymous
 from hatch_zipped_directory.utils import atomic_write
+from hatch_zipped_directory.utils import prefetch
 
 
 def test_atomic_write(tmp_path):
@@ -44,3 +48,128 @@ def test_atomic_write_replace_failure(tmp_path):
             raise RuntimeError("test")
     assert dst.read_bytes() == b"orig"
     assert set(tmp_path.iterdir()) == {dst}
+
+
+@pytest.fixture(params=["rename", "full", "rename-anonymous", "full-anonymous"])
+def durability_kwargs(request):
+    durability, _, anonymous = request.param.partition("-")
+    return {"durability": durability, "anonymous": bool(anonymous)}
+
+
+def test_atomic_write_durability(tmp_path, durability_kwargs):
+    dst = tmp_path / "testfile.txt"
+    dst.write_bytes(b"orig")
+
+    with atomic_write(dst, **durability_kwargs) as fp:
+        fp.write(b"data")
+        assert dst.read_bytes() == b"orig"
+    assert dst.read_bytes() == b"data"
+    assert set(tmp_path.iterdir()) == {dst}
+
+
+def test_atomic_write_durability_failure(tmp_path, durability_kwargs):
+    dst = tmp_path / "testfile.txt"
+    dst.write_bytes(b"orig")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(dst, **durability_kwargs) as fp:
+            fp.write(b"data")
+            raise RuntimeError("test")
+    assert dst.read_bytes() == b"orig"
+    assert set(tmp_path.iterdir()) == {dst}
+
+
+def test_atomic_write_none(tmp_path):
+    dst = tmp_path / "testfile.txt"
+    dst.write_bytes(b"orig")
+
+    with open(dst, "rb") as reader:
+        with atomic_write(dst, durability="none") as fp:
+            fp.write(b"data")
+            fp.flush()
+            assert dst.read_bytes() == b"data"
+        # The old file is replaced, not overwritten
+        assert reader.read() == b"orig"
+    assert set(tmp_path.iterdir()) == {dst}
+
+
+def test_atomic_write_none_failure(tmp_path):
+    dst = tmp_path / "testfile.txt"
+    dst.write_bytes(b"orig")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(dst, durability="none") as fp:
+            fp.write(b"data")
+            raise RuntimeError("test")
+    assert set(tmp_path.iterdir()) == set()
+
+
+@pytest.mark.parametrize("durability, fsyncs", [("rename", 0), ("full", 2)])
+def test_atomic_write_fsync(tmp_path, monkeypatch, durability, fsyncs):
+    calls = []
+    monkeypatch.setattr(os, "fsync", calls.append)
+
+    with atomic_write(tmp_path / "testfile.txt", durability=durability) as fp:
+        fp.write(b"data")
+    assert len(calls) == fsyncs
+
+
+def test_atomic_write_anonymous(tmp_path):
+    dst = tmp_path / "testfile.txt"
+    fd = _open_anonymous(tmp_path)
+    if fd is None:
+        pytest.skip("O_TMPFILE is not supported")
+    os.close(fd)
+
+    with atomic_write(dst, anonymous=True) as fp:
+        fp.write(b"data")
+        # The temporary file has no name
+        assert set(tmp_path.iterdir()) == set()
+    assert dst.read_bytes() == b"data"
+    assert set(tmp_path.iterdir()) == {dst}
+
+
+def test_atomic_write_anonymous_unsupported(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, "O_TMPFILE", raising=False)
+    dst = tmp_path / "testfile.txt"
+
+    with atomic_write(dst, anonymous=True) as fp:
+        fp.write(b"data")
+        assert len(list(tmp_path.iterdir())) == 1
+    assert dst.read_bytes() == b"data"
+
+
+def test_atomic_write_unknown_durability(tmp_path):
+    with pytest.raises(ValueError, match="Unknown durability mode"):
+        with atomic_write(tmp_path / "testfile.txt", durability="fast"):
+            pass  # no cov
+
+
+def test_prefetch():
+    assert list(prefetch(range(100), 3)) == list(range(100))
+
+
+def test_prefetch_error():
+    def items():
+        yield 1
+        raise RuntimeError("test")
+
+    results = []
+    with pytest.raises(RuntimeError, match="test"):
+        for item in prefetch(items(), 3):
+            results.append(item)
+    assert results == [1]
+
+
+def test_prefetch_close():
+    produced = []
+
+    def items():
+        for n in range(100):
+            produced.append(n)
+            yield n
+
+    iterator = prefetch(items(), 3)
+    assert next(iterator) == 0
+    iterator.close()
+    assert len(produced) < 10
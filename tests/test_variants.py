@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_STORED
+
+import pytest
+
+from hatch_zipped_directory.cache import CompressionCache
+from hatch_zipped_directory.compression import Compression
+from hatch_zipped_directory.manifest import FileDigest
+from hatch_zipped_directory.rawzip import compress_file
+from hatch_zipped_directory.variants import SharedCompression
+
+DATA = b"Some data which compresses well. " * 1000
+
+
+@pytest.fixture
+def src_path(tmp_path: Path) -> str:
+    path = tmp_path / "src"
+    path.write_bytes(DATA)
+    return os.fspath(path)
+
+
+def test_SharedCompression(src_path: str) -> None:
+    shared = SharedCompression(3)
+    deflated = Compression(ZIP_DEFLATED)
+    stored = Compression(ZIP_STORED)
+    digest = FileDigest("sha256")
+
+    results = [
+        shared.compress_file(src_path, deflated, len(DATA), digest=digest),
+        shared.compress_file(src_path, stored, len(DATA)),
+        shared.compress_file(src_path, deflated, len(DATA)),
+    ]
+
+    assert results == [
+        compress_file(src_path, *deflated),
+        compress_file(src_path, *stored),
+        compress_file(src_path, *deflated),
+    ]
+    assert (shared.reads, shared.compressions) == (1, 2)
+    expected_digest = FileDigest("sha256")
+    expected_digest.update(DATA)
+    assert digest.record_hash() == expected_digest.record_hash()
+
+    # Once every consumer has had the file, its data is discarded
+    shared.compress_file(src_path, deflated, len(DATA))
+    assert (shared.reads, shared.compressions) == (2, 3)
+
+
+def test_SharedCompression_large_file(src_path: str) -> None:
+    shared = SharedCompression(2, max_size=len(DATA) - 1)
+    compression = Compression(ZIP_DEFLATED)
+    digest = FileDigest("sha256")
+
+    results = [
+        shared.compress_file(src_path, compression, len(DATA), digest=digest),
+        shared.compress_file(src_path, compression, len(DATA)),
+    ]
+
+    assert results == [compress_file(src_path, *compression)] * 2
+    # The file is streamed for each request, rather than held in memory
+    assert (shared.reads, shared.compressions) == (2, 2)
+    assert not shared._files
+    expected_digest = FileDigest("sha256")
+    expected_digest.update(DATA)
+    assert digest.record_hash() == expected_digest.record_hash()
+
+
+def test_SharedCompression_concurrent(tmp_path: Path) -> None:
+    paths = []
+    for n in range(20):
+        path = tmp_path / f"src{n}"
+        path.write_bytes(DATA + bytes([n]))
+        paths.append(os.fspath(path))
+    shared = SharedCompression(4)
+    compression = Compression(ZIP_DEFLATED)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda path: shared.compress_file(path, compression, len(DATA) + 1),
+                [path for path in paths for _ in range(4)],
+            )
+        )
+
+    assert results[::4] == [compress_file(path, *compression) for path in paths]
+    assert results[::4] == results[3::4]
+    assert (shared.reads, shared.compressions) == (20, 20)
+
+
+def test_SharedCompression_cache(tmp_path: Path, src_path: str) -> None:
+    cache = CompressionCache(tmp_path / "cache", min_size=1024)
+    compression = Compression(ZIP_DEFLATED)
+
+    for _ in range(2):
+        shared = SharedCompression(2, cache)
+        for _ in range(2):
+            compressed = shared.compress_file(src_path, compression, len(DATA))
+            assert compressed == compress_file(src_path, *compression)
+
+    assert (cache.hits, cache.misses) == (1, 1)